@@ -0,0 +1,192 @@
+"""Benchmark every API endpoint in-process against a synthetic dataset.
+
+    python -m benchmarks.run --db bench.db --concurrency 1,16 --requests 200 \\
+        --output results.json [--baseline previous.json]
+
+The app is driven through an ASGI client, so the numbers measure the app and
+database rather than the network. Results are written as JSON for comparing
+runs over time.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench.db", help="SQLite file to seed and benchmark (ignored with --database-url)")
+    parser.add_argument("--database-url", help="Benchmark another database, e.g. postgresql+asyncpg://...")
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--ingredients", type=int, default=100000)
+    parser.add_argument("--cost-entries", type=int, default=1000000)
+    parser.add_argument("--nutrients", type=int, default=200)
+    parser.add_argument("--reseed", action="store_true", help="Delete an existing SQLite file and seed again")
+    parser.add_argument("--concurrency", default="1,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests before each run")
+    parser.add_argument("--only", help="Only run scenarios whose name contains this text")
+    parser.add_argument("--skip-writes", action="store_true", help="Leave out scenarios that modify data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous JSON result file")
+    return parser.parse_args(argv)
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class QueryCounter:
+    def __init__(self, *engines):
+        from sqlalchemy import event
+        self.count = 0
+        for engine in set(engines):
+            event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+async def run_scenario(client, scenario, size, concurrency: int, requests: int, warmup: int, rng: random.Random, counter: QueryCounter) -> Dict:
+    for _ in range(warmup):
+        request = scenario.build(rng, size)
+        await client.request(request.method, request.url, json=request.json, content=request.content, headers=request.headers)
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            request = scenario.build(rng, size)
+            started = time.perf_counter()
+            response = await client.request(request.method, request.url, json=request.json, content=request.content, headers=request.headers)
+            await response.aread()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    queries_before = counter.count
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "endpoint": scenario.name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "queries_per_request": round((counter.count - queries_before) / len(latencies), 2),
+    }
+
+
+def print_table(results: List[Dict], baseline: Optional[Dict] = None) -> None:
+    previous = {(r["endpoint"], r["concurrency"]): r for r in (baseline or {}).get("results", [])}
+    header = f"{'endpoint':<48} {'conc':>4} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q/req':>6} {'err':>4}"
+    if previous:
+        header += f" {'rps vs base':>11}"
+    print(header)
+    for r in results:
+        line = (f"{r['endpoint']:<48} {r['concurrency']:>4} {r['rps']:>9} {r['p50_ms']:>8} "
+                f"{r['p95_ms']:>8} {r['p99_ms']:>8} {r['queries_per_request']:>6} {r['errors']:>4}")
+        before = previous.get((r["endpoint"], r["concurrency"]))
+        if before and before["rps"]:
+            line += f" {r['rps'] / before['rps']:>10.2f}x"
+        print(line)
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    # Configure the database before the app modules create their engine
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite+aiosqlite:///{args.db}"
+    if args.reseed and not args.database_url:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    import httpx
+    import sqlalchemy
+    from database import engine, read_engine
+    from main import app, lifespan
+    from benchmarks.seed import DatasetSize, existing_size, seed
+    from benchmarks.scenarios import SCENARIOS
+
+    requested = DatasetSize(args.recipes, args.ingredients, args.cost_entries, args.nutrients)
+    size = await existing_size(engine) if not args.reseed else DatasetSize(0, 0, 0, 0)
+    if size.recipes == 0:
+        print(f"Seeding {requested.as_dict()} ...", file=sys.stderr)
+        started = time.perf_counter()
+        await seed(engine, requested, args.seed)
+        print(f"Seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        size = await existing_size(engine)
+    else:
+        print(f"Reusing existing dataset {size.as_dict()}", file=sys.stderr)
+
+    scenarios = [
+        s for s in SCENARIOS
+        if (not args.only or args.only in s.name) and not (args.skip_writes and s.writes)
+    ]
+    levels = [int(level) for level in args.concurrency.split(",")]
+    rng = random.Random(args.seed)
+    counter = QueryCounter(engine, read_engine)
+    results = []
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for scenario in scenarios:
+                for concurrency in levels:
+                    result = await run_scenario(client, scenario, size, concurrency, args.requests, args.warmup, rng, counter)
+                    results.append(result)
+                    print(f"  {scenario.name} @ {concurrency}: {result['rps']} req/s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "database": engine.dialect.name,
+            "dataset": size.as_dict(),
+            "requests_per_run": args.requests,
+            "concurrency": levels,
+        },
+        "results": results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,130 @@
+import json
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from benchmarks.seed import DatasetSize, VENDORS
+from routes.pagination import encode_cursor
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    json: Optional[Any] = None
+    content: Optional[bytes] = None
+    headers: Optional[Dict[str, str]] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[[random.Random, DatasetSize], Request]
+    writes: bool = False
+
+
+def _recipe_id(rng: random.Random, size: DatasetSize) -> int:
+    return rng.randint(1, size.recipes)
+
+
+def _ingredient_id(rng: random.Random, size: DatasetSize) -> int:
+    return rng.randint(1, size.ingredients)
+
+
+def _ingredient_payload(rng: random.Random, size: DatasetSize) -> Dict:
+    nutrient_id = rng.randint(1, size.nutrients)
+    return {
+        "name": f"Bench ingredient {rng.randint(1, 10**9)}",
+        "weight": round(rng.uniform(5, 500), 1),
+        "cost": round(rng.uniform(0.5, 25), 2),
+        "nutrients": [{
+            "nutrient": {"id": nutrient_id, "name": f"Nutrient {nutrient_id}", "unit": "g"},
+            "amount": 1.5
+        }],
+    }
+
+
+SCENARIOS = [
+    Scenario("GET /recipes", lambda rng, size: Request("GET", "/recipes/?limit=50")),
+    Scenario("GET /recipes (deep cursor)", lambda rng, size: Request(
+        "GET", f"/recipes/?limit=50&cursor={encode_cursor(max(0, size.recipes - 100))}")),
+    Scenario("GET /recipes (deep skip)", lambda rng, size: Request(
+        "GET", f"/recipes/?limit=50&skip={max(0, size.recipes - 100)}")),
+    Scenario("GET /recipes/{id}", lambda rng, size: Request("GET", f"/recipes/{_recipe_id(rng, size)}")),
+    Scenario("GET /recipes?ids=20", lambda rng, size: Request(
+        "GET", "/recipes/?ids=" + ",".join(str(_recipe_id(rng, size)) for _ in range(20)))),
+    Scenario("GET /recipes/{id}/summary", lambda rng, size: Request("GET", f"/recipes/{_recipe_id(rng, size)}/summary")),
+    Scenario("POST /recipes/summaries", lambda rng, size: Request(
+        "POST", "/recipes/summaries", json={"recipe_ids": [_recipe_id(rng, size) for _ in range(20)]})),
+    Scenario("POST /recipes/reprice", lambda rng, size: Request(
+        "POST", "/recipes/reprice", json={"changes": [
+            {"vendor": rng.choice(VENDORS), "percent": round(rng.uniform(-20, 20), 1)},
+            {"ingredient_id": _ingredient_id(rng, size), "cost": round(rng.uniform(0.5, 25), 2)}
+        ]})),
+    Scenario("POST /meal-plans/evaluate (200 recipes)", lambda rng, size: Request(
+        "POST", "/meal-plans/evaluate", json={"recipes": [
+            {"recipe_id": _recipe_id(rng, size), "multiplier": rng.choice([0.5, 1, 2, 4])} for _ in range(200)
+        ]})),
+    Scenario("GET /ingredients", lambda rng, size: Request("GET", "/ingredients/?limit=50")),
+    Scenario("GET /ingredients?include_history=false", lambda rng, size: Request(
+        "GET", "/ingredients/?limit=50&include_history=false")),
+    Scenario("GET /ingredients/{id}", lambda rng, size: Request("GET", f"/ingredients/{_ingredient_id(rng, size)}")),
+    Scenario("GET /ingredients?ids=50", lambda rng, size: Request(
+        "GET", "/ingredients/?include_history=false&ids=" + ",".join(str(_ingredient_id(rng, size)) for _ in range(50)))),
+    Scenario("GET /ingredients/{id}/cost_history", lambda rng, size: Request(
+        "GET", f"/ingredients/{_ingredient_id(rng, size)}/cost_history")),
+    Scenario("GET /ingredients/{id}/cost_history?bucket=week", lambda rng, size: Request(
+        "GET", f"/ingredients/{_ingredient_id(rng, size)}/cost_history?bucket=week")),
+    Scenario("GET /ingredients/cost_history?ids=50", lambda rng, size: Request(
+        "GET", "/ingredients/cost_history?bucket=month&ids=" + ",".join(
+            str(_ingredient_id(rng, size)) for _ in range(50)))),
+    Scenario("GET /ingredients/{id}/similar", lambda rng, size: Request(
+        "GET", f"/ingredients/{_ingredient_id(rng, size)}/similar")),
+    Scenario("POST /ingredients/search-by-profile", lambda rng, size: Request(
+        "POST", "/ingredients/search-by-profile", json={"nutrients": [
+            {"nutrient_id": rng.randint(1, size.nutrients), "amount": round(rng.uniform(0.1, 30), 1)} for _ in range(3)
+        ]})),
+    Scenario("GET /ingredients/{id}/vendors", lambda rng, size: Request(
+        "GET", f"/ingredients/{_ingredient_id(rng, size)}/vendors")),
+    Scenario("GET /vendors/cheapest?ingredient_ids=50", lambda rng, size: Request(
+        "GET", "/vendors/cheapest?ingredient_ids=" + ",".join(str(_ingredient_id(rng, size)) for _ in range(50)))),
+    Scenario("GET /vendors/cheapest/recipes?recipe_ids=20", lambda rng, size: Request(
+        "GET", "/vendors/cheapest/recipes?recipe_ids=" + ",".join(str(_recipe_id(rng, size)) for _ in range(20)))),
+    Scenario("GET /nutrients", lambda rng, size: Request("GET", "/nutrients/")),
+    Scenario("GET /nutrients/{id}", lambda rng, size: Request("GET", f"/nutrients/{rng.randint(1, size.nutrients)}")),
+    Scenario("GET /search (prefix)", lambda rng, size: Request(
+        "GET", f"/search?q=Ingredient%20{rng.randint(1, 999)}")),
+    Scenario("GET /search (typo)", lambda rng, size: Request(
+        "GET", f"/search?q=Ingrdient%20{rng.randint(100, 999)}")),
+    Scenario("GET /changes", lambda rng, size: Request(
+        "GET", f"/changes?since={rng.randint(0, size.recipes + size.ingredients)}")),
+    Scenario("GET /changes?payloads=true", lambda rng, size: Request(
+        "GET", f"/changes?limit=100&payloads=true&include_history=false&since={rng.randint(0, size.recipes + size.ingredients)}")),
+    Scenario("GET /export/recipes", lambda rng, size: Request("GET", "/export/recipes")),
+    Scenario("POST /recipes", lambda rng, size: Request("POST", "/recipes/", json={
+        "name": f"Bench recipe {rng.randint(1, 10**9)}",
+        "ingredients": [_ingredient_payload(rng, size) for _ in range(5)]
+    }), writes=True),
+    Scenario("PATCH /recipes/{id} (rename)", lambda rng, size: Request(
+        "PATCH", f"/recipes/{_recipe_id(rng, size)}", json={"name": f"Bench recipe {rng.randint(1, 10**9)}"}), writes=True),
+    Scenario("POST /ingredients/{recipe_id}", lambda rng, size: Request(
+        "POST", f"/ingredients/{_recipe_id(rng, size)}", json=_ingredient_payload(rng, size)), writes=True),
+    Scenario("PUT /ingredients/{id}", lambda rng, size: Request(
+        "PUT", f"/ingredients/{_ingredient_id(rng, size)}", json=_ingredient_payload(rng, size)), writes=True),
+    Scenario("POST /ingredients/{id}/cost", lambda rng, size: Request(
+        "POST", f"/ingredients/{_ingredient_id(rng, size)}/cost",
+        json={"cost": round(rng.uniform(0.5, 25), 2), "vendor": "Bench"}), writes=True),
+    Scenario("POST /ingredients/{id}/cost (return=minimal)", lambda rng, size: Request(
+        "POST", f"/ingredients/{_ingredient_id(rng, size)}/cost",
+        json={"cost": round(rng.uniform(0.5, 25), 2), "vendor": "Bench"},
+        headers={"Prefer": "return=minimal"}), writes=True),
+    Scenario("POST /nutrients/bulk (1000 lines)", lambda rng, size: Request(
+        "POST", "/nutrients/bulk", content="\n".join(
+            json.dumps({"name": f"Nutrient {rng.randint(1, size.nutrients)}", "unit": "g",
+                        "ingredient_id": _ingredient_id(rng, size), "amount": round(rng.uniform(0.01, 50), 2)})
+            for _ in range(1000)).encode()), writes=True),
+    Scenario("POST /ingredients/bulk (100 lines)", lambda rng, size: Request(
+        "POST", "/ingredients/bulk", content="\n".join(
+            json.dumps({**_ingredient_payload(rng, size), "recipe_id": _recipe_id(rng, size)})
+            for _ in range(100)).encode()), writes=True),
+]
@@ -0,0 +1,115 @@
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database import Base
+from models.recipe import Recipe
+from models.ingredient import Ingredient, CostEntry, ingredient_nutrients
+from models.nutrient import Nutrient
+
+VENDORS = ["Acme Foods", "FreshCo", "Bulk Barn", "Market Hall", "GreenGrocer"]
+NUTRIENTS_PER_INGREDIENT = 5
+BATCH_SIZE = 10000
+
+
+@dataclass
+class DatasetSize:
+    recipes: int
+    ingredients: int
+    cost_entries: int
+    nutrients: int
+
+    def as_dict(self) -> dict:
+        return {
+            "recipes": self.recipes,
+            "ingredients": self.ingredients,
+            "cost_entries": self.cost_entries,
+            "nutrients": self.nutrients,
+        }
+
+
+async def _insert_batched(conn, table, rows) -> None:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            await conn.execute(insert(table), batch)
+            batch = []
+    if batch:
+        await conn.execute(insert(table), batch)
+
+
+async def existing_size(engine: AsyncEngine) -> DatasetSize:
+    # A fresh database has no tables yet; seed() creates them
+    models = (Recipe, Ingredient, CostEntry, Nutrient)
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
+        if not all(model.__tablename__ in tables for model in models):
+            return DatasetSize(0, 0, 0, 0)
+        counts = [
+            (await conn.execute(select(func.count()).select_from(model))).scalar_one()
+            for model in models
+        ]
+    return DatasetSize(*counts)
+
+
+async def seed(engine: AsyncEngine, size: DatasetSize, seed_value: int = 42) -> None:
+    """Fill an empty database with a deterministic synthetic catalog.
+
+    Ids are assigned explicitly so scenarios can address rows without
+    querying for them first.
+    """
+    rng = random.Random(seed_value)
+    now = datetime.now().replace(microsecond=0)
+    entries_per_ingredient = max(1, size.cost_entries // max(1, size.ingredients))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+        await _insert_batched(conn, Nutrient.__table__, (
+            {"id": n, "name": f"Nutrient {n}", "unit": rng.choice(["g", "mg", "ug", "kcal"])}
+            for n in range(1, size.nutrients + 1)
+        ))
+        await _insert_batched(conn, Recipe.__table__, (
+            {"id": r, "name": f"Recipe {r}"} for r in range(1, size.recipes + 1)
+        ))
+
+        prices = {}
+
+        def ingredient_rows():
+            for i in range(1, size.ingredients + 1):
+                prices[i] = [round(rng.uniform(0.5, 25.0), 2) for _ in range(entries_per_ingredient)]
+                yield {
+                    "id": i,
+                    "name": f"Ingredient {i}",
+                    "weight": round(rng.uniform(5, 500), 1),
+                    "recipe_id": (i - 1) % size.recipes + 1,
+                    "current_cost": prices[i][-1],
+                    "current_cost_date": now,
+                }
+        await _insert_batched(conn, Ingredient.__table__, ingredient_rows())
+
+        def cost_rows():
+            # Daily prices ending today, rotating through the vendors
+            for i in range(1, size.ingredients + 1):
+                history = prices.pop(i)
+                for day, cost in enumerate(history):
+                    yield {
+                        "ingredient_id": i,
+                        "cost": cost,
+                        "date": now - timedelta(days=len(history) - 1 - day),
+                        "vendor": VENDORS[(i + day) % len(VENDORS)],
+                        "notes": None,
+                    }
+        await _insert_batched(conn, CostEntry.__table__, cost_rows())
+
+        if size.nutrients:
+            per_ingredient = min(NUTRIENTS_PER_INGREDIENT, size.nutrients)
+            await _insert_batched(conn, ingredient_nutrients, (
+                {"ingredient_id": i, "nutrient_id": n, "amount": round(rng.uniform(0.1, 50), 2)}
+                for i in range(1, size.ingredients + 1)
+                for n in rng.sample(range(1, size.nutrients + 1), per_ingredient)
+            ))
@@ -0,0 +1,128 @@
+"""Benchmark process startup and the first requests after it.
+
+    python -m benchmarks.startup --db bench.db --runs 5
+
+Each run is a fresh Python process, like a newly started worker. It
+reports import time, time spent in the lifespan, and the latency of the
+first and second request to a few endpoints. It does this for each
+startup mode:
+
+- bootstrap: schema bootstrap in every worker, nothing warmed (main.py)
+- prebootstrapped: schema bootstrapped once before the workers start
+- warm: prebootstrapped, then each worker opens its connections and builds
+  the nutrient matrix before the first request
+- serve: like warm, but the matrix comes from a snapshot built once before the
+  workers start; this is what serve.py does
+
+The database must already exist; seed it with benchmarks.run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+MODES = {
+    "bootstrap": {"BOOTSTRAP_SCHEMA": "true", "WARM_START": "false"},
+    "prebootstrapped": {"BOOTSTRAP_SCHEMA": "false", "WARM_START": "false"},
+    "warm": {"BOOTSTRAP_SCHEMA": "false", "WARM_START": "true"},
+    "serve": {"BOOTSTRAP_SCHEMA": "false", "WARM_START": "true"},
+}
+
+SERVE_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "serve.py")
+
+PATHS = [
+    "/recipes/1",
+    "/recipes/2/summary",
+    "/ingredients/3/similar",
+    "/nutrients/",
+]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench.db", help="Seeded SQLite file (ignored with --database-url)")
+    parser.add_argument("--database-url", help="Benchmark another database, e.g. postgresql+asyncpg://...")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per mode")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+async def measure_once() -> Dict[str, float]:
+    # Runs inside the child process, with the mode's environment applied
+    started = time.perf_counter()
+    import httpx
+    from main import app, lifespan
+    result = {"import": time.perf_counter() - started}
+
+    started = time.perf_counter()
+    async with lifespan(app):
+        result["lifespan"] = time.perf_counter() - started
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://startup") as client:
+            for attempt in ("first", "second"):
+                for path in PATHS:
+                    requested = time.perf_counter()
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    result[f"{attempt} {path}"] = time.perf_counter() - requested
+    # Until every probed endpoint has answered once
+    result["ready"] = result["import"] + result["lifespan"] + sum(result[f"first {path}"] for path in PATHS)
+    return result
+
+
+def run_child(url: str, mode: str, snapshot: str) -> Dict[str, float]:
+    env = {**os.environ, **MODES[mode], "DATABASE_URL": url}
+    if mode == "serve":
+        env["NUTRIENT_MATRIX_SNAPSHOT"] = snapshot
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(args: argparse.Namespace) -> Dict:
+    url = args.database_url or f"sqlite+aiosqlite:///{os.path.abspath(args.db)}"
+    if not args.database_url and not os.path.exists(args.db):
+        sys.exit(f"{args.db} does not exist; seed it with python -m benchmarks.run first")
+    # serve.py's one-time preparation: it bootstraps the schema, so every
+    # mode starts from the same state, and writes the matrix snapshot
+    handle, snapshot = tempfile.mkstemp(suffix=".pickle")
+    os.close(handle)
+    try:
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, SERVE_SCRIPT, "--prepare", snapshot],
+            env={**os.environ, "DATABASE_URL": url}, capture_output=True, check=True
+        )
+        print(f"serve.py preparation: {(time.perf_counter() - started) * 1000:.1f} ms, once per deployment")
+
+        results = {}
+        for mode in MODES:
+            runs = [run_child(url, mode, snapshot) for _ in range(args.runs)]
+            results[mode] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+    finally:
+        os.remove(snapshot)
+
+    keys = list(next(iter(results.values())))
+    print(f"{'median ms':<32}" + "".join(f"{mode:>17}" for mode in results))
+    for key in keys:
+        print(f"{key:<32}" + "".join(f"{results[mode][key] * 1000:>17.1f}" for mode in results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": args.runs, "results": results}, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.child:
+        print(json.dumps(asyncio.run(measure_once())))
+    else:
+        main(arguments)
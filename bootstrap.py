@@ -0,0 +1,43 @@
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database import Base
+import models  # noqa: F401  (registers every table)
+from repositories.search_repository import create_search_indexes
+from repositories.vendor_repository import backfill_vendor_prices
+from repositories.ingredient_repository import backfill_current_costs
+from repositories.change_repository import bootstrap_changes
+
+def upgrade_tables(connection) -> List[str]:
+    # create_all skips tables that already exist, so columns and indexes
+    # added to them since are created here; returns "table.column" of the
+    # columns added. New columns must be nullable, without a server default.
+    inspector = inspect(connection)
+    existing = set(inspector.get_table_names())
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in present:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column_type}'))
+            added.append(f"{table.name}.{column.name}")
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    return added
+
+async def prepare_database(engine: AsyncEngine) -> None:
+    # Tables, indexes and derived data; safe to run on every start
+    async with engine.begin() as conn:
+        added = await conn.run_sync(upgrade_tables)
+        await conn.run_sync(Base.metadata.create_all)
+        if "ingredients.current_cost" in added:
+            await conn.run_sync(backfill_current_costs)
+        await conn.run_sync(create_search_indexes)
+        await conn.run_sync(backfill_vendor_prices)
+        await conn.run_sync(bootstrap_changes)
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from settings import settings
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+class TTLCache:
+    """Bounded in-process LRU cache whose entries also expire after ttl seconds.
+
+    Each worker process has its own copy; writes invalidate the local entries
+    and the ttl bounds how stale another worker's copy can get. Loaders take
+    generation(key) before reading and pass it to set, which then skips
+    storing a body read before an invalidation that happened meanwhile.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Bumped by clear; per-key counts are bumped by invalidate
+        self._epoch = 0
+        self._generations: Dict[Hashable, int] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def generation(self, key: Hashable) -> tuple:
+        return (self._epoch, self._generations.get(key, 0))
+
+    def set(self, key: Hashable, value: Any, generation: Optional[tuple] = None) -> Any:
+        # Returns value either way, so loaders can still answer with it
+        if generation is not None and generation != self.generation(key):
+            return value
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        if len(self._generations) >= 4 * self.maxsize:
+            # Bounds the counters; starting a new epoch only costs in-flight loads their store
+            self._epoch += 1
+            self._generations.clear()
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._epoch += 1
+        self._generations.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SingleFlight:
+    """Coalesces concurrent loads of the same key into one.
+
+    The load runs as its own task, so a caller that goes away (client
+    disconnect) doesn't cancel it for the others still waiting. Loaders
+    should therefore open their own session rather than borrow a request's.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(load())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+# The nutrient catalog rarely changes; recipes are keyed by id
+nutrient_cache = TTLCache(maxsize=settings.nutrient_cache_size, ttl=settings.nutrient_cache_ttl)
+recipe_cache = TTLCache(maxsize=settings.recipe_cache_size, ttl=settings.recipe_cache_ttl)
+
+recipe_loads = SingleFlight()
+ingredient_loads = SingleFlight()
@@ -0,0 +1,84 @@
+"""Maintenance commands, run against the database in DATABASE_URL.
+
+    python cli.py compact-costs [--horizon-days 365] [--period month] [--vacuum]
+    python cli.py load-nutrients catalog.csv [--chunk-size 5000]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import AsyncIterator, List, Optional
+
+from settings import settings
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compact = commands.add_parser("compact-costs", help="Drop repeated prices and roll up old cost history")
+    compact.add_argument("--horizon-days", type=int, default=settings.cost_history_horizon_days,
+                         help="Entries older than this are rolled up")
+    compact.add_argument("--period", choices=("day", "week", "month"), default=settings.cost_compaction_period,
+                         help="One entry per ingredient, vendor and period is kept beyond the horizon")
+    compact.add_argument("--chunk-size", type=int, default=500, help="Ingredients per transaction")
+    compact.add_argument("--vacuum", action="store_true", help="Return freed space to the filesystem afterwards")
+
+    load = commands.add_parser("load-nutrients", help="Upsert nutrients and per-100g amounts from a CSV or NDJSON file")
+    load.add_argument("path", help="File to load, '-' for stdin")
+    load.add_argument("--format", choices=("csv", "ndjson"), help="Defaults to csv for .csv files, else ndjson")
+    load.add_argument("--chunk-size", type=int, default=5000, help="Lines per transaction")
+    return parser.parse_args(argv)
+
+
+async def read_chunks(path: str, size: int = 1 << 20) -> AsyncIterator[bytes]:
+    with (open(sys.stdin.fileno(), "rb", closefd=False) if path == "-" else open(path, "rb")) as source:
+        while True:
+            data = await asyncio.to_thread(source.read, size)
+            if not data:
+                return
+            yield data
+
+
+async def compact_costs(args: argparse.Namespace) -> dict:
+    from services.cost_compaction import compact_costs, reclaim_space
+    from database import engine
+
+    async def report(done: int, total: Optional[int]) -> None:
+        print(f"{done} ingredients" + (f" of {total}" if total is not None else ""), file=sys.stderr)
+
+    result = await compact_costs(args.horizon_days, args.period, args.chunk_size, report)
+    if args.vacuum:
+        await reclaim_space(engine)
+    return result
+
+
+async def load_nutrients(args: argparse.Namespace) -> dict:
+    from database import SessionLocal
+    from repositories.nutrient_repository import NutrientRepository
+    from routes.ndjson import import_csv, import_ndjson
+    from schemas.bulk import NutrientImport
+
+    csv_format = args.format == "csv" or (args.format is None and args.path.lower().endswith(".csv"))
+    load = import_csv if csv_format else import_ndjson
+    async with SessionLocal() as session:
+        result = await load(read_chunks(args.path), NutrientImport, NutrientRepository(session).bulk_upsert, args.chunk_size)
+    return result.model_dump()
+
+
+async def main(args: argparse.Namespace) -> dict:
+    from bootstrap import prepare_database
+    from database import engine
+
+    await prepare_database(engine)
+    try:
+        if args.command == "compact-costs":
+            return await compact_costs(args)
+        if args.command == "load-nutrients":
+            return await load_nutrients(args)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    print(json.dumps(asyncio.run(main(parse_args())), indent=2))
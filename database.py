@@ -1,15 +1,104 @@
+import os
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./recipes.db"
+from settings import settings
+
+SQLALCHEMY_DATABASE_URL = settings.database_url
+
+# Requests with these methods get a session on the read-only engine
+READ_METHODS = ("GET", "HEAD")
+
+def _sqlite_pragmas(read_only: bool = False) -> list:
+    pragmas = [
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",
+        f"PRAGMA mmap_size={settings.sqlite_mmap_size}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if read_only:
+        # journal_mode and synchronous are the writer's to set
+        return pragmas + ["PRAGMA query_only=ON"]
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+    ] + pragmas
+
+def _is_memory_database(url: str) -> bool:
+    # SQLAlchemy gives in-memory SQLite a single shared connection (StaticPool)
+    parsed = make_url(url)
+    return url.startswith("sqlite") and (
+        not parsed.database or parsed.database == ":memory:" or parsed.query.get("mode") == "memory"
+    )
+
+def read_database_url(url: str = SQLALCHEMY_DATABASE_URL) -> Optional[str]:
+    # URL of the read-only engine, or None to read through the main engine
+    if not settings.db_read_split:
+        return None
+    if settings.read_database_url:
+        return settings.read_database_url
+    if not url.startswith("sqlite"):
+        return url
+    parsed = make_url(url)
+    if _is_memory_database(url) or parsed.query.get("uri"):
+        return None
+    # Same file opened read-only; readers never block the writer under WAL
+    return f"{parsed.drivername}:///file:{os.path.abspath(parsed.database)}?mode=ro&uri=true"
 
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+def create_engine_from_settings(url: str = SQLALCHEMY_DATABASE_URL, read_only: bool = False):
+    options = {"echo": settings.db_echo}
+    # StaticPool takes no pool sizing
+    if not _is_memory_database(url):
+        options["pool_size"] = settings.db_pool_size
+        options["max_overflow"] = settings.db_max_overflow
+        options["pool_timeout"] = settings.db_pool_timeout
+        if read_only:
+            options["pool_size"] = settings.db_read_pool_size or max(os.cpu_count() or 1, 4)
+            options["max_overflow"] = settings.db_read_max_overflow
+    if url.startswith("sqlite"):
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.sqlite_busy_timeout_ms / 1000,
+        }
+    else:
+        # Server databases drop idle connections; check them before use
+        options["pool_pre_ping"] = True
+        options["pool_recycle"] = settings.db_pool_recycle
+        if read_only and url.startswith("postgresql+asyncpg"):
+            options["connect_args"] = {"server_settings": {"default_transaction_read_only": "on"}}
+
+    new_engine = create_async_engine(url, **options)
+
+    if url.startswith("sqlite"):
+        pragmas = _sqlite_pragmas(read_only)
+
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def apply_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return new_engine
+
+engine = create_engine_from_settings()
 SessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+_read_url = read_database_url()
+read_engine = create_engine_from_settings(_read_url, read_only=True) if _read_url else engine
+ReadSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session 
\ No newline at end of file
+async def get_db(request: Request):
+    # GET requests read through the read-only engine; everything else,
+    # including read-only POSTs, uses the read-write one
+    factory = ReadSessionLocal if request.method in READ_METHODS else SessionLocal
+    async with factory() as session:
+        yield session
@@ -1,16 +1,34 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from routes import recipe_router, ingredient_router, nutrient_router
-from database import engine, Base
+from routes import recipe_router, ingredient_router, nutrient_router, export_router, search_router, vendor_router, jobs_router, changes_router, meal_plans_router
+from routes.pagination import NEXT_CURSOR_HEADER
+from database import engine, read_engine
+from bootstrap import prepare_database
+from settings import settings
+from services.warmup import warm_up
+from services.jobs import job_runner
+from metrics import MetricsMiddleware, instrument_engine, instrument_sessions, render_metrics, metrics_files
+
+instrument_engine(engine)
+if read_engine is not engine:
+    instrument_engine(read_engine)
+instrument_sessions()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Create database tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    if settings.bootstrap_schema:
+        await prepare_database(engine)
+    if settings.warm_start:
+        await warm_up()
+    await metrics_files.start()
+    await job_runner.start()
     yield
+    await job_runner.stop()
+    await metrics_files.stop()
 
 app = FastAPI(
     title="Recipe API",
@@ -25,16 +43,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(recipe_router)
 app.include_router(ingredient_router)
 app.include_router(nutrient_router)
+app.include_router(export_router)
+app.include_router(search_router)
+app.include_router(vendor_router)
+app.include_router(jobs_router)
+app.include_router(changes_router)
+app.include_router(meal_plans_router)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Nutricost API"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8080, reload=True)
\ No newline at end of file
@@ -0,0 +1,324 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from settings import settings
+
+logger = logging.getLogger("nutricost.metrics")
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_time: float = 0.0
+    rows: int = 0
+    endpoint_finished_at: Optional[float] = None
+    serialization_time: float = 0.0
+
+
+current_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_stats", default=None)
+
+LabelValues = Tuple[str, ...]
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value:g}")
+        return lines
+
+    def empty(self) -> "Counter":
+        return Counter(self.name, self.documentation, self.labels)
+
+    def dump(self) -> list:
+        return [[list(labels), value] for labels, value in self.values.items()]
+
+    def load(self, items: list) -> None:
+        # Adds a dump (from another process) to these values
+        for labels, value in items:
+            self.inc(tuple(labels), value)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self.values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, labels: LabelValues, value: float) -> None:
+        counts, total, count = self.values.get(labels) or ([0] * len(self.buckets), 0.0, 0)
+        index = bisect_left(self.buckets, value)
+        if index < len(counts):
+            counts[index] += 1
+        self.values[labels] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), labels + (f'{bound:g}',))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labels + ('le',), labels + ('+Inf',))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return lines
+
+    def empty(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, self.labels, self.buckets)
+
+    def dump(self) -> list:
+        return [[list(labels), counts, total, count] for labels, (counts, total, count) in self.values.items()]
+
+    def load(self, items: list) -> None:
+        # Adds a dump (from another process) to these values
+        for labels, counts, total, count in items:
+            key = tuple(labels)
+            current, current_total, current_count = self.values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            self.values[key] = ([a + b for a, b in zip(current, counts)], current_total + total, current_count + count)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+ROUTE_LABELS = ("method", "route")
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+REQUESTS = Counter("nutricost_http_requests_total", "HTTP requests by route and status.", ROUTE_LABELS + ("status",))
+LATENCY = Histogram("nutricost_http_request_duration_seconds", "Request latency.", ROUTE_LABELS, LATENCY_BUCKETS)
+DB_QUERIES = Histogram("nutricost_db_queries_per_request", "SQL statements executed per request.", ROUTE_LABELS, COUNT_BUCKETS)
+DB_TIME = Histogram("nutricost_db_time_seconds", "Time spent executing SQL per request.", ROUTE_LABELS, LATENCY_BUCKETS)
+DB_ROWS = Histogram("nutricost_db_rows_per_request", "Rows returned or affected by SQL per request.", ROUTE_LABELS, ROW_BUCKETS)
+SERIALIZATION = Histogram("nutricost_serialization_seconds", "Response validation and serialization time.", ROUTE_LABELS, LATENCY_BUCKETS)
+QUERY_WARNINGS = Counter("nutricost_query_threshold_exceeded_total", "Requests over the query-count warning threshold.", ROUTE_LABELS)
+
+REGISTRY = [REQUESTS, LATENCY, DB_QUERIES, DB_TIME, DB_ROWS, SERIALIZATION, QUERY_WARNINGS]
+
+
+class MetricsFiles:
+    """Shares metrics between worker processes through a directory.
+
+    Each process writes its totals to its own file every interval and when
+    it stops, and render_metrics sums all the files, so /metrics reports the
+    same totals whichever worker answers. Other workers' numbers lag by up to
+    one interval. Files of workers that exited are kept, so totals don't drop
+    when a worker is replaced.
+    """
+
+    def __init__(self, directory: str, interval: float):
+        self.directory = directory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def write(self) -> None:
+        path = os.path.join(self.directory, f"worker-{os.getpid()}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump({metric.name: metric.dump() for metric in REGISTRY}, f)
+        os.replace(path + ".tmp", path)
+
+    def read_all(self) -> List[dict]:
+        states = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    states.append(json.load(f))
+            except (OSError, ValueError):
+                logger.warning("Could not read metrics file %s", name)
+        return states
+
+    async def start(self) -> None:
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._task = asyncio.create_task(self._flush())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self.write()
+
+    async def _flush(self) -> None:
+        while True:
+            self.write()
+            await asyncio.sleep(self.interval)
+
+
+metrics_files = MetricsFiles(settings.metrics_dir, settings.metrics_flush_interval)
+
+
+def render_metrics() -> str:
+    registry = REGISTRY
+    if metrics_files.directory:
+        # This process's own numbers fresh, the others' from their last flush
+        metrics_files.write()
+        registry = [metric.empty() for metric in REGISTRY]
+        for state in metrics_files.read_all():
+            for metric in registry:
+                metric.load(state.get(metric.name, []))
+    return "\n".join(line for metric in registry for line in metric.render()) + "\n"
+
+
+def instrument_engine(engine) -> None:
+    """Attribute every SQL statement on this engine to the current request."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    def finished(conn) -> Optional[RequestStats]:
+        started_at = conn.info["query_started_at"].pop()
+        stats = current_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - started_at
+        return stats
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = finished(conn)
+        # DML reports rowcount, RETURNING or not; rows that queries return
+        # are counted as the session reads them (see instrument_sessions)
+        dml = context.isinsert or context.isupdate or context.isdelete
+        if stats is not None and (dml or cursor.description is None) and cursor.rowcount > 0:
+            stats.rows += cursor.rowcount
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute; without this
+        # its start time would be left on the connection's stack
+        if context.connection is not None and context.execution_context is not None and context.connection.info.get("query_started_at"):
+            finished(context.connection)
+
+
+def instrument_sessions() -> None:
+    """Count the rows each request's queries return.
+
+    Results are buffered by the async session anyway, so reading them into a
+    frozen result and handing back a copy costs little. ORM DML is counted by
+    rowcount in instrument_engine, and streamed results (yield_per,
+    stream_results) are passed through uncounted.
+    """
+
+    @event.listens_for(Session, "do_orm_execute")
+    def do_orm_execute(orm_execute_state):
+        stats = current_stats.get()
+        options = orm_execute_state.execution_options
+        if stats is None or options.get("yield_per") or options.get("stream_results"):
+            return None
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            return None
+        result = orm_execute_state.invoke_statement()
+        if not getattr(result, "returns_rows", True):
+            return result
+        frozen = result.freeze()
+        stats.rows += len(frozen.data)
+        return frozen()
+
+
+class InstrumentedRoute(APIRoute):
+    """Marks when the endpoint returns so the rest of the handler (response
+    validation and serialization) can be timed separately."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        @wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                stats = current_stats.get()
+                if stats is not None:
+                    stats.endpoint_finished_at = time.perf_counter()
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            stats = current_stats.get()
+            if stats is not None and stats.endpoint_finished_at is not None:
+                stats.serialization_time = time.perf_counter() - stats.endpoint_finished_at
+            return response
+
+        return timed_handler
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streaming responses are not buffered."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started_at = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.metrics_server_timing:
+                    timing = (
+                        f"db;dur={stats.db_time * 1000:.2f};desc=\"{stats.queries} queries\", "
+                        f"serialize;dur={stats.serialization_time * 1000:.2f}, "
+                        f"total;dur={(time.perf_counter() - started_at) * 1000:.2f}"
+                    )
+                    message.setdefault("headers", []).append((b"server-timing", timing.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_stats.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            REQUESTS.inc(labels + (str(status),))
+            LATENCY.observe(labels, time.perf_counter() - started_at)
+            DB_QUERIES.observe(labels, stats.queries)
+            DB_TIME.observe(labels, stats.db_time)
+            DB_ROWS.observe(labels, stats.rows)
+            SERIALIZATION.observe(labels, stats.serialization_time)
+            threshold = settings.query_count_warning_threshold
+            if threshold and stats.queries > threshold:
+                QUERY_WARNINGS.inc(labels)
+                logger.warning("%s %s ran %d SQL queries (threshold %d)", scope["method"], scope["path"], stats.queries, threshold)
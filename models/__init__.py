@@ -1,5 +1,7 @@
 from models.recipe import Recipe
-from models.ingredient import Ingredient
+from models.ingredient import Ingredient, IngredientNutrient, VendorPrice
 from models.nutrient import Nutrient
+from models.job import Job
+from models.change import Change, ChangeCounter
 
-__all__ = ["Recipe", "Ingredient", "Nutrient"]
\ No newline at end of file
+__all__ = ["Recipe", "Ingredient", "IngredientNutrient", "VendorPrice", "Nutrient", "Job", "Change", "ChangeCounter"]
\ No newline at end of file
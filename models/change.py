@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
+from database import Base
+
+class Change(Base):
+    # Latest change per entity; every write moves the row to a new version,
+    # deletes leave a tombstone
+    __tablename__ = "changes"
+
+    entity = Column(String, primary_key=True)  # recipe, ingredient or nutrient
+    entity_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    deleted = Column(Boolean, nullable=False, default=False)
+    changed_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_changes_version", "version", unique=True),
+        Index("ix_changes_entity_version", "entity", "version"),
+    )
+
+class ChangeCounter(Base):
+    # Single row handing out versions. Writers hold its row lock until they
+    # commit, so versions become visible in order and a reader never skips one.
+    __tablename__ = "change_counter"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Table
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Table, Index
 from sqlalchemy.orm import relationship
+from datetime import datetime
 
 from database import Base
 from models.nutrient import Nutrient
@@ -15,6 +16,20 @@ class CostEntry(Base):
     ingredient_id = Column(Integer, ForeignKey("ingredients.id"))
     ingredient = relationship("Ingredient", back_populates="cost_entries")
 
+    __table_args__ = (
+        Index("ix_cost_entries_ingredient_id_date", "ingredient_id", "date"),
+    )
+
+class VendorPrice(Base):
+    # Latest cost per (ingredient, vendor), maintained alongside cost_entries
+    # so cheapest-vendor lookups never scan the history
+    __tablename__ = "vendor_prices"
+
+    ingredient_id = Column(Integer, ForeignKey("ingredients.id"), primary_key=True)
+    vendor = Column(String, primary_key=True)
+    cost = Column(Float, nullable=False)
+    date = Column(DateTime, nullable=False)
+
 ingredient_nutrients = Table(
     'ingredient_nutrients',
     Base.metadata,
@@ -23,14 +38,34 @@ ingredient_nutrients = Table(
     Column('amount', Float, nullable=False)  # Amount per 100g of ingredient
 )
 
+class IngredientNutrient(Base):
+    # Association object so the per-100g amount travels with the nutrient
+    __table__ = ingredient_nutrients
+
+    nutrient = relationship("Nutrient", lazy="joined")
+
 class Ingredient(Base):
     __tablename__ = "ingredients"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     weight = Column(Float)  # Weight in grams
-    recipe_id = Column(Integer, ForeignKey("recipes.id"))
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), index=True)
+    # Denormalized copy of the latest cost entry, kept current on every write
+    current_cost = Column(Float, nullable=True)
+    current_cost_date = Column(DateTime, nullable=True)
     
     recipe = relationship("Recipe", back_populates="ingredients")
-    cost_entries = relationship("CostEntry", back_populates="ingredient", cascade="all, delete-orphan")
-    nutrients = relationship("Nutrient", secondary=ingredient_nutrients, lazy="joined")
\ No newline at end of file
+    cost_entries = relationship("CostEntry", back_populates="ingredient", cascade="all, delete-orphan", order_by="CostEntry.id")
+    nutrients = relationship("IngredientNutrient", lazy="selectin", cascade="all, delete-orphan", order_by=ingredient_nutrients.c.nutrient_id)
+    vendor_prices = relationship("VendorPrice", cascade="all, delete-orphan")
+
+    @property
+    def cost(self) -> float:
+        return self.current_cost if self.current_cost is not None else 0.0
+
+    def record_cost(self, cost: float, date: datetime) -> None:
+        # Backdated entries go into the history without replacing a newer price
+        if self.current_cost_date is None or date >= self.current_cost_date:
+            self.current_cost = cost
+            self.current_cost_date = date
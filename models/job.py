@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, JSON, Index
+from database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed, cancelled
+    params = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON)
+    error = Column(Text)
+    done = Column(Integer, nullable=False, default=0)
+    total = Column(Integer)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    # Heartbeat from the process running the job; a stale one means it died
+    updated_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_jobs_status", "status"),
+    )
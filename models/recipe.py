@@ -9,4 +9,4 @@ class Recipe(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     
-    ingredients = relationship("Ingredient", back_populates="recipe", cascade="all, delete-orphan") 
\ No newline at end of file
+    ingredients = relationship("Ingredient", back_populates="recipe", cascade="all, delete-orphan", order_by="Ingredient.id") 
\ No newline at end of file
@@ -0,0 +1,26 @@
+from typing import List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.compiler import InsertmanyvaluesSentinelOpts
+
+
+async def insert_returning_ids(session: AsyncSession, model, rows: List[dict]) -> List[int]:
+    """Insert rows in one executemany and return their ids in row order."""
+    if not rows:
+        return []
+    dialect = session.bind.dialect
+    if dialect.insertmanyvalues_implicit_sentinel & InsertmanyvaluesSentinelOpts.AUTOINCREMENT:
+        # e.g. PostgreSQL: batched INSERT .. RETURNING with ordering preserved
+        result = await session.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True), rows
+        )
+        return list(result.scalars())
+
+    # SQLite cannot order a batched RETURNING, which would otherwise make
+    # SQLAlchemy fall back to one INSERT per row. Writers are serialized and
+    # an INTEGER PRIMARY KEY is assigned max(id) + 1, so once this transaction
+    # has written the rows their ids are the consecutive run ending at max(id).
+    await session.execute(insert(model), rows)
+    last_id = (await session.execute(select(func.max(model.id)))).scalar_one()
+    return list(range(last_id - len(rows) + 1, last_id + 1))
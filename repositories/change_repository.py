@@ -0,0 +1,82 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, literal, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models.change import Change, ChangeCounter
+from models.recipe import Recipe
+from models.ingredient import Ingredient
+from models.nutrient import Nutrient
+
+CHANGE_SOURCES = {"recipe": Recipe, "ingredient": Ingredient, "nutrient": Nutrient}
+
+def bootstrap_changes(connection) -> None:
+    # Run with AsyncConnection.run_sync at startup. The first time, every
+    # existing entity gets a version so that since=0 covers the whole catalog.
+    if connection.execute(select(ChangeCounter.id)).first():
+        return
+    existing = union_all(*(
+        select(literal(entity).label("entity"), model.id.label("entity_id"))
+        for entity, model in CHANGE_SOURCES.items()
+    )).subquery()
+    numbered = select(
+        existing.c.entity, existing.c.entity_id,
+        func.row_number().over(order_by=(existing.c.entity, existing.c.entity_id)).label("version"),
+        literal(False), literal(datetime.now())
+    )
+    connection.execute(Change.__table__.insert().from_select(
+        ["entity", "entity_id", "version", "deleted", "changed_at"], numbered
+    ))
+    count = connection.execute(select(func.count()).select_from(Change)).scalar_one()
+    connection.execute(ChangeCounter.__table__.insert().values(id=1, version=count))
+
+class ChangeRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def record(self, changed: Optional[Dict[str, Iterable[int]]] = None, deleted: Optional[Dict[str, Iterable[int]]] = None) -> None:
+        # {"recipe": ids, ...}; each entity gets the next version. Call inside
+        # the writing transaction, right before its commit, since the counter
+        # row stays locked until then. The caller owns the transaction.
+        # Changed wins over deleted: SQLite reuses the highest rowid, so an
+        # id removed and then inserted again in one transaction is live.
+        rows: Dict[Tuple[str, int], bool] = {}
+        for is_deleted, entities in ((True, deleted or {}), (False, changed or {})):
+            for entity, entity_ids in entities.items():
+                for entity_id in entity_ids:
+                    if entity_id is not None:
+                        rows[(entity, entity_id)] = is_deleted
+        if not rows:
+            return
+        result = await self.session.execute(
+            update(ChangeCounter).where(ChangeCounter.id == 1)
+            .values(version=ChangeCounter.version + len(rows))
+            .returning(ChangeCounter.version)
+        )
+        first = result.scalar_one() - len(rows) + 1
+        now = datetime.now()
+        insert = postgresql.insert if self.session.bind.dialect.name == "postgresql" else sqlite.insert
+        statement = insert(Change)
+        await self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Change.entity, Change.entity_id],
+                set_={"version": statement.excluded.version, "deleted": statement.excluded.deleted, "changed_at": statement.excluded.changed_at}
+            ),
+            [
+                {"entity": entity, "entity_id": entity_id, "version": version, "deleted": is_deleted, "changed_at": now}
+                for version, ((entity, entity_id), is_deleted) in enumerate(rows.items(), first)
+            ]
+        )
+
+    async def current_version(self) -> int:
+        result = await self.session.execute(select(ChangeCounter.version).where(ChangeCounter.id == 1))
+        return result.scalar_one_or_none() or 0
+
+    async def get_changes(self, since: int, limit: int, entities: Optional[List[str]] = None) -> List[Change]:
+        # Range scan on the version index; an entity shows up once, at its latest version
+        query = select(Change).where(Change.version > since).order_by(Change.version).limit(limit)
+        if entities is not None:
+            query = query.where(Change.entity.in_(entities))
+        result = await self.session.execute(query)
+        return list(result.scalars())
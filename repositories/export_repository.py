@@ -0,0 +1,35 @@
+from typing import AsyncIterator, Dict, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from models.recipe import Recipe
+from models.ingredient import Ingredient, CostEntry
+
+# Flat, id-ordered projections; nested data can be rebuilt from the ids
+EXPORT_QUERIES = {
+    "recipes": select(Recipe.id, Recipe.name).order_by(Recipe.id),
+    "ingredients": select(
+        Ingredient.id, Ingredient.recipe_id, Ingredient.name, Ingredient.weight,
+        Ingredient.current_cost.label("cost")
+    ).order_by(Ingredient.id),
+    "cost_entries": select(
+        CostEntry.id, CostEntry.ingredient_id, CostEntry.cost, CostEntry.date,
+        CostEntry.vendor, CostEntry.notes
+    ).order_by(CostEntry.id),
+}
+
+class ExportRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def columns(entity: str) -> List[str]:
+        return [column.name for column in EXPORT_QUERIES[entity].selected_columns]
+
+    async def stream(self, entity: str, batch_size: int = 1000) -> AsyncIterator[List[Dict]]:
+        # Server-side cursor: only one batch of rows is held in memory at a time
+        result = await self.session.stream(
+            EXPORT_QUERIES[entity].execution_options(yield_per=batch_size)
+        )
+        async for partition in result.mappings().partitions():
+            yield partition
@@ -1,14 +1,58 @@
-from typing import List, Optional
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, insert
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select, insert, update, delete, func, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload, noload
 
-from models.ingredient import Ingredient, CostEntry, ingredient_nutrients, Nutrient
+from models.ingredient import Ingredient, CostEntry, VendorPrice, ingredient_nutrients, Nutrient
 from models.recipe import Recipe
-from schemas.ingredient import IngredientCreate, Ingredient as IngredientSchema, IngredientNutrient
+from schemas.ingredient import IngredientCreate, Ingredient as IngredientSchema
 from schemas.ingredient import CostEntry as CostEntrySchema
+from schemas.bulk import IngredientImport
+from repositories.bulk import insert_returning_ids
+from repositories.vendor_repository import VendorRepository
+from repositories.change_repository import ChangeRepository
+from cache import recipe_cache
+from services.nutrient_matrix import nutrient_matrix
 from datetime import datetime
 
+# Matches the batch size selectinload uses for its IN lists
+IN_CHUNK_SIZE = 500
+
+# Cost and vendor of the newest entry, same ordering as record_cost
+_latest_entry = (
+    select(CostEntry.cost, CostEntry.vendor)
+    .where(CostEntry.ingredient_id == Ingredient.id)
+    .order_by(CostEntry.date.desc(), CostEntry.id.desc())
+    .limit(1)
+)
+
+# Newest entry's cost and date, for recomputing the denormalized price
+_latest_cost = (
+    select(CostEntry.cost, CostEntry.date)
+    .where(CostEntry.ingredient_id == Ingredient.id)
+    .order_by(CostEntry.date.desc(), CostEntry.id.desc())
+    .limit(1)
+)
+
+def backfill_current_costs(connection) -> None:
+    # Run with AsyncConnection.run_sync at startup, once the current_cost
+    # columns were added to a database created before they existed
+    connection.execute(
+        update(Ingredient)
+        .values(
+            current_cost=_latest_cost.with_only_columns(CostEntry.cost).scalar_subquery(),
+            current_cost_date=_latest_cost.with_only_columns(CostEntry.date).scalar_subquery()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def _repeats_latest(latest: Optional[tuple], cost: float, vendor: Optional[str], date: datetime) -> bool:
+    # latest is (cost, vendor, date). An entry that isn't backdated and has
+    # the same cost and vendor as the newest one adds nothing to the history.
+    return latest is not None and latest[2] is not None and date >= latest[2] and (cost, vendor) == latest[:2]
+
 class IngredientRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -18,70 +62,212 @@ class IngredientRepository:
         if not recipe:
             return None
 
-        db_ingredient = Ingredient(
-            name=ingredient.name,
-            weight=ingredient.weight,
-            recipe_id=recipe_id
-        )
-        self.session.add(db_ingredient)
-        await self.session.flush()
-
-        cost_entry = CostEntry(
-            cost=ingredient.cost,
-            date=datetime.now(),
-            notes="Initial cost",
-            ingredient_id=db_ingredient.id
-        )
-        self.session.add(cost_entry)
+        ingredient_ids = await self.insert_ingredients([(recipe_id, ingredient)])
+        await ChangeRepository(self.session).record({"recipe": [recipe_id], "ingredient": ingredient_ids})
+        await self.session.commit()
+        recipe_cache.invalidate(recipe_id)
+        nutrient_matrix.mark_stale(ingredient_ids)
+        return await self.get_ingredient(ingredient_ids[0])
 
-        if ingredient.cost_entries:
-            for entry in ingredient.cost_entries:
-                cost_entry = CostEntry(
-                    cost=entry.cost,
-                    date=entry.date,
-                    vendor=entry.vendor,
-                    notes=entry.notes,
-                    ingredient_id=db_ingredient.id
-                )
-                self.session.add(cost_entry)
+    async def insert_ingredients(self, rows: List[Tuple[int, IngredientCreate]], notes: str = "Initial cost") -> List[int]:
+        # One executemany per table instead of a flush per ingredient and an
+        # INSERT per nutrient row. The caller owns the transaction.
+        if not rows:
+            return []
+        now = datetime.now()
+        ingredient_rows = []
+        cost_rows = []
+        for recipe_id, ingredient in rows:
+            entries = [{"cost": ingredient.cost, "date": now, "vendor": None, "notes": notes}]
+            entries.extend(entry.model_dump() for entry in ingredient.cost_entries or [])
+            # Same rule as Ingredient.record_cost: newest date wins, later entries win ties
+            latest = max(enumerate(entries), key=lambda item: (item[1]["date"], item[0]))[1]
+            ingredient_rows.append({
+                "name": ingredient.name,
+                "weight": ingredient.weight,
+                "recipe_id": recipe_id,
+                "current_cost": latest["cost"],
+                "current_cost_date": latest["date"]
+            })
+            cost_rows.append(entries)
 
-        # Add nutrient relationships
-        for nutrient_data in ingredient.nutrients:
-            stmt = insert(ingredient_nutrients).values(
-                ingredient_id=db_ingredient.id,
-                nutrient_id=nutrient_data.nutrient.id,
-                amount=nutrient_data.amount
-            )
-            await self.session.execute(stmt)
+        ingredient_ids = await insert_returning_ids(self.session, Ingredient, ingredient_rows)
 
-        await self.session.commit()
-        await self.session.refresh(db_ingredient)
-        return db_ingredient
+        cost_entries = [
+            {**entry, "ingredient_id": ingredient_id}
+            for ingredient_id, entries in zip(ingredient_ids, cost_rows)
+            for entry in entries
+        ]
+        await self.session.execute(insert(CostEntry), cost_entries)
+        await VendorRepository(self.session).record_prices(cost_entries)
+        nutrient_rows = [
+            {"ingredient_id": ingredient_id, "nutrient_id": nutrient_data.nutrient.id, "amount": nutrient_data.amount}
+            for ingredient_id, (_, ingredient) in zip(ingredient_ids, rows)
+            for nutrient_data in ingredient.nutrients
+        ]
+        if nutrient_rows:
+            await self.session.execute(insert(ingredient_nutrients), nutrient_rows)
+        return ingredient_ids
 
-    async def get_ingredients(self, skip: int = 0, limit: int = 100) -> List[Ingredient]:
-        query = (
-            select(Ingredient)
-            .options(
-                joinedload(Ingredient.cost_entries),
-                joinedload(Ingredient.nutrients)
-            )
-            .offset(skip)
-            .limit(limit)
+    async def delete_ingredient_rows(self, ingredient_ids: List[int]) -> None:
+        # Statement-level delete of ingredients and everything hanging off
+        # them, without loading them into the session. The caller owns the
+        # transaction.
+        for start in range(0, len(ingredient_ids), IN_CHUNK_SIZE):
+            chunk = ingredient_ids[start:start + IN_CHUNK_SIZE]
+            await self.session.execute(delete(CostEntry).where(CostEntry.ingredient_id.in_(chunk)))
+            await self.session.execute(delete(VendorPrice).where(VendorPrice.ingredient_id.in_(chunk)))
+            await self.session.execute(ingredient_nutrients.delete().where(ingredient_nutrients.c.ingredient_id.in_(chunk)))
+            await self.session.execute(delete(Ingredient).where(Ingredient.id.in_(chunk)))
+
+    async def find_invalid_nutrients(self, ingredients: List[IngredientCreate]) -> List[Optional[str]]:
+        # Per-ingredient error message (or None), checked with a single query
+        nutrient_ids = {n.nutrient.id for ingredient in ingredients for n in ingredient.nutrients}
+        known = set()
+        if nutrient_ids:
+            result = await self.session.execute(select(Nutrient.id).where(Nutrient.id.in_(nutrient_ids)))
+            known = set(result.scalars())
+        errors = []
+        for ingredient in ingredients:
+            ids = [n.nutrient.id for n in ingredient.nutrients]
+            if len(ids) != len(set(ids)):
+                errors.append(f"Duplicate nutrient for ingredient '{ingredient.name}'")
+            elif not known.issuperset(ids):
+                missing = sorted(set(ids) - known)
+                errors.append(f"Nutrient not found: {', '.join(map(str, missing))}")
+            else:
+                errors.append(None)
+        return errors
+
+    async def bulk_create_ingredients(self, rows: List[Tuple[int, IngredientImport]]) -> List[Tuple[int, str]]:
+        # Writes one chunk of an import in its own transaction and returns
+        # (line, error) for rows that were rejected
+        recipe_ids = {ingredient.recipe_id for _, ingredient in rows}
+        result = await self.session.execute(select(Recipe.id).where(Recipe.id.in_(recipe_ids)))
+        known_recipes = set(result.scalars())
+        nutrient_errors = await self.find_invalid_nutrients([ingredient for _, ingredient in rows])
+
+        errors = []
+        valid = []
+        for (line, ingredient), nutrient_error in zip(rows, nutrient_errors):
+            if ingredient.recipe_id not in known_recipes:
+                errors.append((line, "Recipe not found"))
+            elif nutrient_error:
+                errors.append((line, nutrient_error))
+            else:
+                valid.append((ingredient.recipe_id, ingredient))
+
+        try:
+            ingredient_ids = await self.insert_ingredients(valid)
+            await ChangeRepository(self.session).record({
+                "recipe": [recipe_id for recipe_id, _ in valid], "ingredient": ingredient_ids
+            })
+            await self.session.commit()
+        except SQLAlchemyError:
+            await self.session.rollback()
+            raise
+        for recipe_id in {recipe_id for recipe_id, _ in valid}:
+            recipe_cache.invalidate(recipe_id)
+        nutrient_matrix.mark_stale(ingredient_ids)
+        return errors
+
+    def _with_collections(self, query, include_history: bool = True):
+        # One batched IN query per collection; joining cost_entries and
+        # nutrients together would multiply the rows. The current price lives
+        # on the ingredient row, so the history is only loaded when asked for.
+        history = selectinload(Ingredient.cost_entries) if include_history else noload(Ingredient.cost_entries)
+        return query.options(
+            history,
+            selectinload(Ingredient.nutrients)
         )
-        result = await self.session.execute(query)
-        return list(result.scalars().unique())
+
+    async def get_ingredients(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, include_history: bool = True, ids: Optional[List[int]] = None) -> List[Ingredient]:
+        # With ids, fetches exactly those ingredients; each collection is
+        # still one batched IN query
+        query = select(Ingredient).order_by(Ingredient.id)
+        if ids is not None:
+            query = query.where(Ingredient.id.in_(ids))
+        elif after_id is not None:
+            query = query.limit(limit).where(Ingredient.id > after_id)
+        else:
+            query = query.limit(limit).offset(skip)
+        result = await self.session.execute(self._with_collections(query, include_history))
+        return list(result.scalars())
 
     async def get_ingredient(self, ingredient_id: int) -> Optional[Ingredient]:
-        query = (
-            select(Ingredient)
-            .where(Ingredient.id == ingredient_id)
-            .options(
-                joinedload(Ingredient.cost_entries),
-                joinedload(Ingredient.nutrients)
+        query = self._with_collections(select(Ingredient).where(Ingredient.id == ingredient_id))
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def load_ingredient_rows(self, ingredient_rows: List[dict], include_history: bool = True) -> List[dict]:
+        # Plain-dict counterpart of _with_collections for the fast serialization
+        # path: fills in cost_entries and nutrients with one query per chunk
+        cost_entries = defaultdict(list)
+        nutrients = defaultdict(list)
+        ids = [row["id"] for row in ingredient_rows]
+        for start in range(0, len(ids), IN_CHUNK_SIZE):
+            chunk = ids[start:start + IN_CHUNK_SIZE]
+            if include_history:
+                result = await self.session.execute(
+                    select(CostEntry.ingredient_id, CostEntry.cost, CostEntry.date, CostEntry.vendor, CostEntry.notes)
+                    .where(CostEntry.ingredient_id.in_(chunk))
+                    .order_by(CostEntry.ingredient_id, CostEntry.id)
+                )
+                for ingredient_id, cost, date, vendor, notes in result:
+                    cost_entries[ingredient_id].append({"cost": cost, "date": date, "vendor": vendor, "notes": notes})
+            result = await self.session.execute(
+                select(ingredient_nutrients.c.ingredient_id, Nutrient.name, Nutrient.unit, Nutrient.id, ingredient_nutrients.c.amount)
+                .join(Nutrient, Nutrient.id == ingredient_nutrients.c.nutrient_id)
+                .where(ingredient_nutrients.c.ingredient_id.in_(chunk))
+                .order_by(ingredient_nutrients.c.ingredient_id, ingredient_nutrients.c.nutrient_id)
             )
+            for ingredient_id, name, unit, nutrient_id, amount in result:
+                nutrients[ingredient_id].append({"nutrient": {"name": name, "unit": unit, "id": nutrient_id}, "amount": amount})
+
+        for row in ingredient_rows:
+            row["cost_entries"] = cost_entries.get(row["id"], [])
+            row["nutrients"] = nutrients.get(row["id"], [])
+        return ingredient_rows
+
+    def _ingredient_columns(self):
+        # Same keys, in the same order, as schemas.Ingredient
+        return select(
+            Ingredient.name, Ingredient.weight, Ingredient.id, Ingredient.recipe_id,
+            func.coalesce(Ingredient.current_cost, 0.0).label("cost")
         )
+
+    async def get_ingredient_rows(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, include_history: bool = True, ids: Optional[List[int]] = None) -> List[dict]:
+        query = self._ingredient_columns().order_by(Ingredient.id)
+        if ids is not None:
+            query = query.where(Ingredient.id.in_(ids))
+        elif after_id is not None:
+            query = query.limit(limit).where(Ingredient.id > after_id)
+        else:
+            query = query.limit(limit).offset(skip)
         result = await self.session.execute(query)
-        return result.scalar_one_or_none()
+        return await self.load_ingredient_rows([dict(row) for row in result.mappings()], include_history)
+
+    async def get_ingredient_row(self, ingredient_id: int) -> Optional[dict]:
+        result = await self.session.execute(self._ingredient_columns().where(Ingredient.id == ingredient_id))
+        row = result.mappings().one_or_none()
+        if row is None:
+            return None
+        return (await self.load_ingredient_rows([dict(row)]))[0]
+
+    async def get_similar_ingredients(self, ingredient_id: int, limit: int = 10) -> Optional[List[dict]]:
+        matrix = await nutrient_matrix.ensure_current(self.session)
+        return matrix.similar_to(ingredient_id, limit)
+
+    async def search_by_profile(self, amounts: Dict[int, float], limit: int = 10) -> List[dict]:
+        # Raises UnknownNutrientError for nutrient ids that don't exist
+        matrix = await nutrient_matrix.ensure_current(self.session)
+        return matrix.nearest(matrix.profile_vector(amounts), limit)
+
+    async def get_vendor_prices(self, ingredient_id: int) -> Optional[List[VendorPrice]]:
+        prices = await VendorRepository(self.session).get_vendor_prices(ingredient_id)
+        if not prices and await self.session.get(Ingredient, ingredient_id) is None:
+            return None
+        return prices
 
     async def update_ingredient(self, ingredient_id: int, ingredient: IngredientCreate) -> Optional[Ingredient]:
         db_ingredient = await self.get_ingredient(ingredient_id)
@@ -91,17 +277,27 @@ class IngredientRepository:
         db_ingredient.name = ingredient.name
         db_ingredient.weight = ingredient.weight
 
-        # Update cost entries
-        cost_entry = CostEntry(
-            cost=ingredient.cost,
-            date=datetime.now(),
-            notes="Updated cost",
-            ingredient_id=db_ingredient.id
-        )
-        self.session.add(cost_entry)
+        # Update cost entries; an unchanged price adds nothing
+        newest = max(db_ingredient.cost_entries, key=lambda entry: (entry.date, entry.id), default=None)
+        latest = (newest.cost, newest.vendor, newest.date) if newest else None
+        if ingredient.cost != db_ingredient.current_cost:
+            cost_entry = CostEntry(
+                cost=ingredient.cost,
+                date=datetime.now(),
+                notes="Updated cost",
+                ingredient_id=db_ingredient.id
+            )
+            self.session.add(cost_entry)
+            db_ingredient.record_cost(cost_entry.cost, cost_entry.date)
+            latest = (cost_entry.cost, None, cost_entry.date)
 
+        new_entries = []
         if ingredient.cost_entries:
             for entry in ingredient.cost_entries:
+                if _repeats_latest(latest, entry.cost, entry.vendor, entry.date):
+                    continue
+                if latest is None or entry.date >= latest[2]:
+                    latest = (entry.cost, entry.vendor, entry.date)
                 cost_entry = CostEntry(
                     cost=entry.cost,
                     date=entry.date,
@@ -110,6 +306,9 @@ class IngredientRepository:
                     ingredient_id=db_ingredient.id
                 )
                 self.session.add(cost_entry)
+                db_ingredient.record_cost(cost_entry.cost, cost_entry.date)
+                new_entries.append({**entry.model_dump(), "ingredient_id": ingredient_id})
+        await VendorRepository(self.session).record_prices(new_entries)
 
         # Update nutrient relationships
         # First, remove existing relationships
@@ -120,46 +319,249 @@ class IngredientRepository:
         )
         
         # Add new nutrient relationships
-        for nutrient_data in ingredient.nutrients:
-            stmt = insert(ingredient_nutrients).values(
-                ingredient_id=db_ingredient.id,
-                nutrient_id=nutrient_data.nutrient.id,
-                amount=nutrient_data.amount
-            )
-            await self.session.execute(stmt)
+        if ingredient.nutrients:
+            await self.session.execute(insert(ingredient_nutrients), [
+                {"ingredient_id": ingredient_id, "nutrient_id": nutrient_data.nutrient.id, "amount": nutrient_data.amount}
+                for nutrient_data in ingredient.nutrients
+            ])
 
+        recipe_id = db_ingredient.recipe_id
+        await ChangeRepository(self.session).record({"recipe": [recipe_id], "ingredient": [ingredient_id]})
         await self.session.commit()
-        await self.session.refresh(db_ingredient)
-        return db_ingredient
+        recipe_cache.invalidate(recipe_id)
+        nutrient_matrix.mark_stale([ingredient_id])
+        return await self.get_ingredient(ingredient_id)
 
     async def delete_ingredient(self, ingredient_id: int) -> bool:
         db_ingredient = await self.get_ingredient(ingredient_id)
         if not db_ingredient:
             return False
 
+        recipe_id = db_ingredient.recipe_id
         await self.session.delete(db_ingredient)
+        await ChangeRepository(self.session).record({"recipe": [recipe_id]}, deleted={"ingredient": [ingredient_id]})
         await self.session.commit()
+        recipe_cache.invalidate(recipe_id)
+        nutrient_matrix.mark_stale([ingredient_id])
         return True
 
     async def add_cost_entry(self, ingredient_id: int, cost_entry: CostEntrySchema) -> Optional[Ingredient]:
-        db_ingredient = await self.get_ingredient(ingredient_id)
-        if not db_ingredient:
+        added = await self.add_cost_entries([(ingredient_id, cost_entry)])
+        if added[0] is None:
             return None
+        return await self.get_ingredient(ingredient_id)
+
+    async def add_cost_entries(self, entries: List[Tuple[int, CostEntrySchema]]) -> List[Optional[bool]]:
+        # Many entries in one transaction, one statement per table. Returns,
+        # per entry, None if the ingredient doesn't exist, else whether the
+        # entry is now the ingredient's current price. An entry repeating the
+        # newest price is not stored and counts as current while that is.
+        ingredient_ids = list(dict.fromkeys(ingredient_id for ingredient_id, _ in entries))
+        current: Dict[int, tuple] = {}
+        newest: Dict[int, tuple] = {}
+        for start in range(0, len(ingredient_ids), IN_CHUNK_SIZE):
+            result = await self.session.execute(
+                select(
+                    Ingredient.id, Ingredient.recipe_id, Ingredient.current_cost_date,
+                    _latest_entry.with_only_columns(CostEntry.cost).scalar_subquery(),
+                    _latest_entry.with_only_columns(CostEntry.vendor).scalar_subquery()
+                )
+                .where(Ingredient.id.in_(ingredient_ids[start:start + IN_CHUNK_SIZE]))
+            )
+            for ingredient_id, recipe_id, date, cost, vendor in result:
+                current[ingredient_id] = (recipe_id, date)
+                newest[ingredient_id] = (cost, vendor, date)
+
+        cost_rows = []
+        latest: Dict[int, int] = {}
+        # Index of the stored entry a skipped one repeats, -1 for one already in the table
+        repeats: Dict[int, int] = {}
+        for index, (ingredient_id, entry) in enumerate(entries):
+            if ingredient_id not in current:
+                continue
+            if _repeats_latest(newest[ingredient_id], entry.cost, entry.vendor, entry.date):
+                repeats[index] = latest.get(ingredient_id, -1)
+                continue
+            cost_rows.append({**entry.model_dump(), "ingredient_id": ingredient_id})
+            # Same rule as Ingredient.record_cost, in arrival order
+            recipe_id, cost_date = current[ingredient_id]
+            if cost_date is None or entry.date >= cost_date:
+                current[ingredient_id] = (recipe_id, entry.date)
+                newest[ingredient_id] = (entry.cost, entry.vendor, entry.date)
+                latest[ingredient_id] = index
+        if cost_rows:
+            await self.session.execute(insert(CostEntry), cost_rows)
+            await VendorRepository(self.session).record_prices(cost_rows)
+            if latest:
+                await self.session.execute(update(Ingredient), [
+                    {"id": ingredient_id, "current_cost": entries[index][1].cost, "current_cost_date": entries[index][1].date}
+                    for ingredient_id, index in latest.items()
+                ])
+            touched = list(dict.fromkeys(row["ingredient_id"] for row in cost_rows))
+            await ChangeRepository(self.session).record({
+                "recipe": [current[ingredient_id][0] for ingredient_id in touched], "ingredient": touched
+            })
+            await self.session.commit()
+            for recipe_id in {current[row["ingredient_id"]][0] for row in cost_rows}:
+                recipe_cache.invalidate(recipe_id)
+            nutrient_matrix.mark_stale(latest)
+        return [
+            None if ingredient_id not in current else latest.get(ingredient_id, -1) == repeats.get(index, index)
+            for index, (ingredient_id, _) in enumerate(entries)
+        ]
+
+    def _cost_filters(self, start: Optional[datetime], end: Optional[datetime], vendor: Optional[str]) -> list:
+        filters = []
+        if start is not None:
+            filters.append(CostEntry.date >= start)
+        if end is not None:
+            filters.append(CostEntry.date < end)
+        if vendor is not None:
+            filters.append(CostEntry.vendor == vendor)
+        return filters
+
+    def _bucket_start(self, bucket: str):
+        if self.session.bind.dialect.name == "postgresql":
+            return func.date_trunc(bucket, CostEntry.date)
+        # SQLite date modifiers; weeks start on Monday like date_trunc
+        modifiers = {"day": (), "week": ("weekday 0", "-6 days"), "month": ("start of month",)}
+        return func.date(CostEntry.date, *modifiers[bucket])
 
-        new_cost_entry = CostEntry(
-            cost=cost_entry.cost,
-            date=cost_entry.date,
-            vendor=cost_entry.vendor,
-            notes=cost_entry.notes,
-            ingredient_id=ingredient_id
+    async def get_cost_history(self, ingredient_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None, vendor: Optional[str] = None) -> List[CostEntry]:
+        query = (
+            select(CostEntry)
+            .where(CostEntry.ingredient_id == ingredient_id, *self._cost_filters(start, end, vendor))
+            .order_by(CostEntry.date.desc(), CostEntry.id.desc())
+        )
+        result = await self.session.execute(query)
+        return list(result.scalars())
+
+    async def get_cost_buckets(self, ingredient_ids: List[int], bucket: str, start: Optional[datetime] = None, end: Optional[datetime] = None, vendor: Optional[str] = None) -> Dict[int, List[dict]]:
+        # Aggregated in SQL on the (ingredient_id, date) index; "last" is the
+        # latest cost in each bucket, picked with a window function
+        bucket_start = self._bucket_start(bucket).label("start")
+        ranked = (
+            select(
+                CostEntry.ingredient_id,
+                CostEntry.cost,
+                bucket_start,
+                func.first_value(CostEntry.cost).over(
+                    partition_by=(CostEntry.ingredient_id, bucket_start),
+                    order_by=(CostEntry.date.desc(), CostEntry.id.desc())
+                ).label("last")
+            )
+            .where(CostEntry.ingredient_id.in_(ingredient_ids), *self._cost_filters(start, end, vendor))
+            .subquery()
+        )
+        query = (
+            select(
+                ranked.c.ingredient_id,
+                ranked.c.start,
+                func.min(ranked.c.cost).label("min"),
+                func.avg(ranked.c.cost).label("avg"),
+                func.max(ranked.c.cost).label("max"),
+                func.max(ranked.c.last).label("last"),
+                func.count().label("count")
+            )
+            .group_by(ranked.c.ingredient_id, ranked.c.start)
+            .order_by(ranked.c.ingredient_id, ranked.c.start)
+        )
+        result = await self.session.execute(query)
+        series = {ingredient_id: [] for ingredient_id in ingredient_ids}
+        for row in result.mappings():
+            series[row["ingredient_id"]].append(dict(row))
+        return series
+
+    async def refresh_current_cost(self, ingredient_ids: List[int]) -> None:
+        # Recompute the denormalized price from history after entries were
+        # removed or rewritten outside of record_cost
+        cost = _latest_cost.with_only_columns(CostEntry.cost).scalar_subquery()
+        cost_date = _latest_cost.with_only_columns(CostEntry.date).scalar_subquery()
+        result = await self.session.execute(
+            update(Ingredient)
+            .where(
+                Ingredient.id.in_(ingredient_ids),
+                or_(Ingredient.current_cost.is_distinct_from(cost), Ingredient.current_cost_date.is_distinct_from(cost_date))
+            )
+            .values(current_cost=cost, current_cost_date=cost_date)
+            .returning(Ingredient.id, Ingredient.recipe_id)
+            .execution_options(synchronize_session=False)
         )
-        self.session.add(new_cost_entry)
+        changed = result.all()
+        await ChangeRepository(self.session).record({
+            "recipe": [recipe_id for _, recipe_id in changed], "ingredient": [ingredient_id for ingredient_id, _ in changed]
+        })
         await self.session.commit()
-        await self.session.refresh(db_ingredient)
-        return db_ingredient
+        recipe_cache.clear()
+        nutrient_matrix.mark_stale(ingredient_ids)
 
-    async def get_cost_history(self, ingredient_id: int) -> List[CostEntry]:
-        db_ingredient = await self.get_ingredient(ingredient_id)
-        if not db_ingredient:
-            return []
-        return sorted(db_ingredient.cost_entries, key=lambda x: x.date, reverse=True)
\ No newline at end of file
+    async def compact_cost_history(self, ingredient_ids: List[int], cutoff: datetime, period: str) -> dict:
+        # Drops entries that repeat the previous entry's cost and vendor, then
+        # rolls entries older than cutoff into one row per ingredient, vendor
+        # and period (day, week or month): the period's last entry is kept
+        # with the others summarized in its notes. The newest entry of every
+        # vendor survives, so prices are unchanged; only dates can move back
+        # to where a repeated price started. Commits.
+        in_chunk = CostEntry.ingredient_id.in_(ingredient_ids)
+        timeline = (CostEntry.date, CostEntry.id)
+        ordered = select(
+            CostEntry.id,
+            CostEntry.ingredient_id,
+            CostEntry.cost,
+            CostEntry.vendor,
+            func.lag(CostEntry.cost).over(partition_by=CostEntry.ingredient_id, order_by=timeline).label("previous_cost"),
+            func.lag(CostEntry.vendor).over(partition_by=CostEntry.ingredient_id, order_by=timeline).label("previous_vendor"),
+            func.row_number().over(partition_by=CostEntry.ingredient_id, order_by=timeline).label("position")
+        ).where(in_chunk).subquery()
+        repeated = (await self.session.execute(
+            select(ordered.c.id, ordered.c.ingredient_id).where(
+                ordered.c.position > 1,
+                ordered.c.cost == ordered.c.previous_cost,
+                ordered.c.vendor.is_not_distinct_from(ordered.c.previous_vendor)
+            )
+        )).all()
+        repeated_ids = [entry_id for entry_id, _ in repeated]
+        for start in range(0, len(repeated_ids), IN_CHUNK_SIZE):
+            await self.session.execute(delete(CostEntry).where(CostEntry.id.in_(repeated_ids[start:start + IN_CHUNK_SIZE])))
+
+        group = (CostEntry.ingredient_id, CostEntry.vendor, self._bucket_start(period))
+        ranked = select(
+            CostEntry.id,
+            CostEntry.ingredient_id,
+            func.row_number().over(partition_by=group, order_by=(CostEntry.date.desc(), CostEntry.id.desc())).label("rank"),
+            func.count().over(partition_by=group).label("count"),
+            func.min(CostEntry.cost).over(partition_by=group).label("min"),
+            func.avg(CostEntry.cost).over(partition_by=group).label("avg"),
+            func.max(CostEntry.cost).over(partition_by=group).label("max")
+        ).where(in_chunk, CostEntry.date < cutoff).subquery()
+        kept = (await self.session.execute(
+            select(ranked.c.id, ranked.c.count, ranked.c.min, ranked.c.avg, ranked.c.max)
+            .where(ranked.c.rank == 1, ranked.c.count > 1)
+        )).all()
+        rolled_up = (await self.session.execute(
+            select(ranked.c.id, ranked.c.ingredient_id).where(ranked.c.rank > 1)
+        )).all()
+        rolled_up_ids = [entry_id for entry_id, _ in rolled_up]
+        for start in range(0, len(rolled_up_ids), IN_CHUNK_SIZE):
+            await self.session.execute(delete(CostEntry).where(CostEntry.id.in_(rolled_up_ids[start:start + IN_CHUNK_SIZE])))
+        if kept:
+            await self.session.execute(update(CostEntry), [
+                {"id": entry_id, "notes": f"Compacted {count} entries (min {low:.2f}, avg {mean:.2f}, max {high:.2f})"}
+                for entry_id, count, low, mean, high in kept
+            ])
+
+        touched = list({ingredient_id for _, ingredient_id in repeated + rolled_up})
+        if touched:
+            recipe_ids = (await self.session.execute(
+                select(Ingredient.recipe_id).where(Ingredient.id.in_(touched)).distinct()
+            )).scalars().all()
+            await ChangeRepository(self.session).record({"recipe": recipe_ids, "ingredient": touched})
+            if repeated:
+                # Dates of surviving prices can be earlier now
+                moved = list({ingredient_id for _, ingredient_id in repeated})
+                await VendorRepository(self.session).refresh_prices(moved)
+                await self.refresh_current_cost(moved)
+            else:
+                await self.session.commit()
+                recipe_cache.clear()
+        return {"ingredients": len(touched), "repeats_removed": len(repeated), "rolled_up": len(rolled_up), "aggregates": len(kept)}
@@ -0,0 +1,41 @@
+from typing import List, Optional
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+
+from models.job import Job
+
+class JobRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_job(self, kind: str, params: dict) -> Job:
+        job = Job(kind=kind, status="queued", params=params, created_at=datetime.now())
+        self.session.add(job)
+        await self.session.commit()
+        await self.session.refresh(job)
+        return job
+
+    async def get_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Job]:
+        query = select(Job).order_by(Job.id.desc()).limit(limit)
+        if status is not None:
+            query = query.where(Job.status == status)
+        result = await self.session.execute(query)
+        return list(result.scalars())
+
+    async def get_job(self, job_id: int) -> Optional[Job]:
+        return await self.session.get(Job, job_id, populate_existing=True)
+
+    async def request_cancel(self, job_id: int) -> Optional[Job]:
+        # Queued jobs are cancelled outright; running ones are flagged and
+        # stop at their next progress report
+        now = datetime.now()
+        await self.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == "queued")
+            .values(status="cancelled", cancel_requested=True, finished_at=now, updated_at=now)
+        )
+        await self.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == "running").values(cancel_requested=True)
+        )
+        await self.session.commit()
+        return await self.get_job(job_id)
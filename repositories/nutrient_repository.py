@@ -1,9 +1,16 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 
-from models.ingredient import Nutrient
+from models.ingredient import Nutrient, Ingredient, ingredient_nutrients
 from schemas.ingredient import NutrientCreate
+from schemas.bulk import NutrientImport
+from cache import nutrient_cache, recipe_cache
+from services.nutrient_matrix import nutrient_matrix
+from repositories.change_repository import ChangeRepository
+from repositories.ingredient_repository import IN_CHUNK_SIZE
 
 class NutrientRepository:
     def __init__(self, session: AsyncSession):
@@ -15,14 +22,112 @@ class NutrientRepository:
             unit=nutrient.unit
         )
         self.session.add(db_nutrient)
+        await self.session.flush()
+        await ChangeRepository(self.session).record({"nutrient": [db_nutrient.id]})
         await self.session.commit()
+        nutrient_cache.clear()
+        nutrient_matrix.invalidate()
         await self.session.refresh(db_nutrient)
         return db_nutrient
 
-    async def get_nutrients(self, skip: int = 0, limit: int = 100) -> List[Nutrient]:
-        query = select(Nutrient).offset(skip).limit(limit)
+    def _insert(self, table):
+        insert = postgresql.insert if self.session.bind.dialect.name == "postgresql" else sqlite.insert
+        return insert(table)
+
+    async def bulk_upsert(self, rows: List[Tuple[int, NutrientImport]]) -> List[Tuple[int, str]]:
+        # Writes one chunk of a catalog load in its own transaction and
+        # returns (line, error) for rejected rows. Nutrients are upserted by
+        # name and amounts by (ingredient_id, nutrient_id), one INSERT ... ON
+        # CONFLICT each; rows that already hold the same values aren't
+        # touched, so reloading a catalog changes nothing.
+        units: Dict[str, str] = {}
+        for _, row in rows:
+            if row.unit is not None:
+                units[row.name] = row.unit
+        try:
+            changed_nutrients = []
+            if units:
+                statement = self._insert(Nutrient)
+                result = await self.session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[Nutrient.name],
+                        set_={"unit": statement.excluded.unit},
+                        where=Nutrient.unit.is_distinct_from(statement.excluded.unit)
+                    ).returning(Nutrient.id),
+                    [{"name": name, "unit": unit} for name, unit in units.items()]
+                )
+                changed_nutrients = list(result.scalars())
+
+            names = list({row.name for _, row in rows})
+            nutrient_ids: Dict[str, int] = {}
+            for start in range(0, len(names), IN_CHUNK_SIZE):
+                result = await self.session.execute(
+                    select(Nutrient.name, Nutrient.id).where(Nutrient.name.in_(names[start:start + IN_CHUNK_SIZE]))
+                )
+                nutrient_ids.update(result.tuples().all())
+            ingredient_ids = list({row.ingredient_id for _, row in rows if row.ingredient_id is not None})
+            recipe_of: Dict[int, int] = {}
+            for start in range(0, len(ingredient_ids), IN_CHUNK_SIZE):
+                result = await self.session.execute(
+                    select(Ingredient.id, Ingredient.recipe_id).where(Ingredient.id.in_(ingredient_ids[start:start + IN_CHUNK_SIZE]))
+                )
+                recipe_of.update(result.tuples().all())
+
+            errors = []
+            amounts: Dict[Tuple[int, int], float] = {}
+            for line, row in rows:
+                if row.name not in nutrient_ids:
+                    errors.append((line, f"Nutrient not found: {row.name} (give its unit to create it)"))
+                elif row.ingredient_id is not None and row.ingredient_id not in recipe_of:
+                    errors.append((line, f"Ingredient not found: {row.ingredient_id}"))
+                elif row.ingredient_id is not None:
+                    # Later lines win
+                    amounts[(row.ingredient_id, nutrient_ids[row.name])] = row.amount
+            changed_ingredients = []
+            if amounts:
+                statement = self._insert(ingredient_nutrients)
+                result = await self.session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=[ingredient_nutrients.c.ingredient_id, ingredient_nutrients.c.nutrient_id],
+                        set_={"amount": statement.excluded.amount},
+                        where=ingredient_nutrients.c.amount != statement.excluded.amount
+                    ).returning(ingredient_nutrients.c.ingredient_id),
+                    [
+                        {"ingredient_id": ingredient_id, "nutrient_id": nutrient_id, "amount": amount}
+                        for (ingredient_id, nutrient_id), amount in amounts.items()
+                    ]
+                )
+                changed_ingredients = list(set(result.scalars()))
+
+            recipe_ids = list({recipe_of[ingredient_id] for ingredient_id in changed_ingredients})
+            await ChangeRepository(self.session).record(
+                {"nutrient": changed_nutrients, "ingredient": changed_ingredients, "recipe": recipe_ids}
+            )
+            await self.session.commit()
+        except SQLAlchemyError:
+            await self.session.rollback()
+            raise
+        if changed_nutrients:
+            nutrient_cache.clear()
+            # Recipe responses embed the unit
+            recipe_cache.clear()
+            nutrient_matrix.invalidate()
+        else:
+            for recipe_id in recipe_ids:
+                recipe_cache.invalidate(recipe_id)
+        nutrient_matrix.mark_stale(changed_ingredients)
+        return errors
+
+    async def get_nutrients(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, ids: Optional[List[int]] = None) -> List[Nutrient]:
+        query = select(Nutrient).order_by(Nutrient.id)
+        if ids is not None:
+            query = query.where(Nutrient.id.in_(ids))
+        elif after_id is not None:
+            query = query.limit(limit).where(Nutrient.id > after_id)
+        else:
+            query = query.limit(limit).offset(skip)
         result = await self.session.execute(query)
-        return list(result.scalars().unique())
+        return list(result.scalars())
 
     async def get_nutrient(self, nutrient_id: int) -> Optional[Nutrient]:
         return await self.session.get(Nutrient, nutrient_id)
@@ -36,6 +141,26 @@ class NutrientRepository:
         db_nutrient = await self.get_nutrient(nutrient_id)
         if not db_nutrient:
             return False
+        # Ingredients embedding this nutrient change too
+        result = await self.session.execute(
+            select(Ingredient.id, Ingredient.recipe_id)
+            .join(ingredient_nutrients, ingredient_nutrients.c.ingredient_id == Ingredient.id)
+            .where(ingredient_nutrients.c.nutrient_id == nutrient_id)
+        )
+        users = result.all()
+        # SQLite doesn't enforce the foreign key; orphaned links would load
+        # with no nutrient
+        await self.session.execute(
+            delete(ingredient_nutrients).where(ingredient_nutrients.c.nutrient_id == nutrient_id)
+        )
         await self.session.delete(db_nutrient)
+        await ChangeRepository(self.session).record(
+            {"recipe": [recipe_id for _, recipe_id in users], "ingredient": [ingredient_id for ingredient_id, _ in users]},
+            deleted={"nutrient": [nutrient_id]}
+        )
         await self.session.commit()
+        # Recipe responses embed nutrient details
+        nutrient_cache.clear()
+        recipe_cache.clear()
+        nutrient_matrix.invalidate()
         return True
\ No newline at end of file
@@ -1,12 +1,27 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select, insert, update, func, case
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
 
 from models.recipe import Recipe
-from models.ingredient import Ingredient, CostEntry
+from models.ingredient import Ingredient, CostEntry, VendorPrice, ingredient_nutrients
+from models.nutrient import Nutrient
 from schemas import RecipeCreate, Recipe as RecipeSchema
-from datetime import datetime
+from schemas.recipe import PriceChange, RecipeUpdate, RecipePatch
+from schemas.ingredient import IngredientCreate
+from repositories.ingredient_repository import IngredientRepository, IN_CHUNK_SIZE
+from repositories.bulk import insert_returning_ids
+from repositories.vendor_repository import VendorRepository
+from repositories.change_repository import ChangeRepository
+from cache import recipe_cache
+from services.nutrient_matrix import nutrient_matrix
+from services.reprice import reprice, UnknownIngredientError
+from services.meal_plan import evaluate_plan, UnknownRecipeError
+
+class InvalidRecipeChange(ValueError):
+    pass
 
 class RecipeRepository:
     def __init__(self, session: AsyncSession):
@@ -17,97 +32,440 @@ class RecipeRepository:
         self.session.add(db_recipe)
         await self.session.flush()
 
-        for ingredient_data in recipe.ingredients:
-            db_ingredient = Ingredient(
-                name=ingredient_data.name,
-                weight=ingredient_data.weight,
-                nutrition_facts=ingredient_data.nutrition_facts,
-                recipe_id=db_recipe.id
-            )
-            self.session.add(db_ingredient)
-            await self.session.flush()
-
-            cost_entry = CostEntry(
-                cost=ingredient_data.cost,
-                date=datetime.now(),
-                notes="Initial cost",
-                ingredient_id=db_ingredient.id
-            )
-            self.session.add(cost_entry)
-
-            if hasattr(ingredient_data, 'cost_entries') and ingredient_data.cost_entries:
-                for entry in ingredient_data.cost_entries:
-                    cost_entry = CostEntry(
-                        cost=entry.cost,
-                        date=entry.date,
-                        vendor=entry.vendor,
-                        notes=entry.notes,
-                        ingredient_id=db_ingredient.id
-                    )
-                    self.session.add(cost_entry)
-
+        recipe_id = db_recipe.id
+        ingredient_ids = await IngredientRepository(self.session).insert_ingredients(
+            [(recipe_id, ingredient_data) for ingredient_data in recipe.ingredients or []]
+        )
+        await ChangeRepository(self.session).record({"recipe": [recipe_id], "ingredient": ingredient_ids})
         await self.session.commit()
-        await self.session.refresh(db_recipe)
-        return db_recipe
+        nutrient_matrix.mark_stale(ingredient_ids)
+        return await self.get_recipe(recipe_id)
 
-    async def get_recipes(self, skip: int = 0, limit: int = 100) -> List[Recipe]:
-        query = select(Recipe).options(joinedload(Recipe.ingredients).joinedload(Ingredient.cost_entries)).offset(skip).limit(limit)
-        result = await self.session.execute(query)
-        return list(result.scalars().unique())
+    async def bulk_create_recipes(self, rows: List[Tuple[int, RecipeCreate]]) -> List[Tuple[int, str]]:
+        # Writes one chunk of an import in its own transaction and returns
+        # (line, error) for rows that were rejected
+        ingredient_repository = IngredientRepository(self.session)
+        nutrient_errors = iter(await ingredient_repository.find_invalid_nutrients(
+            [ingredient_data for _, recipe in rows for ingredient_data in recipe.ingredients or []]
+        ))
+        errors = []
+        valid = []
+        for line, recipe in rows:
+            recipe_errors = [e for e in (next(nutrient_errors) for _ in recipe.ingredients or []) if e]
+            if recipe_errors:
+                errors.append((line, recipe_errors[0]))
+            else:
+                valid.append(recipe)
+        if not valid:
+            return errors
+
+        try:
+            recipe_ids = await insert_returning_ids(self.session, Recipe, [{"name": recipe.name} for recipe in valid])
+            ingredient_ids = await ingredient_repository.insert_ingredients([
+                (recipe_id, ingredient_data)
+                for recipe_id, recipe in zip(recipe_ids, valid)
+                for ingredient_data in recipe.ingredients or []
+            ])
+            await ChangeRepository(self.session).record({"recipe": recipe_ids, "ingredient": ingredient_ids})
+            await self.session.commit()
+        except SQLAlchemyError:
+            await self.session.rollback()
+            raise
+        nutrient_matrix.mark_stale(ingredient_ids)
+        return errors
+
+    def _with_ingredients(self, query, include_history: bool = True):
+        # Collections are loaded with one batched IN query each instead of a
+        # joined cartesian product, so LIMIT applies to recipes, not rows
+        ingredients = selectinload(Recipe.ingredients)
+        history = ingredients.selectinload(Ingredient.cost_entries) if include_history else ingredients.noload(Ingredient.cost_entries)
+        return query.options(history)
+
+    async def get_recipes(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, include_history: bool = True, ids: Optional[List[int]] = None) -> List[Recipe]:
+        # With ids, fetches exactly those recipes; each collection is still
+        # one batched IN query
+        query = select(Recipe).order_by(Recipe.id)
+        if ids is not None:
+            query = query.where(Recipe.id.in_(ids))
+        elif after_id is not None:
+            query = query.limit(limit).where(Recipe.id > after_id)
+        else:
+            query = query.limit(limit).offset(skip)
+        result = await self.session.execute(self._with_ingredients(query, include_history))
+        return list(result.scalars())
 
     async def get_recipe(self, recipe_id: int) -> Optional[Recipe]:
-        query = select(Recipe).where(Recipe.id == recipe_id).options(joinedload(Recipe.ingredients).joinedload(Ingredient.cost_entries))
+        query = self._with_ingredients(select(Recipe).where(Recipe.id == recipe_id))
         result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
-    async def update_recipe(self, recipe_id: int, recipe: RecipeCreate) -> Optional[Recipe]:
-        db_recipe = await self.get_recipe(recipe_id)
-        if not db_recipe:
+    async def _recipe_rows(self, query, include_history: bool = True) -> List[dict]:
+        # Plain-dict counterpart of _with_ingredients, keyed like schemas.Recipe
+        result = await self.session.execute(query)
+        recipes = [{"name": name, "id": recipe_id, "ingredients": []} for recipe_id, name in result]
+        by_id = {recipe["id"]: recipe for recipe in recipes}
+        ingredient_repository = IngredientRepository(self.session)
+        ingredient_rows = []
+        recipe_ids = list(by_id)
+        for start in range(0, len(recipe_ids), IN_CHUNK_SIZE):
+            result = await self.session.execute(
+                ingredient_repository._ingredient_columns()
+                .where(Ingredient.recipe_id.in_(recipe_ids[start:start + IN_CHUNK_SIZE]))
+                .order_by(Ingredient.recipe_id, Ingredient.id)
+            )
+            ingredient_rows.extend(dict(row) for row in result.mappings())
+        for row in await ingredient_repository.load_ingredient_rows(ingredient_rows, include_history):
+            by_id[row["recipe_id"]]["ingredients"].append(row)
+        return recipes
+
+    async def get_recipe_rows(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, include_history: bool = True, ids: Optional[List[int]] = None) -> List[dict]:
+        query = select(Recipe.id, Recipe.name).order_by(Recipe.id)
+        if ids is not None:
+            query = query.where(Recipe.id.in_(ids))
+        elif after_id is not None:
+            query = query.limit(limit).where(Recipe.id > after_id)
+        else:
+            query = query.limit(limit).offset(skip)
+        return await self._recipe_rows(query, include_history)
+
+    async def get_recipe_row(self, recipe_id: int) -> Optional[dict]:
+        rows = await self._recipe_rows(select(Recipe.id, Recipe.name).where(Recipe.id == recipe_id))
+        return rows[0] if rows else None
+
+    async def update_recipe(self, recipe_id: int, recipe: RecipeUpdate) -> Optional[Recipe]:
+        # Full replacement, applied as a diff: unchanged ingredients and their
+        # cost history are left alone, unmatched ones are removed
+        changes = [self._ingredient_fields(ingredient) for ingredient in recipe.ingredients or []]
+        return await self._apply_changes(recipe_id, recipe.name, changes, remove_unmatched=True)
+
+    async def patch_recipe(self, recipe_id: int, recipe: RecipePatch) -> Optional[Recipe]:
+        changes = [self._ingredient_fields(ingredient, partial=True) for ingredient in recipe.ingredients]
+        return await self._apply_changes(recipe_id, recipe.name, changes, remove_ids=recipe.remove_ingredient_ids)
+
+    def _ingredient_fields(self, ingredient, partial: bool = False) -> dict:
+        # The fields a change sets: for a patch only what the client sent
+        return {
+            name: value for name, value in ingredient
+            if value is not None and (not partial or name in ingredient.model_fields_set)
+        }
+
+    async def _apply_changes(
+        self,
+        recipe_id: int,
+        name: Optional[str],
+        changes: List[dict],
+        remove_unmatched: bool = False,
+        remove_ids: Sequence[int] = ()
+    ) -> Optional[Recipe]:
+        # Raises InvalidRecipeChange for ids that aren't in the recipe, new
+        # ingredients without weight or cost and unknown nutrients
+        recipe_name = (await self.session.execute(select(Recipe.name).where(Recipe.id == recipe_id))).scalar_one_or_none()
+        if recipe_name is None:
             return None
+        result = await self.session.execute(
+            select(Ingredient.id, Ingredient.name, Ingredient.weight, Ingredient.current_cost, Ingredient.current_cost_date)
+            .where(Ingredient.recipe_id == recipe_id)
+            .order_by(Ingredient.id)
+        )
+        existing = {row.id: row for row in result}
+
+        matched, added = self._match_ingredients(existing, changes)
+        unknown = sorted(set(remove_ids) - set(existing))
+        if unknown:
+            raise InvalidRecipeChange(f"Ingredient not in recipe: {', '.join(map(str, unknown))}")
+        if set(remove_ids) & set(matched):
+            raise InvalidRecipeChange("Ingredient both changed and removed")
+        removed = [i for i in existing if i not in matched] if remove_unmatched else list(dict.fromkeys(remove_ids))
+
+        ingredient_repository = IngredientRepository(self.session)
+        new_ingredients = []
+        for fields in added:
+            if "weight" not in fields or "cost" not in fields:
+                raise InvalidRecipeChange(f"New ingredient '{fields['name']}' needs weight and cost")
+            new_ingredients.append(IngredientCreate(**fields))
+        nutrient_errors = await ingredient_repository.find_invalid_nutrients([
+            IngredientCreate.model_construct(name=fields.get("name", existing[i].name), nutrients=fields["nutrients"])
+            for i, fields in matched.items() if "nutrients" in fields
+        ] + new_ingredients)
+        errors = [error for error in nutrient_errors if error]
+        if errors:
+            raise InvalidRecipeChange(errors[0])
+
+        changed = await self._update_matched(existing, matched)
+        if removed:
+            await ingredient_repository.delete_ingredient_rows(removed)
+        added_ids = await ingredient_repository.insert_ingredients([(recipe_id, ingredient) for ingredient in new_ingredients])
+        renamed = name is not None and name != recipe_name
+        if renamed:
+            await self.session.execute(update(Recipe).where(Recipe.id == recipe_id).values(name=name))
 
-        db_recipe.name = recipe.name
+        if renamed or changed or removed or added_ids:
+            await ChangeRepository(self.session).record(
+                {"recipe": [recipe_id], "ingredient": changed + added_ids}, deleted={"ingredient": removed}
+            )
+        await self.session.commit()
+        recipe_cache.invalidate(recipe_id)
+        nutrient_matrix.mark_stale(changed + removed + added_ids)
+        return await self.get_recipe(recipe_id)
 
-        for ingredient in db_recipe.ingredients:
-            await self.session.delete(ingredient)
+    def _match_ingredients(self, existing: dict, changes: List[dict]) -> Tuple[Dict[int, dict], List[dict]]:
+        # By id when given, otherwise the first unmatched ingredient with the
+        # same name, so repeated names pair up in order
+        by_name: Dict[str, List[int]] = {}
+        for ingredient_id, row in existing.items():
+            by_name.setdefault(row.name, []).append(ingredient_id)
+        matched: Dict[int, dict] = {}
+        added = []
+        for fields in changes:
+            ingredient_id = fields.pop("id", None)
+            if ingredient_id is not None:
+                if ingredient_id not in existing:
+                    raise InvalidRecipeChange(f"Ingredient not in recipe: {ingredient_id}")
+                if ingredient_id in matched:
+                    raise InvalidRecipeChange(f"Ingredient changed twice: {ingredient_id}")
+            else:
+                candidates = [i for i in by_name.get(fields["name"], []) if i not in matched]
+                ingredient_id = candidates[0] if candidates else None
+            if ingredient_id is None:
+                added.append(fields)
+            else:
+                matched[ingredient_id] = fields
+        return matched, added
 
-        for ingredient_data in recipe.ingredients:
-            db_ingredient = Ingredient(
-                name=ingredient_data.name,
-                weight=ingredient_data.weight,
-                nutrition_facts=ingredient_data.nutrition_facts,
-                recipe_id=db_recipe.id
+    async def _update_matched(self, existing: dict, matched: Dict[int, dict]) -> List[int]:
+        # Compares each change with what is stored and writes only the
+        # differences, one executemany per table. Returns the changed ids.
+        history_ids = [i for i, fields in matched.items() if "cost_entries" in fields]
+        known_entries = set()
+        for start in range(0, len(history_ids), IN_CHUNK_SIZE):
+            result = await self.session.execute(
+                select(CostEntry.ingredient_id, CostEntry.cost, CostEntry.date, CostEntry.vendor, CostEntry.notes)
+                .where(CostEntry.ingredient_id.in_(history_ids[start:start + IN_CHUNK_SIZE]))
             )
-            self.session.add(db_ingredient)
-            await self.session.flush()
-
-            cost_entry = CostEntry(
-                cost=ingredient_data.cost,
-                date=datetime.now(),
-                notes="Updated cost",
-                ingredient_id=db_ingredient.id
+            known_entries.update(tuple(row) for row in result)
+        nutrient_ids = [i for i, fields in matched.items() if "nutrients" in fields]
+        known_nutrients: Dict[int, dict] = {i: {} for i in nutrient_ids}
+        for start in range(0, len(nutrient_ids), IN_CHUNK_SIZE):
+            result = await self.session.execute(
+                select(ingredient_nutrients.c.ingredient_id, ingredient_nutrients.c.nutrient_id, ingredient_nutrients.c.amount)
+                .where(ingredient_nutrients.c.ingredient_id.in_(nutrient_ids[start:start + IN_CHUNK_SIZE]))
             )
-            self.session.add(cost_entry)
-
-            if hasattr(ingredient_data, 'cost_entries') and ingredient_data.cost_entries:
-                for entry in ingredient_data.cost_entries:
-                    cost_entry = CostEntry(
-                        cost=entry.cost,
-                        date=entry.date,
-                        vendor=entry.vendor,
-                        notes=entry.notes,
-                        ingredient_id=db_ingredient.id
+            for ingredient_id, nutrient_id, amount in result:
+                known_nutrients[ingredient_id][nutrient_id] = amount
+
+        now = datetime.now()
+        ingredient_rows = []
+        cost_rows = []
+        relinked = []
+        nutrient_rows = []
+        for ingredient_id, fields in matched.items():
+            row = existing[ingredient_id]
+            entries = []
+            if "cost" in fields and fields["cost"] != row.current_cost:
+                entries.append({"cost": fields["cost"], "date": now, "vendor": None, "notes": "Updated cost"})
+            for entry in fields.get("cost_entries", []):
+                key = (ingredient_id, entry.cost, entry.date, entry.vendor, entry.notes)
+                if key not in known_entries:
+                    known_entries.add(key)
+                    entries.append(entry.model_dump())
+            # Same rule as Ingredient.record_cost, applied in write order
+            cost, cost_date = row.current_cost, row.current_cost_date
+            for entry in entries:
+                if cost_date is None or entry["date"] >= cost_date:
+                    cost, cost_date = entry["cost"], entry["date"]
+            cost_rows.extend({**entry, "ingredient_id": ingredient_id} for entry in entries)
+
+            values = {
+                "id": ingredient_id,
+                "name": fields.get("name", row.name),
+                "weight": fields.get("weight", row.weight),
+                "current_cost": cost,
+                "current_cost_date": cost_date
+            }
+            if values != {"id": ingredient_id, "name": row.name, "weight": row.weight, "current_cost": row.current_cost, "current_cost_date": row.current_cost_date}:
+                ingredient_rows.append(values)
+
+            if "nutrients" in fields:
+                wanted = {n.nutrient.id: n.amount for n in fields["nutrients"]}
+                if wanted != known_nutrients[ingredient_id]:
+                    relinked.append(ingredient_id)
+                    nutrient_rows.extend(
+                        {"ingredient_id": ingredient_id, "nutrient_id": nutrient_id, "amount": amount}
+                        for nutrient_id, amount in wanted.items()
                     )
-                    self.session.add(cost_entry)
 
-        await self.session.commit()
-        await self.session.refresh(db_recipe)
-        return db_recipe
+        if ingredient_rows:
+            await self.session.execute(update(Ingredient), ingredient_rows)
+        if cost_rows:
+            await self.session.execute(insert(CostEntry), cost_rows)
+            await VendorRepository(self.session).record_prices(cost_rows)
+        for start in range(0, len(relinked), IN_CHUNK_SIZE):
+            await self.session.execute(
+                ingredient_nutrients.delete().where(ingredient_nutrients.c.ingredient_id.in_(relinked[start:start + IN_CHUNK_SIZE]))
+            )
+        if nutrient_rows:
+            await self.session.execute(insert(ingredient_nutrients), nutrient_rows)
+        return list(dict.fromkeys([row["id"] for row in ingredient_rows] + [row["ingredient_id"] for row in cost_rows] + relinked))
 
     async def delete_recipe(self, recipe_id: int) -> bool:
         db_recipe = await self.get_recipe(recipe_id)
         if not db_recipe:
             return False
 
+        removed_ids = [ingredient.id for ingredient in db_recipe.ingredients]
         await self.session.delete(db_recipe)
+        await ChangeRepository(self.session).record(deleted={"recipe": [recipe_id], "ingredient": removed_ids})
         await self.session.commit()
-        return True 
\ No newline at end of file
+        recipe_cache.invalidate(recipe_id)
+        nutrient_matrix.mark_stale(removed_ids)
+        return True
+
+    async def get_summaries(self, recipe_ids: List[int]) -> List[dict]:
+        cost_rows = await self.session.execute(
+            select(
+                Recipe.id, Recipe.name,
+                Ingredient.id, Ingredient.name, Ingredient.weight,
+                func.coalesce(Ingredient.current_cost, 0.0)
+            )
+            .outerjoin(Ingredient, Ingredient.recipe_id == Recipe.id)
+            .where(Recipe.id.in_(recipe_ids))
+            .order_by(Recipe.id, Ingredient.id)
+        )
+        summaries = {}
+        for recipe_id, recipe_name, ingredient_id, name, weight, cost in cost_rows:
+            summary = summaries.setdefault(recipe_id, {
+                "id": recipe_id, "name": recipe_name, "total_cost": 0.0,
+                "ingredients": [], "nutrients": []
+            })
+            if ingredient_id is not None:
+                summary["ingredients"].append({"id": ingredient_id, "name": name, "weight": weight, "cost": cost})
+                summary["total_cost"] += cost
+
+        # ingredient_nutrients.amount is per 100g of ingredient. Summed in SQL
+        # in the same transaction as the costs, so both are current; another
+        # worker's nutrient matrix can lag behind.
+        nutrient_rows = await self.session.execute(
+            select(
+                Ingredient.recipe_id, Nutrient.id, Nutrient.name, Nutrient.unit,
+                func.sum(ingredient_nutrients.c.amount * Ingredient.weight / 100.0)
+            )
+            .join(ingredient_nutrients, ingredient_nutrients.c.ingredient_id == Ingredient.id)
+            .join(Nutrient, Nutrient.id == ingredient_nutrients.c.nutrient_id)
+            .where(Ingredient.recipe_id.in_(recipe_ids))
+            .group_by(Ingredient.recipe_id, Nutrient.id, Nutrient.name, Nutrient.unit)
+            .order_by(Ingredient.recipe_id, Nutrient.id)
+        )
+        for recipe_id, nutrient_id, name, unit, amount in nutrient_rows:
+            summaries[recipe_id]["nutrients"].append({"nutrient_id": nutrient_id, "name": name, "unit": unit, "amount": amount})
+
+        return [summaries[recipe_id] for recipe_id in recipe_ids if recipe_id in summaries]
+
+    async def reprice(self, changes: List[PriceChange]) -> List[dict]:
+        # What-if costs against the current prices in the database; nothing
+        # is written. Raises UnknownIngredientError for ingredient ids that
+        # don't exist.
+        ingredient_changes = {}
+        vendor_changes = {}
+        for change in changes:
+            target = ingredient_changes if change.ingredient_id is not None else vendor_changes
+            target[change.ingredient_id if change.ingredient_id is not None else change.vendor] = (change.cost, change.percent)
+
+        # (recipe_id, current_cost) of every ingredient a change applies to
+        touched: Dict[int, tuple] = {}
+        ingredient_ids = list(ingredient_changes)
+        for start in range(0, len(ingredient_ids), IN_CHUNK_SIZE):
+            rows = await self.session.execute(
+                select(Ingredient.id, Ingredient.recipe_id, Ingredient.current_cost)
+                .where(Ingredient.id.in_(ingredient_ids[start:start + IN_CHUNK_SIZE]))
+            )
+            touched.update((ingredient_id, (recipe_id, cost)) for ingredient_id, recipe_id, cost in rows)
+        missing = sorted(set(ingredient_ids) - set(touched))
+        if missing:
+            raise UnknownIngredientError(missing)
+
+        resolved: Dict[int, tuple] = {}
+        if vendor_changes:
+            # The current price came from a vendor when its newest entry is the
+            # ingredient's newest; the vendor index narrows the candidates by
+            # date and the history settles ties
+            latest_vendor = (
+                select(CostEntry.vendor)
+                .where(CostEntry.ingredient_id == Ingredient.id)
+                .order_by(CostEntry.date.desc(), CostEntry.id.desc())
+                .limit(1)
+                .scalar_subquery()
+            )
+            rows = await self.session.execute(
+                select(Ingredient.id, Ingredient.recipe_id, Ingredient.current_cost, VendorPrice.vendor)
+                .join(VendorPrice, VendorPrice.ingredient_id == Ingredient.id)
+                .where(
+                    VendorPrice.vendor.in_(list(vendor_changes)),
+                    VendorPrice.date == Ingredient.current_cost_date,
+                    VendorPrice.vendor == latest_vendor
+                )
+            )
+            for ingredient_id, recipe_id, cost, vendor in rows:
+                touched[ingredient_id] = (recipe_id, cost)
+                resolved[ingredient_id] = vendor_changes[vendor]
+        # Ingredient changes take precedence over vendor-wide ones
+        resolved.update(ingredient_changes)
+
+        # Current totals of the affected recipes, summed in the same transaction
+        affected = sorted({recipe_id for recipe_id, _ in touched.values() if recipe_id is not None})
+        recipe_costs = {}
+        for start in range(0, len(affected), IN_CHUNK_SIZE):
+            rows = await self.session.execute(
+                select(Ingredient.recipe_id, func.sum(func.coalesce(Ingredient.current_cost, 0.0)))
+                .where(Ingredient.recipe_id.in_(affected[start:start + IN_CHUNK_SIZE]))
+                .group_by(Ingredient.recipe_id)
+            )
+            recipe_costs.update(rows.all())
+        return reprice(recipe_costs, touched, resolved)
+
+    async def evaluate_meal_plan(self, multipliers: Dict[int, float]) -> dict:
+        # Per chunk of recipes, one join for names, weights and current costs
+        # and one GROUP BY for nutrient totals, all in one transaction.
+        # Raises UnknownRecipeError.
+        names = {}
+        ingredients = []
+        nutrients = []
+        missing = []
+        recipe_ids = list(multipliers)
+        for start in range(0, len(recipe_ids), IN_CHUNK_SIZE):
+            chunk = recipe_ids[start:start + IN_CHUNK_SIZE]
+            rows = await self.session.execute(
+                select(Recipe.id, Recipe.name, Ingredient.id, Ingredient.name, Ingredient.weight, Ingredient.current_cost)
+                .outerjoin(Ingredient, Ingredient.recipe_id == Recipe.id)
+                .where(Recipe.id.in_(chunk))
+            )
+            for recipe_id, recipe_name, ingredient_id, name, weight, cost in rows:
+                names[recipe_id] = recipe_name
+                if ingredient_id is not None:
+                    ingredients.append((recipe_id, ingredient_id, name, weight, cost))
+            missing.extend(set(chunk) - set(names))
+            if missing:
+                continue
+            # Scaled by each recipe's multiplier in SQL, so a chunk returns
+            # one row per nutrient rather than per recipe and nutrient
+            multiplier = case({recipe_id: multipliers[recipe_id] for recipe_id in chunk}, value=Ingredient.recipe_id)
+            rows = await self.session.execute(
+                select(
+                    ingredient_nutrients.c.nutrient_id,
+                    func.sum(ingredient_nutrients.c.amount * Ingredient.weight / 100.0 * multiplier)
+                )
+                .join(ingredient_nutrients, ingredient_nutrients.c.ingredient_id == Ingredient.id)
+                .where(Ingredient.recipe_id.in_(chunk))
+                .group_by(ingredient_nutrients.c.nutrient_id)
+            )
+            nutrients.extend(rows.all())
+        if missing:
+            raise UnknownRecipeError(sorted(missing))
+        # Names and units once per nutrient rather than on every grouped row
+        nutrient_ids = list({nutrient_id for nutrient_id, _ in nutrients})
+        info = {}
+        for start in range(0, len(nutrient_ids), IN_CHUNK_SIZE):
+            rows = await self.session.execute(
+                select(Nutrient.id, Nutrient.name, Nutrient.unit).where(Nutrient.id.in_(nutrient_ids[start:start + IN_CHUNK_SIZE]))
+            )
+            info.update((nutrient_id, (name, unit)) for nutrient_id, name, unit in rows)
+        return evaluate_plan(multipliers, names, ingredients, nutrients, info)
@@ -0,0 +1,196 @@
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+# Searchable tables: kind -> (table, extra column returned with each hit)
+SEARCH_SOURCES = {
+    "recipe": ("recipes", None),
+    "ingredient": ("ingredients", "recipe_id"),
+    "nutrient": ("nutrients", None),
+}
+
+# Candidates fetched per kind and match stage before ranking; results can be
+# paged up to this depth. Prefix candidates are the shortest names and fuzzy
+# ones the best by bm25; substring candidates are the first in index order.
+CANDIDATE_LIMIT = 200
+
+# Trigram indexes need at least one full trigram, so shorter queries only
+# run the prefix stage (a B-tree range scan)
+MIN_QUERY_LENGTH = 3
+
+# Fuzzy matches of short queries share any trigram with them, so they are
+# kept only from this similarity up, pg_trgm's default threshold
+SIMILARITY_THRESHOLD = 0.3
+
+# NOCASE folds ASCII letters only
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+def _sqlite_ddl(table: str) -> List[str]:
+    # External-content FTS5 tables over the name column, kept in sync by
+    # triggers so every write path (ORM, bulk executemany, cascades) is covered
+    index = f"{table}_search"
+    return [
+        f"CREATE VIRTUAL TABLE {index} USING fts5(name, content='{table}', content_rowid='id', tokenize='trigram')",
+        f"INSERT INTO {index}({index}) VALUES ('rebuild')",
+        f"""CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {index}(rowid, name) VALUES (new.id, new.name);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {index}({index}, rowid, name) VALUES ('delete', old.id, old.name);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF name ON {table} BEGIN
+            INSERT INTO {index}({index}, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO {index}(rowid, name) VALUES (new.id, new.name);
+        END""",
+    ]
+
+def create_search_indexes(connection) -> None:
+    # Run with AsyncConnection.run_sync after the tables exist
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for table, _ in SEARCH_SOURCES.values():
+            connection.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_name_trgm ON {table} USING gin (name gin_trgm_ops)"
+            ))
+        return
+    for table, _ in SEARCH_SOURCES.values():
+        # Case-insensitive B-tree for prefix ranges
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_name_nocase ON {table} (name COLLATE NOCASE)"))
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": f"{table}_search"}
+        ).first()
+        if not exists:
+            for statement in _sqlite_ddl(table):
+                connection.execute(text(statement))
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+def _trigrams(query: str) -> List[str]:
+    return [query[i:i + 3] for i in range(len(query) - 2)]
+
+def trigram_similarity(query: str, name: str) -> float:
+    # Shared / combined trigram count, like pg_trgm's similarity()
+    a = set(_trigrams(query.lower()))
+    b = set(_trigrams(name.lower()))
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+def fuzzy_match_expression(query: str) -> Optional[str]:
+    # One typo breaks at most three consecutive trigrams, so a name matches
+    # if it has every trigram outside some window of three. Short queries
+    # keep at least two trigrams per alternative; queries too short for
+    # that match any of their trigrams.
+    trigrams = _trigrams(query)
+    if not trigrams:
+        return None
+    if len(trigrams) < 4:
+        return " OR ".join(_quote(t) for t in dict.fromkeys(trigrams))
+    window = min(3, len(trigrams) - 2)
+    alternatives = []
+    for start in range(len(trigrams) - window + 1):
+        kept = trigrams[:start] + trigrams[start + window:]
+        alternatives.append("(" + " AND ".join(_quote(t) for t in kept) + ")")
+    return " OR ".join(dict.fromkeys(alternatives))
+
+STAGES = ("prefix", "substring", "fuzzy")
+
+class SearchRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def search(self, query: str, kinds: Sequence[str], skip: int = 0, limit: int = 20) -> List[Dict]:
+        # Ranked: prefix matches, then substring matches (shorter names
+        # first), then typo-tolerant matches by trigram similarity. A later
+        # stage can't outrank an earlier one, so it only runs when the
+        # earlier ones didn't fill the requested page.
+        query = query.strip()
+        if not query:
+            return []
+        stages = STAGES if len(query) >= MIN_QUERY_LENGTH else STAGES[:1]
+        candidates = self._postgres_candidates if self.session.bind.dialect.name == "postgresql" else self._sqlite_candidates
+        hits: Dict[tuple, Dict] = {}
+        for rank, stage in enumerate(stages):
+            if len(hits) >= skip + limit:
+                break
+            for kind in kinds:
+                for hit in await candidates(kind, stage, query):
+                    hits.setdefault((kind, hit["id"]), {**hit, "type": kind, "match": stage, "rank": rank})
+        ranked = sorted(hits.values(), key=lambda hit: (hit["rank"], hit["score"], len(hit["name"]), hit["name"], hit["id"]))
+        return [
+            {key: value for key, value in hit.items() if key not in ("rank", "score")}
+            for hit in ranked[skip:skip + limit]
+        ]
+
+    def _hits(self, rows, score=None) -> List[Dict]:
+        return [
+            {
+                "id": row[0], "name": row[1],
+                "recipe_id": row[2] if len(row) > 2 else None,
+                "score": score(row) if score else 0.0
+            }
+            for row in rows
+        ]
+
+    async def _sqlite_candidates(self, kind: str, stage: str, query: str) -> List[Dict]:
+        table, extra = SEARCH_SOURCES[kind]
+        index = f"{table}_search"
+        columns = f"{table}.id, {table}.name" + (f", {table}.{extra}" if extra else "")
+        source = f"FROM {index} JOIN {table} ON {table}.id = {index}.rowid"
+
+        if stage == "prefix":
+            # Range scan on the NOCASE index; everything sorting between the
+            # query and the query with its last character bumped starts with
+            # it. Bumped after folding, as NOCASE compares: "Z" + 1 is "[",
+            # which sorts before every folded letter.
+            lower = query.translate(_ASCII_LOWER)
+            upper = lower[:-1] + chr(ord(lower[-1]) + 1)
+            # The shortest names rank first, so those are the ones kept; the
+            # sort covers the whole range, a few ms for 50k names
+            statement = (
+                f"SELECT {columns} FROM {table} WHERE name >= :lower COLLATE NOCASE AND name < :upper COLLATE NOCASE "
+                "ORDER BY length(name) LIMIT :limit"
+            )
+            params = {"lower": lower, "upper": upper}
+        elif stage == "substring":
+            statement = f"SELECT {columns} {source} WHERE {index} MATCH :match LIMIT :limit"
+            params = {"match": _quote(query)}
+        else:
+            fuzzy = fuzzy_match_expression(query)
+            if not fuzzy:
+                return []
+            # Best bm25 matches first, so the limit keeps the likeliest ones
+            # for trigram_similarity to rank
+            statement = (
+                f"SELECT {columns} FROM (SELECT rowid FROM {index} WHERE {index} MATCH :match ORDER BY rank LIMIT :limit) AS matches "
+                f"JOIN {table} ON {table}.id = matches.rowid"
+            )
+            params = {"match": fuzzy}
+        rows = await self.session.execute(text(statement), {**params, "limit": CANDIDATE_LIMIT})
+        if stage == "fuzzy":
+            hits = self._hits(rows, lambda row: -trigram_similarity(query, row[1]))
+            if len(_trigrams(query)) < 4:
+                hits = [hit for hit in hits if -hit["score"] >= SIMILARITY_THRESHOLD]
+            return hits
+        return self._hits(rows)
+
+    async def _postgres_candidates(self, kind: str, stage: str, query: str) -> List[Dict]:
+        table, extra = SEARCH_SOURCES[kind]
+        columns = "id, name" + (f", {extra}" if extra else "")
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        if stage == "fuzzy":
+            result = await self.session.execute(
+                text(f"SELECT {columns}, similarity(name, :query) AS score FROM {table} WHERE name % :query ORDER BY score DESC LIMIT :limit"),
+                {"query": query, "limit": CANDIDATE_LIMIT}
+            )
+            rows = result.all()
+            hits = self._hits([row[:-1] for row in rows])
+            for hit, row in zip(hits, rows):
+                hit["score"] = -row[-1]
+            return hits
+        pattern = escaped + "%" if stage == "prefix" else "%" + escaped + "%"
+        rows = await self.session.execute(
+            text(f"SELECT {columns} FROM {table} WHERE name ILIKE :pattern LIMIT :limit"),
+            {"pattern": pattern, "limit": CANDIDATE_LIMIT}
+        )
+        return self._hits(rows)
@@ -0,0 +1,119 @@
+from typing import Dict, Iterable, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models.ingredient import Ingredient, CostEntry, VendorPrice
+
+def _upsert_statement(dialect_name: str):
+    # Newer (or equally new, later-written) prices replace the stored one;
+    # backdated entries leave it alone
+    insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = insert(VendorPrice)
+    return statement.on_conflict_do_update(
+        index_elements=[VendorPrice.ingredient_id, VendorPrice.vendor],
+        set_={"cost": statement.excluded.cost, "date": statement.excluded.date},
+        where=statement.excluded.date >= VendorPrice.date
+    )
+
+def _insert_from_history(*filters):
+    # INSERT .. SELECT of the latest entry per (ingredient, vendor) in cost_entries
+    ranked = select(
+        CostEntry.ingredient_id, CostEntry.vendor, CostEntry.cost, CostEntry.date,
+        func.row_number().over(
+            partition_by=(CostEntry.ingredient_id, CostEntry.vendor),
+            order_by=(CostEntry.date.desc(), CostEntry.id.desc())
+        ).label("position")
+    ).where(CostEntry.vendor.is_not(None), CostEntry.ingredient_id.is_not(None), *filters).subquery()
+    return VendorPrice.__table__.insert().from_select(
+        ["ingredient_id", "vendor", "cost", "date"],
+        select(ranked.c.ingredient_id, ranked.c.vendor, ranked.c.cost, ranked.c.date).where(ranked.c.position == 1)
+    )
+
+def backfill_vendor_prices(connection) -> None:
+    # Run with AsyncConnection.run_sync at startup; fills the index from the
+    # history for databases created before it existed
+    if connection.execute(select(VendorPrice.ingredient_id).limit(1)).first():
+        return
+    connection.execute(_insert_from_history())
+
+class VendorRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def record_prices(self, entries: Iterable[dict]) -> None:
+        # entries: dicts with ingredient_id, vendor, cost and date, in write
+        # order. Collapsed per key first so one statement never updates the
+        # same row twice. The caller owns the transaction.
+        latest: Dict[tuple, dict] = {}
+        for entry in entries:
+            if entry.get("vendor") is None:
+                continue
+            key = (entry["ingredient_id"], entry["vendor"])
+            if key not in latest or entry["date"] >= latest[key]["date"]:
+                latest[key] = {k: entry[k] for k in ("ingredient_id", "vendor", "cost", "date")}
+        if latest:
+            await self.session.execute(_upsert_statement(self.session.bind.dialect.name), list(latest.values()))
+
+    async def refresh_prices(self, ingredient_ids: List[int]) -> None:
+        # Rebuild the index rows of these ingredients from their history, for
+        # when entries were removed or rewritten. The caller owns the transaction.
+        await self.session.execute(delete(VendorPrice).where(VendorPrice.ingredient_id.in_(ingredient_ids)))
+        await self.session.execute(_insert_from_history(CostEntry.ingredient_id.in_(ingredient_ids)))
+
+    async def get_vendor_prices(self, ingredient_id: int) -> List[VendorPrice]:
+        result = await self.session.execute(
+            select(VendorPrice)
+            .where(VendorPrice.ingredient_id == ingredient_id)
+            .order_by(VendorPrice.cost, VendorPrice.vendor)
+        )
+        return list(result.scalars())
+
+    def _cheapest(self, ingredient_filter):
+        # Cheapest current vendor per ingredient; ties go to the newer price
+        ranked = select(
+            VendorPrice.ingredient_id, VendorPrice.vendor, VendorPrice.cost, VendorPrice.date,
+            func.row_number().over(
+                partition_by=VendorPrice.ingredient_id,
+                order_by=(VendorPrice.cost, VendorPrice.date.desc(), VendorPrice.vendor)
+            ).label("position")
+        ).where(ingredient_filter).subquery()
+        return select(ranked.c.ingredient_id, ranked.c.vendor, ranked.c.cost, ranked.c.date).where(ranked.c.position == 1).subquery()
+
+    async def get_cheapest(self, ingredient_ids: List[int]) -> List[dict]:
+        cheapest = self._cheapest(VendorPrice.ingredient_id.in_(ingredient_ids))
+        result = await self.session.execute(select(cheapest).order_by(cheapest.c.ingredient_id))
+        return [dict(row) for row in result.mappings()]
+
+    async def get_cheapest_recipes(self, recipe_ids: List[int]) -> List[dict]:
+        # Lowest achievable cost per recipe: every ingredient bought from its
+        # cheapest vendor, or at its current price where no vendor is known
+        recipe_ingredients = select(Ingredient.id).where(Ingredient.recipe_id.in_(recipe_ids))
+        cheapest = self._cheapest(VendorPrice.ingredient_id.in_(recipe_ingredients))
+        result = await self.session.execute(
+            select(
+                Ingredient.recipe_id, Ingredient.id, func.coalesce(Ingredient.current_cost, 0.0),
+                cheapest.c.vendor, cheapest.c.cost
+            )
+            .outerjoin(cheapest, cheapest.c.ingredient_id == Ingredient.id)
+            .where(Ingredient.recipe_id.in_(recipe_ids))
+            .order_by(Ingredient.recipe_id, Ingredient.id)
+        )
+        recipes: Dict[int, dict] = {}
+        for recipe_id, ingredient_id, current_cost, vendor, vendor_cost in result:
+            recipe = recipes.setdefault(recipe_id, {
+                "recipe_id": recipe_id, "current_cost": 0.0, "lowest_cost": 0.0, "ingredients": []
+            })
+            # A vendor only counts if it beats what the ingredient costs now
+            use_vendor = vendor_cost is not None and vendor_cost < current_cost
+            cost = vendor_cost if use_vendor else current_cost
+            recipe["current_cost"] += current_cost
+            recipe["lowest_cost"] += cost
+            recipe["ingredients"].append({
+                "ingredient_id": ingredient_id,
+                "vendor": vendor if use_vendor else None,
+                "cost": cost
+            })
+        for recipe in recipes.values():
+            recipe["savings"] = recipe["current_cost"] - recipe["lowest_cost"]
+        return [recipes[recipe_id] for recipe_id in recipe_ids if recipe_id in recipes]
@@ -1,5 +1,11 @@
 from routes.recipe import router as recipe_router
 from routes.ingredient import router as ingredient_router
 from routes.nutrient import router as nutrient_router
+from routes.export import router as export_router
+from routes.search import router as search_router
+from routes.vendor import router as vendor_router
+from routes.jobs import router as jobs_router
+from routes.changes import router as changes_router
+from routes.meal_plans import router as meal_plans_router
 
-__all__ = ["recipe_router", "ingredient_router", "nutrient_router"] 
\ No newline at end of file
+__all__ = ["recipe_router", "ingredient_router", "nutrient_router", "export_router", "search_router", "vendor_router", "jobs_router", "changes_router", "meal_plans_router"] 
\ No newline at end of file
@@ -0,0 +1,54 @@
+import hashlib
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import orjson
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from cache import CachedResponse
+
+@lru_cache(maxsize=None)
+def _adapter(model: Any) -> TypeAdapter:
+    return TypeAdapter(model)
+
+# orjson writes large floats as 1e16 where pydantic writes 1e+16
+_POSITIVE_EXPONENT = re.compile(rb"\de\d")
+
+def dump_rows(model: Any, rows: Any) -> bytes:
+    # Rows projected by the repositories already have the schema's keys and
+    # order, so orjson can encode them without building models. Anything it
+    # would format differently goes through the response model instead.
+    body = orjson.dumps(rows)
+    if _POSITIVE_EXPONENT.search(body):
+        adapter = _adapter(model)
+        body = adapter.dump_json(adapter.validate_python(rows))
+    return body
+
+def json_response(model: Any, rows: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=dump_rows(model, rows), media_type="application/json", headers=headers)
+
+def _fingerprint(body: bytes, headers: Optional[Dict[str, str]]) -> CachedResponse:
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    return CachedResponse(body=body, etag=etag, headers=headers or {})
+
+def encode_response(model: Any, content: Any, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+    # Serialize once through the response model and fingerprint the bytes
+    adapter = _adapter(model)
+    return _fingerprint(adapter.dump_json(adapter.validate_python(content, from_attributes=True)), headers)
+
+def encode_rows(model: Any, rows: Any, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+    return _fingerprint(dump_rows(model, rows), headers)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def conditional_response(request: Request, cached: CachedResponse) -> Response:
+    headers = {**cached.headers, "ETag": cached.etag}
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -0,0 +1,56 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schemas.change import ChangeFeed, EntityType
+from schemas.ingredient import Nutrient as NutrientSchema
+from database import get_db
+from repositories.change_repository import ChangeRepository
+from repositories.recipe_repository import RecipeRepository
+from repositories.ingredient_repository import IngredientRepository
+from repositories.nutrient_repository import NutrientRepository
+from metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/changes", tags=["changes"], route_class=InstrumentedRoute)
+
+async def _payloads(db: AsyncSession, entity: str, ids: List[int], include_history: bool) -> dict:
+    if not ids:
+        return {}
+    if entity == "recipe":
+        rows = await RecipeRepository(db).get_recipe_rows(include_history=include_history, ids=ids)
+    elif entity == "ingredient":
+        rows = await IngredientRepository(db).get_ingredient_rows(include_history=include_history, ids=ids)
+    else:
+        rows = [NutrientSchema.model_validate(n).model_dump() for n in await NutrientRepository(db).get_nutrients(ids=ids)]
+    return {row["id"]: row for row in rows}
+
+@router.get("", response_model=ChangeFeed)
+async def read_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=1000),
+    type: Optional[List[EntityType]] = Query(None),
+    payloads: bool = False,
+    include_history: bool = True,
+    db: AsyncSession = Depends(get_db)
+):
+    # Entities created, updated or deleted after version `since`, oldest
+    # first; each appears once, at its latest version. Start from since=0
+    # (the whole catalog) and pass the returned version on the next call.
+    entities = [t.value for t in type] if type else None
+    changes = await ChangeRepository(db).get_changes(since, limit, entities)
+    data = {}
+    if payloads:
+        for entity in EntityType:
+            ids = [c.entity_id for c in changes if c.entity == entity.value and not c.deleted]
+            data[entity.value] = await _payloads(db, entity.value, ids, include_history)
+    return {
+        "version": changes[-1].version if changes else since,
+        "has_more": len(changes) == limit,
+        "changes": [
+            {
+                "type": c.entity, "id": c.entity_id, "version": c.version, "deleted": c.deleted,
+                "data": data.get(c.entity, {}).get(c.entity_id)
+            }
+            for c in changes
+        ]
+    }
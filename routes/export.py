@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from database import ReadSessionLocal
+from repositories.export_repository import ExportRepository
+from metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/export", tags=["export"], route_class=InstrumentedRoute)
+
+class ExportEntity(str, Enum):
+    recipes = "recipes"
+    ingredients = "ingredients"
+    cost_entries = "cost_entries"
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+async def _ndjson_chunks(entity: str) -> AsyncIterator[str]:
+    # The session lives as long as the response body, not the request handler
+    async with ReadSessionLocal() as session:
+        async for rows in ExportRepository(session).stream(entity):
+            yield "".join(json.dumps(dict(row), default=_json_default) + "\n" for row in rows)
+
+async def _csv_chunks(entity: str) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ExportRepository.columns(entity))
+    yield buffer.getvalue()
+    async with ReadSessionLocal() as session:
+        async for rows in ExportRepository(session).stream(entity):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row.values()]
+                for row in rows
+            )
+            yield buffer.getvalue()
+
+@router.get("/{entity}")
+async def export_entity(entity: ExportEntity, format: ExportFormat = ExportFormat.ndjson):
+    chunks = _csv_chunks(entity.value) if format == ExportFormat.csv else _ndjson_chunks(entity.value)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity.value}.{format.value}"'}
+    )
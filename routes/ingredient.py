@@ -1,17 +1,64 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import List, Optional, Tuple, Union
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, status, Depends, Response, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas import IngredientCreate, Ingredient as IngredientSchema
-from schemas.ingredient import CostEntry
-from database import get_db
+from schemas.ingredient import CostEntry, CostEntryAck, CostBucket, CostBucketSize, IngredientCostSeries, to_naive_local
+from schemas.ingredient import SimilarIngredient, NutrientProfileQuery
+from schemas.bulk import IngredientImport, BulkImportResult
+from schemas.vendor import VendorPrice
+from database import get_db, ReadSessionLocal
+from cache import ingredient_loads, CachedResponse
+from settings import settings
+from routes.pagination import decode_cursor, set_next_cursor, next_cursor_headers
+from routes.caching import json_response, encode_response, encode_rows, conditional_response
+from routes.ndjson import import_ndjson
+from routes.params import parse_id_list, in_request_order
 from repositories.ingredient_repository import IngredientRepository
+from services.nutrient_matrix import UnknownNutrientError
+from services.cost_ingest import cost_batcher
+from metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/ingredients", tags=["ingredients"])
+router = APIRouter(prefix="/ingredients", tags=["ingredients"], route_class=InstrumentedRoute)
 
 async def get_ingredient_repository(db: AsyncSession = Depends(get_db)) -> IngredientRepository:
     return IngredientRepository(db)
 
+def _naive_range(start: Optional[datetime], end: Optional[datetime]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    return (
+        to_naive_local(start) if start else None,
+        to_naive_local(end) if end else None
+    )
+
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_ingredients(request: Request, chunk_size: int = Query(1000, ge=1, le=50000), repository: IngredientRepository = Depends(get_ingredient_repository)):
+    # NDJSON body, one IngredientImport per line; each chunk commits on its own
+    return await import_ndjson(request.stream(), IngredientImport, repository.bulk_create_ingredients, chunk_size)
+
+@router.get("/cost_history", response_model=List[IngredientCostSeries])
+async def get_cost_series(
+    ids: str,
+    bucket: CostBucketSize = CostBucketSize.day,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    vendor: Optional[str] = None,
+    repository: IngredientRepository = Depends(get_ingredient_repository)
+):
+    ingredient_ids = parse_id_list(ids, max_ids=200)
+    start, end = _naive_range(start, end)
+    series = await repository.get_cost_buckets(ingredient_ids, bucket.value, start, end, vendor)
+    return [{"ingredient_id": ingredient_id, "buckets": buckets} for ingredient_id, buckets in series.items()]
+
+@router.post("/search-by-profile", response_model=List[SimilarIngredient])
+async def search_by_profile(query: NutrientProfileQuery, repository: IngredientRepository = Depends(get_ingredient_repository)):
+    # Nearest ingredients to a per-100g nutrient profile
+    amounts = {item.nutrient_id: item.amount for item in query.nutrients}
+    try:
+        return await repository.search_by_profile(amounts, query.limit)
+    except UnknownNutrientError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
 @router.post("/{recipe_id}", response_model=IngredientSchema, status_code=status.HTTP_201_CREATED)
 async def create_ingredient(recipe_id: int, ingredient: IngredientCreate, repository: IngredientRepository = Depends(get_ingredient_repository)):
     db_ingredient = await repository.create_ingredient(recipe_id, ingredient)
@@ -20,15 +67,52 @@ async def create_ingredient(recipe_id: int, ingredient: IngredientCreate, reposi
     return db_ingredient
 
 @router.get("/", response_model=List[IngredientSchema])
-async def read_ingredients(skip: int = 0, limit: int = 100, repository: IngredientRepository = Depends(get_ingredient_repository)):
-    return await repository.get_ingredients(skip, limit)
+async def read_ingredients(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, include_history: bool = True, ids: Optional[str] = None, repository: IngredientRepository = Depends(get_ingredient_repository)):
+    # ids=1,2,3 fetches those ingredients, in that order, instead of a page
+    id_list = parse_id_list(ids) if ids else None
+    if settings.fast_serialization:
+        rows = await repository.get_ingredient_rows(skip, limit, after_id=decode_cursor(cursor), include_history=include_history, ids=id_list)
+        headers = next_cursor_headers(rows, limit) if id_list is None else None
+        return json_response(List[IngredientSchema], in_request_order(rows, id_list), headers)
+    items = await repository.get_ingredients(skip, limit, after_id=decode_cursor(cursor), include_history=include_history, ids=id_list)
+    if id_list is None:
+        set_next_cursor(response, items, limit)
+    return in_request_order(items, id_list)
+
+async def _load_ingredient(ingredient_id: int) -> Optional[CachedResponse]:
+    async with ReadSessionLocal() as session:
+        repository = IngredientRepository(session)
+        if settings.fast_serialization:
+            ingredient = await repository.get_ingredient_row(ingredient_id)
+        else:
+            ingredient = await repository.get_ingredient(ingredient_id)
+        if not ingredient:
+            return None
+        encode = encode_rows if settings.fast_serialization else encode_response
+        return encode(IngredientSchema, ingredient)
 
 @router.get("/{ingredient_id}", response_model=IngredientSchema)
-async def read_ingredient(ingredient_id: int, repository: IngredientRepository = Depends(get_ingredient_repository)):
-    ingredient = await repository.get_ingredient(ingredient_id)
-    if not ingredient:
+async def read_ingredient(ingredient_id: int, request: Request):
+    # Concurrent requests for the same ingredient share a single load
+    encoded = await ingredient_loads.do(ingredient_id, lambda: _load_ingredient(ingredient_id))
+    if encoded is None:
         raise HTTPException(status_code=404, detail="Ingredient not found")
-    return ingredient
+    return conditional_response(request, encoded)
+
+@router.get("/{ingredient_id}/similar", response_model=List[SimilarIngredient])
+async def read_similar_ingredients(ingredient_id: int, limit: int = Query(10, ge=1, le=100), repository: IngredientRepository = Depends(get_ingredient_repository)):
+    similar = await repository.get_similar_ingredients(ingredient_id, limit)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Ingredient not found")
+    return similar
+
+@router.get("/{ingredient_id}/vendors", response_model=List[VendorPrice])
+async def read_vendor_prices(ingredient_id: int, repository: IngredientRepository = Depends(get_ingredient_repository)):
+    # Latest price from each vendor, cheapest first
+    prices = await repository.get_vendor_prices(ingredient_id)
+    if prices is None:
+        raise HTTPException(status_code=404, detail="Ingredient not found")
+    return prices
 
 @router.put("/{ingredient_id}", response_model=IngredientSchema)
 async def update_ingredient(ingredient_id: int, ingredient: IngredientCreate, repository: IngredientRepository = Depends(get_ingredient_repository)):
@@ -44,13 +128,34 @@ async def delete_ingredient(ingredient_id: int, repository: IngredientRepository
         raise HTTPException(status_code=404, detail="Ingredient not found")
     return None
 
-@router.post("/{ingredient_id}/cost", response_model=IngredientSchema)
-async def add_cost_entry(ingredient_id: int, cost_entry: CostEntry, repository: IngredientRepository = Depends(get_ingredient_repository)):
-    updated_ingredient = await repository.add_cost_entry(ingredient_id, cost_entry)
-    if not updated_ingredient:
+@router.post(
+    "/{ingredient_id}/cost",
+    response_model=IngredientSchema,
+    responses={200: {"description": "The ingredient, or a CostEntryAck with `Prefer: return=minimal`"}}
+)
+async def add_cost_entry(ingredient_id: int, cost_entry: CostEntry, request: Request, repository: IngredientRepository = Depends(get_ingredient_repository)):
+    # Entries from concurrent requests are committed together; this returns
+    # once the transaction holding this one has committed
+    current = await cost_batcher.add(ingredient_id, cost_entry)
+    if current is None:
         raise HTTPException(status_code=404, detail="Ingredient not found")
-    return updated_ingredient
+    if "return=minimal" in request.headers.get("prefer", ""):
+        ack = {"ingredient_id": ingredient_id, "cost": cost_entry.cost, "date": cost_entry.date, "current": current}
+        return json_response(CostEntryAck, ack, {"Preference-Applied": "return=minimal"})
+    return await repository.get_ingredient(ingredient_id)
 
-@router.get("/{ingredient_id}/cost_history", response_model=List[CostEntry])
-async def get_cost_history(ingredient_id: int, repository: IngredientRepository = Depends(get_ingredient_repository)):
-    return await repository.get_cost_history(ingredient_id) 
\ No newline at end of file
+@router.get("/{ingredient_id}/cost_history", response_model=Union[List[CostBucket], List[CostEntry]])
+async def get_cost_history(
+    ingredient_id: int,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    vendor: Optional[str] = None,
+    bucket: Optional[CostBucketSize] = None,
+    repository: IngredientRepository = Depends(get_ingredient_repository)
+):
+    # Without bucket: raw entries, newest first. With bucket: min/avg/max/last per period, oldest first
+    start, end = _naive_range(start, end)
+    if bucket is None:
+        return await repository.get_cost_history(ingredient_id, start, end, vendor)
+    series = await repository.get_cost_buckets([ingredient_id], bucket.value, start, end, vendor)
+    return series[ingredient_id]
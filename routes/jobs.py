@@ -0,0 +1,54 @@
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schemas.job import Job as JobSchema, JobCreate, JobStatus
+from database import get_db
+from repositories.job_repository import JobRepository
+from services.jobs import job_runner, FINISHED
+import services.job_handlers  # noqa: F401  (registers the job kinds)
+from metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/jobs", tags=["jobs"], route_class=InstrumentedRoute)
+
+async def get_job_repository(db: AsyncSession = Depends(get_db)) -> JobRepository:
+    return JobRepository(db)
+
+@router.post("", response_model=JobSchema, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(job: JobCreate, repository: JobRepository = Depends(get_job_repository)):
+    # Runs in the background; poll GET /jobs/{id} for progress and the result
+    try:
+        params = job_runner.parse_params(job.kind.value, job.params)
+    except ValidationError as exc:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", "params", *error["loc"])} for error in exc.errors(include_url=False)]
+        )
+    db_job = await repository.create_job(job.kind.value, params.model_dump(mode="json"))
+    job_runner.enqueue(db_job.id)
+    return db_job
+
+@router.get("", response_model=List[JobSchema])
+async def read_jobs(status: Optional[JobStatus] = None, limit: int = Query(50, ge=1, le=500), repository: JobRepository = Depends(get_job_repository)):
+    # Newest first, without results
+    jobs = await repository.get_jobs(status.value if status else None, limit)
+    return [JobSchema.model_validate(job).model_copy(update={"result": None}) for job in jobs]
+
+@router.get("/{job_id}", response_model=JobSchema)
+async def read_job(job_id: int, repository: JobRepository = Depends(get_job_repository)):
+    job = await repository.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/{job_id}/cancel", response_model=JobSchema)
+async def cancel_job(job_id: int, repository: JobRepository = Depends(get_job_repository)):
+    job = await repository.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    job = await repository.request_cancel(job_id)
+    job_runner.interrupt(job_id)
+    return job
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Depends
+
+from schemas.meal_plan import MealPlanRequest, MealPlanEvaluation
+from settings import settings
+from routes.caching import json_response
+from repositories.recipe_repository import RecipeRepository
+from routes.recipe import get_recipe_repository
+from services.meal_plan import UnknownRecipeError
+from metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/meal-plans", tags=["meal-plans"], route_class=InstrumentedRoute)
+
+@router.post("/evaluate", response_model=MealPlanEvaluation)
+async def evaluate_meal_plan(plan: MealPlanRequest, repository: RecipeRepository = Depends(get_recipe_repository)):
+    # Consolidated shopping list at current prices; a recipe listed twice
+    # counts with the sum of its multipliers
+    multipliers = {}
+    for item in plan.recipes:
+        multipliers[item.recipe_id] = multipliers.get(item.recipe_id, 0.0) + item.multiplier
+    try:
+        evaluation = await repository.evaluate_meal_plan(multipliers)
+    except UnknownRecipeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if settings.fast_serialization:
+        return json_response(MealPlanEvaluation, evaluation)
+    return evaluation
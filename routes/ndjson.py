@@ -0,0 +1,89 @@
+import csv
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from schemas.bulk import BulkImportResult, BulkLineError
+
+ChunkWriter = Callable[[List[Tuple[int, BaseModel]]], Awaitable[List[Tuple[int, str]]]]
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    # Yields (line number, line) as the body arrives, without buffering it whole
+    buffer = b""
+    line_number = 0
+    async for data in stream:
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line
+    if buffer:
+        yield line_number + 1, buffer
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    async for line_number, line in iter_lines(stream):
+        if line.strip():
+            yield line_number, line
+
+async def iter_csv(stream: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, dict]]:
+    # The first row names the columns; empty cells are left out so that
+    # optional fields fall back to their defaults
+    header = None
+    async for line_number, line in iter_lines(stream):
+        text = line.decode("utf-8-sig" if header is None else "utf-8").rstrip("\r")
+        if not text.strip():
+            continue
+        cells = next(csv.reader([text]))
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+        yield line_number, {name: value for name, value in zip(header, cells) if value != ""}
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'line'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+async def import_ndjson(stream: AsyncIterator[bytes], model: Type[BaseModel], write_chunk: ChunkWriter, chunk_size: int) -> BulkImportResult:
+    return await import_records(iter_ndjson(stream), model.model_validate_json, write_chunk, chunk_size)
+
+async def import_csv(stream: AsyncIterator[bytes], model: Type[BaseModel], write_chunk: ChunkWriter, chunk_size: int) -> BulkImportResult:
+    return await import_records(iter_csv(stream), model.model_validate, write_chunk, chunk_size)
+
+async def import_records(records: AsyncIterator[Tuple[int, Any]], parse: Callable[[Any], BaseModel], write_chunk: ChunkWriter, chunk_size: int) -> BulkImportResult:
+    # Validates records as they arrive and hands them to write_chunk in
+    # chunks; a record that fails validation is reported and skipped
+    result = BulkImportResult()
+
+    def fail(line: int, error: str) -> None:
+        result.failed += 1
+        result.errors.append(BulkLineError(line=line, error=error))
+
+    async def flush(chunk: List[Tuple[int, BaseModel]]) -> None:
+        try:
+            rejected = await write_chunk(chunk)
+        except SQLAlchemyError as exc:
+            # The chunk's transaction was rolled back, so every line in it failed
+            message = f"Database error: {exc.__class__.__name__}"
+            for line, _ in chunk:
+                fail(line, message)
+            return
+        for line, error in rejected:
+            fail(line, error)
+        result.imported += len(chunk) - len(rejected)
+
+    chunk = []
+    async for line_number, record in records:
+        try:
+            chunk.append((line_number, parse(record)))
+        except ValidationError as exc:
+            fail(line_number, _format_validation_error(exc))
+            continue
+        if len(chunk) >= chunk_size:
+            await flush(chunk)
+            chunk = []
+    if chunk:
+        await flush(chunk)
+    return result
@@ -1,12 +1,18 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas.ingredient import NutrientCreate, Nutrient
+from schemas.bulk import NutrientImport, BulkImportResult
 from database import get_db
+from cache import nutrient_cache
+from routes.pagination import decode_cursor, next_cursor_headers
+from routes.caching import encode_response, conditional_response
+from routes.ndjson import import_ndjson, import_csv
 from repositories.nutrient_repository import NutrientRepository
+from metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/nutrients", tags=["nutrients"])
+router = APIRouter(prefix="/nutrients", tags=["nutrients"], route_class=InstrumentedRoute)
 
 async def get_nutrient_repository(db: AsyncSession = Depends(get_db)) -> NutrientRepository:
     return NutrientRepository(db)
@@ -15,16 +21,34 @@ async def get_nutrient_repository(db: AsyncSession = Depends(get_db)) -> Nutrien
 async def create_nutrient(nutrient: NutrientCreate, repository: NutrientRepository = Depends(get_nutrient_repository)):
     return await repository.create_nutrient(nutrient)
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_load_nutrients(request: Request, chunk_size: int = Query(5000, ge=1, le=50000), repository: NutrientRepository = Depends(get_nutrient_repository)):
+    # NDJSON, or CSV with a header row when sent as text/csv. Each line is a
+    # NutrientImport; each chunk is upserted and committed on its own
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        return await import_csv(request.stream(), NutrientImport, repository.bulk_upsert, chunk_size)
+    return await import_ndjson(request.stream(), NutrientImport, repository.bulk_upsert, chunk_size)
+
 @router.get("/", response_model=List[Nutrient])
-async def read_nutrients(skip: int = 0, limit: int = 100, repository: NutrientRepository = Depends(get_nutrient_repository)):
-    return await repository.get_nutrients(skip, limit)
+async def read_nutrients(request: Request, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, repository: NutrientRepository = Depends(get_nutrient_repository)):
+    key = ("list", skip, limit, cursor)
+    cached = nutrient_cache.get(key)
+    if cached is None:
+        generation = nutrient_cache.generation(key)
+        items = await repository.get_nutrients(skip, limit, after_id=decode_cursor(cursor))
+        cached = nutrient_cache.set(key, encode_response(List[Nutrient], items, next_cursor_headers(items, limit)), generation)
+    return conditional_response(request, cached)
 
 @router.get("/{nutrient_id}", response_model=Nutrient)
-async def read_nutrient(nutrient_id: int, repository: NutrientRepository = Depends(get_nutrient_repository)):
-    nutrient = await repository.get_nutrient(nutrient_id)
-    if not nutrient:
-        raise HTTPException(status_code=404, detail="Nutrient not found")
-    return nutrient
+async def read_nutrient(nutrient_id: int, request: Request, repository: NutrientRepository = Depends(get_nutrient_repository)):
+    cached = nutrient_cache.get(nutrient_id)
+    if cached is None:
+        generation = nutrient_cache.generation(nutrient_id)
+        nutrient = await repository.get_nutrient(nutrient_id)
+        if not nutrient:
+            raise HTTPException(status_code=404, detail="Nutrient not found")
+        cached = nutrient_cache.set(nutrient_id, encode_response(Nutrient, nutrient), generation)
+    return conditional_response(request, cached)
 
 @router.delete("/{nutrient_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_nutrient(nutrient_id: int, repository: NutrientRepository = Depends(get_nutrient_repository)):
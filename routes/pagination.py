@@ -0,0 +1,33 @@
+import base64
+import json
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(last_id: int) -> str:
+    payload = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded))["after"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(after, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after
+
+def next_cursor_headers(items: list, limit: int) -> Dict[str, str]:
+    # A full page means there may be more rows after the last id we returned
+    if items and len(items) >= limit:
+        last = items[-1]
+        return {NEXT_CURSOR_HEADER: encode_cursor(last["id"] if isinstance(last, dict) else last.id)}
+    return {}
+
+def set_next_cursor(response: Response, items: list, limit: int) -> None:
+    response.headers.update(next_cursor_headers(items, limit))
@@ -0,0 +1,22 @@
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+def parse_id_list(ids: str, max_ids: int = 500) -> List[int]:
+    # "1,2,3" -> [1, 2, 3], keeping order and dropping duplicates
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+    if len(parsed) > max_ids:
+        raise HTTPException(status_code=400, detail=f"At most {max_ids} ids per request")
+    return parsed
+
+def in_request_order(items: list, ids: Optional[List[int]]) -> list:
+    # Batch reads come back in id order; return them in the order asked for
+    if ids is None:
+        return items
+    position = {item_id: index for index, item_id in enumerate(ids)}
+    return sorted(items, key=lambda item: position[item["id"] if isinstance(item, dict) else item.id])
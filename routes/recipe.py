@@ -1,12 +1,22 @@
-from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Response, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from schemas import RecipeCreate, Recipe as RecipeSchema
-from database import get_db
-from repositories.recipe_repository import RecipeRepository
+from schemas import RecipeCreate, Recipe as RecipeSchema, RecipeSummary, RecipeSummaryRequest
+from schemas.recipe import RepriceRequest, RepriceResult, RecipeUpdate, RecipePatch
+from schemas.bulk import BulkImportResult
+from database import get_db, ReadSessionLocal
+from cache import recipe_cache, recipe_loads, CachedResponse
+from settings import settings
+from routes.pagination import decode_cursor, set_next_cursor, next_cursor_headers
+from routes.caching import encode_response, encode_rows, json_response, conditional_response
+from routes.ndjson import import_ndjson
+from routes.params import parse_id_list, in_request_order
+from repositories.recipe_repository import RecipeRepository, InvalidRecipeChange
+from services.reprice import UnknownIngredientError
+from metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/recipes", tags=["recipes"])
+router = APIRouter(prefix="/recipes", tags=["recipes"], route_class=InstrumentedRoute)
 
 async def get_recipe_repository(db: AsyncSession = Depends(get_db)) -> RecipeRepository:
     return RecipeRepository(db)
@@ -15,20 +25,88 @@ async def get_recipe_repository(db: AsyncSession = Depends(get_db)) -> RecipeRep
 async def create_recipe(recipe: RecipeCreate, repository: RecipeRepository = Depends(get_recipe_repository)):
     return await repository.create_recipe(recipe)
 
+@router.post("/bulk", response_model=BulkImportResult)
+async def bulk_import_recipes(request: Request, chunk_size: int = Query(1000, ge=1, le=50000), repository: RecipeRepository = Depends(get_recipe_repository)):
+    # NDJSON body, one RecipeCreate per line; each chunk commits on its own
+    return await import_ndjson(request.stream(), RecipeCreate, repository.bulk_create_recipes, chunk_size)
+
 @router.get("/", response_model=List[RecipeSchema])
-async def read_recipes(skip: int = 0, limit: int = 100, repository: RecipeRepository = Depends(get_recipe_repository)):
-    return await repository.get_recipes(skip, limit)
+async def read_recipes(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, include_history: bool = True, ids: Optional[str] = None, repository: RecipeRepository = Depends(get_recipe_repository)):
+    # ids=1,2,3 fetches those recipes, in that order, instead of a page
+    id_list = parse_id_list(ids) if ids else None
+    if settings.fast_serialization:
+        rows = await repository.get_recipe_rows(skip, limit, after_id=decode_cursor(cursor), include_history=include_history, ids=id_list)
+        headers = next_cursor_headers(rows, limit) if id_list is None else None
+        return json_response(List[RecipeSchema], in_request_order(rows, id_list), headers)
+    items = await repository.get_recipes(skip, limit, after_id=decode_cursor(cursor), include_history=include_history, ids=id_list)
+    if id_list is None:
+        set_next_cursor(response, items, limit)
+    return in_request_order(items, id_list)
+
+@router.post("/summaries", response_model=List[RecipeSummary])
+async def read_recipe_summaries(request: RecipeSummaryRequest, repository: RecipeRepository = Depends(get_recipe_repository)):
+    return await repository.get_summaries(request.recipe_ids)
+
+@router.post("/reprice", response_model=RepriceResult)
+async def reprice_recipes(request: RepriceRequest, repository: RecipeRepository = Depends(get_recipe_repository)):
+    # Hypothetical price changes; returns every recipe that uses a changed price
+    try:
+        recipes = await repository.reprice(request.changes)
+    except UnknownIngredientError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"total_delta": sum(recipe["delta"] for recipe in recipes), "recipes": recipes}
+
+async def _load_recipe(recipe_id: int, generation: tuple) -> Optional[CachedResponse]:
+    async with ReadSessionLocal() as session:
+        repository = RecipeRepository(session)
+        if settings.fast_serialization:
+            recipe = await repository.get_recipe_row(recipe_id)
+        else:
+            recipe = await repository.get_recipe(recipe_id)
+        if not recipe:
+            return None
+        encode = encode_rows if settings.fast_serialization else encode_response
+        return recipe_cache.set(recipe_id, encode(RecipeSchema, recipe), generation)
 
 @router.get("/{recipe_id}", response_model=RecipeSchema)
-async def read_recipe(recipe_id: int, repository: RecipeRepository = Depends(get_recipe_repository)):
-    recipe = await repository.get_recipe(recipe_id)
-    if not recipe:
+async def read_recipe(recipe_id: int, request: Request):
+    cached = recipe_cache.get(recipe_id)
+    if cached is None:
+        # Concurrent misses for the same recipe share a single load. The
+        # generation is taken before reading: a write committed meanwhile
+        # keeps the body out of the cache, and later misses start a new load.
+        generation = recipe_cache.generation(recipe_id)
+        cached = await recipe_loads.do((recipe_id, generation), lambda: _load_recipe(recipe_id, generation))
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return conditional_response(request, cached)
+
+@router.get("/{recipe_id}/summary", response_model=RecipeSummary)
+async def read_recipe_summary(recipe_id: int, repository: RecipeRepository = Depends(get_recipe_repository)):
+    summaries = await repository.get_summaries([recipe_id])
+    if not summaries:
         raise HTTPException(status_code=404, detail="Recipe not found")
-    return recipe
+    return summaries[0]
 
 @router.put("/{recipe_id}", response_model=RecipeSchema)
-async def update_recipe(recipe_id: int, recipe: RecipeCreate, repository: RecipeRepository = Depends(get_recipe_repository)):
-    updated_recipe = await repository.update_recipe(recipe_id, recipe)
+async def update_recipe(recipe_id: int, recipe: RecipeUpdate, repository: RecipeRepository = Depends(get_recipe_repository)):
+    # Ingredients are matched to the existing ones by id, then by name; only
+    # the differences are written and existing cost history is kept
+    try:
+        updated_recipe = await repository.update_recipe(recipe_id, recipe)
+    except InvalidRecipeChange as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not updated_recipe:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return updated_recipe
+
+@router.patch("/{recipe_id}", response_model=RecipeSchema)
+async def patch_recipe(recipe_id: int, recipe: RecipePatch, repository: RecipeRepository = Depends(get_recipe_repository)):
+    # Changes only what is sent; ingredients not mentioned are kept
+    try:
+        updated_recipe = await repository.patch_recipe(recipe_id, recipe)
+    except InvalidRecipeChange as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
     if not updated_recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return updated_recipe
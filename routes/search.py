@@ -0,0 +1,26 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schemas.search import SearchHit, SearchKind
+from database import get_db
+from repositories.search_repository import SearchRepository, CANDIDATE_LIMIT
+from metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/search", tags=["search"], route_class=InstrumentedRoute)
+
+async def get_search_repository(db: AsyncSession = Depends(get_db)) -> SearchRepository:
+    return SearchRepository(db)
+
+@router.get("", response_model=List[SearchHit])
+async def search(
+    q: str = Query(min_length=1, max_length=100),
+    type: Optional[List[SearchKind]] = Query(None),
+    skip: int = Query(0, ge=0, lt=CANDIDATE_LIMIT),
+    limit: int = Query(20, ge=1, le=100),
+    repository: SearchRepository = Depends(get_search_repository)
+):
+    # Name search across recipes, ingredients and nutrients; repeat type= to
+    # narrow it. Queries under three characters only match name prefixes.
+    kinds = [kind.value for kind in type] if type else [kind.value for kind in SearchKind]
+    return await repository.search(q, kinds, skip, limit)
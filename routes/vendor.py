@@ -0,0 +1,24 @@
+from typing import List
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from schemas.vendor import CheapestPrice, RecipeCheapestCost
+from database import get_db
+from routes.params import parse_id_list
+from repositories.vendor_repository import VendorRepository
+from metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/vendors", tags=["vendors"], route_class=InstrumentedRoute)
+
+async def get_vendor_repository(db: AsyncSession = Depends(get_db)) -> VendorRepository:
+    return VendorRepository(db)
+
+@router.get("/cheapest", response_model=List[CheapestPrice])
+async def read_cheapest(ingredient_ids: str, repository: VendorRepository = Depends(get_vendor_repository)):
+    # Cheapest vendor per ingredient; ingredients without vendor prices are left out
+    return await repository.get_cheapest(parse_id_list(ingredient_ids))
+
+@router.get("/cheapest/recipes", response_model=List[RecipeCheapestCost])
+async def read_cheapest_recipes(recipe_ids: str, repository: VendorRepository = Depends(get_vendor_repository)):
+    # Lowest achievable cost per recipe with every ingredient bought from its cheapest vendor
+    return await repository.get_cheapest_recipes(parse_id_list(recipe_ids))
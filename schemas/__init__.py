@@ -1,4 +1,4 @@
-from schemas.recipe import Recipe, RecipeCreate, RecipeBase
+from schemas.recipe import Recipe, RecipeCreate, RecipeBase, RecipeSummary, RecipeSummaryRequest
 from schemas.ingredient import Ingredient, IngredientCreate, IngredientBase
 
-__all__ = ["Recipe", "RecipeCreate", "RecipeBase", "Ingredient", "IngredientCreate", "IngredientBase"] 
\ No newline at end of file
+__all__ = ["Recipe", "RecipeCreate", "RecipeBase", "RecipeSummary", "RecipeSummaryRequest", "Ingredient", "IngredientCreate", "IngredientBase"]
\ No newline at end of file
@@ -0,0 +1,35 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+from schemas.ingredient import IngredientCreate
+
+
+class IngredientImport(IngredientCreate):
+    recipe_id: int
+
+
+class NutrientImport(BaseModel):
+    # One line of a nutrient catalog load: a nutrient, upserted by name, and
+    # optionally its per-100g amount in one ingredient. unit may be left out
+    # for nutrients that already exist.
+    name: str = Field(min_length=1)
+    unit: Optional[str] = None
+    ingredient_id: Optional[int] = None
+    amount: Optional[float] = Field(None, gt=0)
+
+    @model_validator(mode="after")
+    def check_amount(self) -> "NutrientImport":
+        if (self.ingredient_id is None) != (self.amount is None):
+            raise ValueError("ingredient_id and amount go together")
+        return self
+
+
+class BulkLineError(BaseModel):
+    line: int
+    error: str
+
+
+class BulkImportResult(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[BulkLineError] = []
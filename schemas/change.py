@@ -0,0 +1,23 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+
+
+class EntityType(str, Enum):
+    recipe = "recipe"
+    ingredient = "ingredient"
+    nutrient = "nutrient"
+
+
+class EntityChange(BaseModel):
+    type: EntityType
+    id: int
+    version: int
+    deleted: bool
+    data: Optional[Dict[str, Any]] = None  # Current representation, with payloads=true
+
+
+class ChangeFeed(BaseModel):
+    version: int  # Pass as since= on the next call
+    has_more: bool
+    changes: List[EntityChange] = []
@@ -1,6 +1,14 @@
 from typing import Dict, Optional, List
-from pydantic import BaseModel, Field
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import date, datetime
+from enum import Enum
+
+
+def to_naive_local(value: datetime) -> datetime:
+    # Stored dates are naive local time, like datetime.now()
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
 
 
 class CostEntry(BaseModel):
@@ -9,6 +17,39 @@ class CostEntry(BaseModel):
     vendor: Optional[str] = None
     notes: Optional[str] = None
 
+    @field_validator("date")
+    @classmethod
+    def naive_local_date(cls, value: datetime) -> datetime:
+        return to_naive_local(value)
+
+
+class CostEntryAck(BaseModel):
+    # Response to POST /ingredients/{id}/cost with "Prefer: return=minimal"
+    ingredient_id: int
+    cost: float
+    date: datetime
+    current: bool  # Whether this entry is now the ingredient's current price
+
+
+class CostBucketSize(str, Enum):
+    day = "day"
+    week = "week"  # ISO weeks, starting on Monday
+    month = "month"
+
+
+class CostBucket(BaseModel):
+    start: date
+    min: float
+    avg: float
+    max: float
+    last: float  # Latest cost within the bucket
+    count: int
+
+
+class IngredientCostSeries(BaseModel):
+    ingredient_id: int
+    buckets: List[CostBucket] = []
+
 
 class NutrientBase(BaseModel):
     name: str
@@ -40,19 +81,52 @@ class IngredientCreate(IngredientBase):
     nutrients: List[IngredientNutrient] = []
     
 
+class IngredientUpdate(IngredientCreate):
+    id: Optional[int] = None  # Existing ingredient of the recipe to update
+
+
+class IngredientPatch(BaseModel):
+    # Matched to an existing ingredient by id, else by name; unmatched ones
+    # are added and need weight and cost
+    id: Optional[int] = None
+    name: Optional[str] = None
+    weight: Optional[float] = Field(None, gt=0)
+    cost: Optional[float] = Field(None, ge=0)
+    cost_entries: Optional[List[CostEntry]] = None  # Entries already in the history are skipped
+    nutrients: Optional[List[IngredientNutrient]] = None  # Replaces the current nutrients
+
+    @model_validator(mode="after")
+    def check_match(self) -> "IngredientPatch":
+        if self.id is None and self.name is None:
+            raise ValueError("Set id or name")
+        return self
+
+
 class Ingredient(IngredientBase):
     id: int
     recipe_id: Optional[int] = None
+    cost: float = 0.0  # Latest cost, maintained on write
     cost_entries: List[CostEntry] = []
     nutrients: List[IngredientNutrient] = []
-    
-    @property
-    def cost(self) -> float:
-        if not self.cost_entries:
-            return 0.0
-        return sorted(self.cost_entries, key=lambda x: x.date, reverse=True)[0].cost
 
     model_config = {
         "from_attributes": True,
         "populate_by_name": True
-    }
\ No newline at end of file
+    }
+
+
+class SimilarIngredient(BaseModel):
+    id: int
+    name: str
+    recipe_id: Optional[int] = None
+    similarity: float  # Cosine similarity of the nutrient profiles, 1.0 is identical
+
+
+class NutrientAmount(BaseModel):
+    nutrient_id: int
+    amount: float = Field(ge=0)  # Amount per 100g
+
+
+class NutrientProfileQuery(BaseModel):
+    nutrients: List[NutrientAmount] = Field(min_length=1)
+    limit: int = Field(10, ge=1, le=100)
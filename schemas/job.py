@@ -0,0 +1,69 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+from schemas.recipe import RecipeCreate
+from schemas.bulk import IngredientImport
+from schemas.ingredient import CostBucketSize
+from settings import settings
+
+
+class JobKind(str, Enum):
+    import_recipes = "import_recipes"
+    import_ingredients = "import_ingredients"
+    reprice = "reprice"
+    recompute_costs = "recompute_costs"  # current_cost and vendor prices from the full history
+    compact_costs = "compact_costs"  # Cost history compaction, also run on a schedule
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+    cancelled = "cancelled"
+
+
+class JobCreate(BaseModel):
+    kind: JobKind
+    params: Dict[str, Any] = {}  # Validated against the kind's params model
+
+
+class RecipeImportParams(BaseModel):
+    recipes: List[RecipeCreate] = Field(min_length=1)
+    chunk_size: int = Field(1000, ge=1, le=50000)
+
+
+class IngredientImportParams(BaseModel):
+    ingredients: List[IngredientImport] = Field(min_length=1)
+    chunk_size: int = Field(1000, ge=1, le=50000)
+
+
+class RecomputeCostsParams(BaseModel):
+    chunk_size: int = Field(500, ge=1, le=500)
+
+
+class CompactCostsParams(BaseModel):
+    horizon_days: int = Field(settings.cost_history_horizon_days, ge=0)
+    period: CostBucketSize = CostBucketSize(settings.cost_compaction_period)
+    chunk_size: int = Field(500, ge=1, le=500)
+    vacuum: bool = False  # Return freed space to the filesystem afterwards
+
+
+class Job(BaseModel):
+    id: int
+    kind: JobKind
+    status: JobStatus
+    done: int = 0
+    total: Optional[int] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
@@ -0,0 +1,35 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+from schemas.recipe import NutrientTotal
+
+
+class MealPlanItem(BaseModel):
+    recipe_id: int
+    multiplier: float = Field(1.0, gt=0)  # Servings relative to the recipe as stored
+
+
+class MealPlanRequest(BaseModel):
+    recipes: List[MealPlanItem] = Field(min_length=1, max_length=5000)
+
+
+class PlannedRecipe(BaseModel):
+    id: int
+    name: str
+    multiplier: float
+    cost: float  # Scaled by the multiplier
+
+
+class ShoppingListItem(BaseModel):
+    name: str
+    weight: float
+    cost: float
+    ingredient_ids: List[int] = []  # Ingredient rows merged into this line
+
+
+class MealPlanEvaluation(BaseModel):
+    total_cost: float
+    total_weight: float
+    recipes: List[PlannedRecipe] = []
+    shopping_list: List[ShoppingListItem] = []
+    nutrients: List[NutrientTotal] = []
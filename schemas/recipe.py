@@ -1,7 +1,7 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
-from schemas.ingredient import Ingredient, IngredientCreate
+from schemas.ingredient import Ingredient, IngredientCreate, IngredientUpdate, IngredientPatch
 
 
 class RecipeBase(BaseModel):
@@ -12,6 +12,18 @@ class RecipeCreate(RecipeBase):
     ingredients: Optional[List[IngredientCreate]] = []
 
 
+class RecipeUpdate(RecipeBase):
+    # Full replacement; existing ingredients are matched by id, then by name,
+    # and the ones left unmatched are removed
+    ingredients: Optional[List[IngredientUpdate]] = []
+
+
+class RecipePatch(BaseModel):
+    name: Optional[str] = None
+    ingredients: List[IngredientPatch] = []  # Changed or added; the rest are kept
+    remove_ingredient_ids: List[int] = []
+
+
 class Recipe(RecipeBase):
     id: int
     ingredients: List[Ingredient] = []
@@ -19,4 +31,62 @@ class Recipe(RecipeBase):
     model_config = {
         "from_attributes": True,
         "populate_by_name": True
-    } 
\ No newline at end of file
+    } 
+
+class IngredientCostSummary(BaseModel):
+    id: int
+    name: str
+    weight: float
+    cost: float
+
+
+class NutrientTotal(BaseModel):
+    nutrient_id: int
+    name: str
+    unit: str
+    amount: float  # Total for the whole recipe, scaled by ingredient weight
+
+
+class RecipeSummary(BaseModel):
+    id: int
+    name: str
+    total_cost: float
+    ingredients: List[IngredientCostSummary] = []
+    nutrients: List[NutrientTotal] = []
+
+
+class RecipeSummaryRequest(BaseModel):
+    recipe_ids: List[int] = Field(min_length=1, max_length=1000)
+
+
+class PriceChange(BaseModel):
+    ingredient_id: Optional[int] = None
+    vendor: Optional[str] = None  # Ingredients whose current price came from this vendor
+    cost: Optional[float] = Field(None, ge=0)  # New cost
+    percent: Optional[float] = Field(None, ge=-100)  # Relative change, 10 means +10%
+
+    @model_validator(mode="after")
+    def check_target_and_change(self) -> "PriceChange":
+        if (self.ingredient_id is None) == (self.vendor is None):
+            raise ValueError("Set exactly one of ingredient_id or vendor")
+        if (self.cost is None) == (self.percent is None):
+            raise ValueError("Set exactly one of cost or percent")
+        if self.vendor is not None and self.cost is not None:
+            raise ValueError("Vendor-wide changes must use percent")
+        return self
+
+
+class RepriceRequest(BaseModel):
+    changes: List[PriceChange] = Field(min_length=1, max_length=10000)
+
+
+class RecipeRepricing(BaseModel):
+    id: int
+    old_cost: float
+    new_cost: float
+    delta: float
+
+
+class RepriceResult(BaseModel):
+    total_delta: float
+    recipes: List[RecipeRepricing] = []
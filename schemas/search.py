@@ -0,0 +1,23 @@
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+
+
+class SearchKind(str, Enum):
+    recipe = "recipe"
+    ingredient = "ingredient"
+    nutrient = "nutrient"
+
+
+class SearchMatch(str, Enum):
+    prefix = "prefix"
+    substring = "substring"
+    fuzzy = "fuzzy"  # Within one typo
+
+
+class SearchHit(BaseModel):
+    type: SearchKind
+    id: int
+    name: str
+    recipe_id: Optional[int] = None  # Set for ingredients
+    match: SearchMatch
@@ -0,0 +1,29 @@
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+
+
+class VendorPrice(BaseModel):
+    vendor: str
+    cost: float
+    date: datetime  # Of the vendor's latest cost entry
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CheapestPrice(VendorPrice):
+    ingredient_id: int
+
+
+class IngredientChoice(BaseModel):
+    ingredient_id: int
+    vendor: Optional[str] = None  # None: no vendor beats the current price
+    cost: float
+
+
+class RecipeCheapestCost(BaseModel):
+    recipe_id: int
+    current_cost: float
+    lowest_cost: float
+    savings: float
+    ingredients: List[IngredientChoice]
@@ -0,0 +1,101 @@
+"""Production entry point: bootstrap once, then serve with several workers.
+
+    python serve.py [--workers N] [--host 0.0.0.0] [--port 8080] [--no-warm]
+
+The schema bootstrap runs once, before any worker starts. It covers tables,
+search indexes, the vendor price backfill and the change feed numbering.
+Workers skip it in their lifespan, so they don't race on DDL. With warming
+on (the default), the nutrient matrix is also built once and handed to the
+workers as a snapshot file. Each worker also opens its pool connections
+before it takes requests. main.py remains the single-process
+development server.
+
+Every worker holds its own copy of the matrix, so its memory is multiplied
+by the worker count; the size is printed at startup. Metrics are shared
+through a temporary METRICS_DIR, so /metrics sums all workers.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, help="Defaults to WEB_WORKERS, or one per CPU core")
+    parser.add_argument("--no-warm", action="store_true", help="Start workers cold")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--prepare", metavar="SNAPSHOT", help=argparse.SUPPRESS)
+    parser.add_argument("--prepare-workers", type=int, default=1, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+async def prepare(snapshot: Optional[str], workers: int) -> None:
+    # Runs in its own process so the server process imports the app only
+    # after the worker settings below are in the environment
+    from bootstrap import prepare_database
+    from database import engine, read_engine, ReadSessionLocal
+    from services.nutrient_matrix import nutrient_matrix
+
+    started = time.perf_counter()
+    await prepare_database(engine)
+    print(f"Schema ready in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    if snapshot:
+        started = time.perf_counter()
+        async with ReadSessionLocal() as session:
+            await nutrient_matrix.ensure_current(session)
+        nutrient_matrix.save(snapshot)
+        print(f"Nutrient matrix snapshot written in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+        size = nutrient_matrix.nbytes / 2 ** 20
+        # A background rebuild briefly holds a second copy in each worker
+        print(
+            f"Nutrient matrix: {size:.0f} MB per worker, {size * workers:.0f} MB for {workers} workers "
+            f"(up to twice that while rebuilding)", file=sys.stderr
+        )
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
+
+
+def main(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    workers = args.workers or int(os.getenv("WEB_WORKERS", "0")) or os.cpu_count() or 1
+    snapshot = None
+    if not args.no_warm:
+        handle, snapshot = tempfile.mkstemp(prefix="nutricost-matrix-", suffix=".pickle")
+        os.close(handle)
+    # A fresh directory per run, unless one is configured
+    metrics_dir = None if os.getenv("METRICS_DIR") else tempfile.mkdtemp(prefix="nutricost-metrics-")
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--prepare", snapshot or "", "--prepare-workers", str(workers)],
+            check=True
+        )
+        os.environ["BOOTSTRAP_SCHEMA"] = "false"
+        os.environ["WARM_START"] = "false" if args.no_warm else "true"
+        if snapshot:
+            os.environ["NUTRIENT_MATRIX_SNAPSHOT"] = snapshot
+        if metrics_dir:
+            os.environ["METRICS_DIR"] = metrics_dir
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=workers, log_level=args.log_level)
+    finally:
+        if snapshot and os.path.exists(snapshot):
+            os.remove(snapshot)
+        if metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.prepare is not None:
+        asyncio.run(prepare(arguments.prepare or None, arguments.prepare_workers))
+    else:
+        main(arguments)
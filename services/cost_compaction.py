@@ -0,0 +1,52 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from database import SessionLocal
+from models.ingredient import Ingredient
+from repositories.ingredient_repository import IngredientRepository
+
+logger = logging.getLogger("nutricost.cost_compaction")
+
+# progress(done, total)
+Progress = Callable[[int, Optional[int]], Awaitable[None]]
+
+
+async def compact_costs(horizon_days: int, period: str, chunk_size: int = 500, progress: Optional[Progress] = None) -> dict:
+    """Compact the cost history of every ingredient, chunk by chunk.
+
+    Each chunk is its own transaction, so writers get the lock in between
+    and an interrupted run leaves the chunks done so far compacted.
+    """
+    cutoff = datetime.now() - timedelta(days=horizon_days)
+    totals = {"ingredients": 0, "repeats_removed": 0, "rolled_up": 0, "aggregates": 0}
+    async with SessionLocal() as session:
+        ingredient_ids = list((await session.execute(select(Ingredient.id).order_by(Ingredient.id))).scalars())
+        await session.commit()
+        if progress:
+            await progress(0, len(ingredient_ids))
+        for start in range(0, len(ingredient_ids), chunk_size):
+            chunk = ingredient_ids[start:start + chunk_size]
+            result = await IngredientRepository(session).compact_cost_history(chunk, cutoff, period)
+            for key, value in result.items():
+                totals[key] += value
+            if progress:
+                await progress(start + len(chunk), None)
+    logger.info("Compacted cost history before %s: %s", cutoff, totals)
+    return totals
+
+
+async def reclaim_space(engine: AsyncEngine) -> None:
+    # Deleted rows leave free pages that new rows reuse; this hands them
+    # back to the filesystem. VACUUM can't run inside a transaction, and on
+    # SQLite it rewrites the whole file while holding the write lock.
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        if engine.dialect.name == "sqlite":
+            await connection.exec_driver_sql("VACUUM")
+            await connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+        else:
+            await connection.exec_driver_sql("VACUUM ANALYZE cost_entries")
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from database import SessionLocal
+from repositories.ingredient_repository import IngredientRepository
+from schemas.ingredient import CostEntry
+from settings import settings
+
+logger = logging.getLogger("nutricost.cost_ingest")
+
+
+class CostBatcher:
+    """Group commit for cost entries.
+
+    Concurrent callers' entries are written together in one transaction and
+    each caller resumes once the transaction holding its entry committed, so
+    an acknowledgement still means the entry is durable. While one batch is
+    being written the next one fills up, and with a single writer per process
+    SQLite writers no longer queue on the database lock.
+    """
+
+    def __init__(self, max_batch: int, max_delay: float):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._buffer: List[Tuple[int, CostEntry, asyncio.Future]] = []
+        self._full: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    async def add(self, ingredient_id: int, entry: CostEntry) -> Optional[bool]:
+        # None if the ingredient doesn't exist, else whether the entry is now
+        # its current price
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((ingredient_id, entry, future))
+        if self._writer is None:
+            self._full = asyncio.Event()
+            self._writer = asyncio.create_task(self._write_batches())
+        elif len(self._buffer) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _write_batches(self) -> None:
+        batch: List[Tuple[int, CostEntry, asyncio.Future]] = []
+        try:
+            while self._buffer:
+                if self.max_delay > 0 and len(self._buffer) < self.max_batch:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.max_delay)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    # Let requests arriving in the same tick join the batch
+                    await asyncio.sleep(0)
+                self._full.clear()
+                batch, self._buffer = self._buffer[:self.max_batch], self._buffer[self.max_batch:]
+                await self._write(batch)
+                batch = []
+        finally:
+            # Cancelled (e.g. at shutdown): callers still waiting would hang
+            self._writer = None
+            pending, self._buffer = batch + self._buffer, []
+            for _, _, future in pending:
+                if not future.done():
+                    future.set_exception(RuntimeError("Cost writer stopped before the entry was acknowledged"))
+
+    async def _write(self, batch: List[Tuple[int, CostEntry, asyncio.Future]]) -> None:
+        try:
+            async with SessionLocal() as session:
+                results = await IngredientRepository(session).add_cost_entries(
+                    [(ingredient_id, entry) for ingredient_id, entry, _ in batch]
+                )
+        except Exception as exc:
+            if len(batch) > 1:
+                # The transaction rolled back; write the entries one by one so
+                # only the ones that fail on their own are rejected
+                logger.warning("Writing %d cost entries failed, retrying them one by one: %s", len(batch), exc)
+                for item in batch:
+                    await self._write([item])
+                return
+            logger.warning("Writing cost entry for ingredient %d failed: %s", batch[0][0], exc)
+            if not batch[0][2].done():
+                batch[0][2].set_exception(exc)
+            return
+        for (_, _, future), result in zip(batch, results):
+            # A caller that went away (cancelled future) still had its entry written
+            if not future.done():
+                future.set_result(result)
+
+cost_batcher = CostBatcher(settings.cost_batch_size, settings.cost_batch_max_delay)
@@ -0,0 +1,82 @@
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import SessionLocal, engine
+from models.ingredient import Ingredient
+from schemas.job import JobKind, RecipeImportParams, IngredientImportParams, RecomputeCostsParams, CompactCostsParams
+from schemas.recipe import RepriceRequest, RepriceResult
+from schemas.bulk import BulkImportResult, BulkLineError
+from repositories.recipe_repository import RecipeRepository
+from repositories.ingredient_repository import IngredientRepository
+from repositories.vendor_repository import VendorRepository
+from services.cost_compaction import compact_costs as compact_cost_history, reclaim_space
+from services.jobs import job_runner, JobContext
+from settings import settings
+
+# Each handler opens its own sessions and commits in chunks, so interactive
+# writes can take the write lock between chunks
+
+
+async def _import(items: list, chunk_size: int, write_chunk, context: JobContext) -> dict:
+    # Same per-chunk transactions as the NDJSON endpoints; "line" is the
+    # 1-based position in the submitted list
+    result = BulkImportResult()
+    await context.progress(0, len(items))
+    for start in range(0, len(items), chunk_size):
+        chunk = list(enumerate(items[start:start + chunk_size], start + 1))
+        try:
+            rejected = await write_chunk(chunk)
+        except SQLAlchemyError as exc:
+            # The chunk's transaction was rolled back, so every item in it failed
+            rejected = [(line, f"Database error: {exc.__class__.__name__}") for line, _ in chunk]
+        result.failed += len(rejected)
+        result.imported += len(chunk) - len(rejected)
+        result.errors.extend(BulkLineError(line=line, error=error) for line, error in rejected)
+        await context.progress(start + len(chunk))
+    return result.model_dump(mode="json")
+
+
+@job_runner.handler(JobKind.import_recipes.value, RecipeImportParams)
+async def import_recipes(params: RecipeImportParams, context: JobContext) -> dict:
+    async with SessionLocal() as session:
+        return await _import(params.recipes, params.chunk_size, RecipeRepository(session).bulk_create_recipes, context)
+
+
+@job_runner.handler(JobKind.import_ingredients.value, IngredientImportParams)
+async def import_ingredients(params: IngredientImportParams, context: JobContext) -> dict:
+    async with SessionLocal() as session:
+        return await _import(params.ingredients, params.chunk_size, IngredientRepository(session).bulk_create_ingredients, context)
+
+
+@job_runner.handler(JobKind.reprice.value, RepriceRequest)
+async def reprice(params: RepriceRequest, context: JobContext) -> dict:
+    async with SessionLocal() as session:
+        recipes = await RecipeRepository(session).reprice(params.changes)
+    result = RepriceResult(total_delta=sum(recipe["delta"] for recipe in recipes), recipes=recipes)
+    return result.model_dump(mode="json")
+
+
+@job_runner.handler(JobKind.recompute_costs.value, RecomputeCostsParams)
+async def recompute_costs(params: RecomputeCostsParams, context: JobContext) -> dict:
+    async with SessionLocal() as session:
+        ingredient_ids = list((await session.execute(select(Ingredient.id).order_by(Ingredient.id))).scalars())
+        await context.progress(0, len(ingredient_ids))
+        for start in range(0, len(ingredient_ids), params.chunk_size):
+            chunk = ingredient_ids[start:start + params.chunk_size]
+            await VendorRepository(session).refresh_prices(chunk)
+            # Commits the chunk
+            await IngredientRepository(session).refresh_current_cost(chunk)
+            await context.progress(start + len(chunk))
+    return {"ingredients": len(ingredient_ids)}
+
+
+@job_runner.handler(JobKind.compact_costs.value, CompactCostsParams)
+async def compact_costs(params: CompactCostsParams, context: JobContext) -> dict:
+    result = await compact_cost_history(params.horizon_days, params.period.value, params.chunk_size, context.progress)
+    if params.vacuum:
+        await reclaim_space(engine)
+    return result
+
+
+if settings.cost_compaction_interval > 0:
+    job_runner.schedule(JobKind.compact_costs.value, settings.cost_compaction_interval)
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import JSON, insert, literal, select, update
+
+from database import SessionLocal
+from models.job import Job
+from settings import settings
+
+logger = logging.getLogger("nutricost.jobs")
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    """Handed to a running job for reporting progress.
+
+    Every report is also the point where a cancellation requested from
+    another process is noticed, so long jobs should report regularly.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+
+    async def progress(self, done: int, total: Optional[int] = None) -> None:
+        values = {"done": done, "updated_at": datetime.now()}
+        if total is not None:
+            values["total"] = total
+        async with SessionLocal() as session:
+            result = await session.execute(
+                update(Job).where(Job.id == self.job_id).values(**values).returning(Job.cancel_requested)
+            )
+            cancel_requested = result.scalar_one_or_none()
+            await session.commit()
+        if cancel_requested:
+            raise JobCancelled()
+
+
+# handler(params, context) -> JSON-serializable result
+JobHandler = Callable[[BaseModel, JobContext], Awaitable[Any]]
+
+
+class JobRunner:
+    """Runs queued jobs on a fixed number of worker tasks per process.
+
+    The jobs table is the queue: submissions are inserted as queued and a
+    worker claims one with a conditional UPDATE, so with several processes
+    each job still runs once. Jobs queued by other processes are picked up
+    by polling. Scheduled kinds are queued from the poller too.
+    """
+
+    def __init__(self, workers: int, poll_interval: float, stale_after: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.handlers: Dict[str, Tuple[JobHandler, Type[BaseModel]]] = {}
+        self.schedules: Dict[str, float] = {}
+        self._queue: Optional["asyncio.Queue[int]"] = None
+        self._pending: set = set()
+        self._running: Dict[int, asyncio.Task] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def handler(self, kind: str, params_model: Type[BaseModel]):
+        def register(handler: JobHandler) -> JobHandler:
+            self.handlers[kind] = (handler, params_model)
+            return handler
+        return register
+
+    def schedule(self, kind: str, interval: float) -> None:
+        # Queue a job of this kind, with default params, whenever the last
+        # one was submitted more than interval seconds ago
+        self.schedules[kind] = interval
+
+    def parse_params(self, kind: str, params: dict) -> BaseModel:
+        # Raises pydantic.ValidationError
+        return self.handlers[kind][1].model_validate(params)
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._pending = set()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._poll()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def interrupt(self, job_id: int) -> None:
+        # Stops a job with a cancel requested right away if it runs in this
+        # process; elsewhere it stops at its next progress report
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+
+    def enqueue(self, job_id: int) -> None:
+        # Without a running loop (not started) the poller picks it up later
+        if self._queue is not None and job_id not in self._pending and job_id not in self._running:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    async def _work(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job %s could not be run", job_id)
+
+    async def _run(self, job_id: int) -> None:
+        now = datetime.now()
+        async with SessionLocal() as session:
+            claimed = await session.execute(
+                update(Job).where(Job.id == job_id, Job.status == "queued")
+                .values(status="running", started_at=now, updated_at=now)
+            )
+            await session.commit()
+            if claimed.rowcount != 1:
+                return  # Cancelled, or another process got to it first
+            job = await session.get(Job, job_id)
+            kind, params = job.kind, job.params
+
+        values = {}
+        if kind not in self.handlers:
+            values = {"status": "failed", "error": f"Unknown job kind: {kind}"}
+        else:
+            handler, params_model = self.handlers[kind]
+            task = asyncio.create_task(handler(params_model.model_validate(params), JobContext(job_id)))
+            self._running[job_id] = task
+            try:
+                values = {"status": "succeeded", "result": await task}
+            except JobCancelled:
+                values = {"status": "cancelled"}
+            except asyncio.CancelledError:
+                if not task.cancelled() or asyncio.current_task().cancelling():
+                    # The runner itself is stopping
+                    await self._finish(job_id, {"status": "failed", "error": "Interrupted by shutdown"})
+                    raise
+                values = {"status": "cancelled"}
+            except ValueError as exc:
+                # Bad input the params model couldn't catch, e.g. unknown ids
+                values = {"status": "failed", "error": str(exc)}
+            except Exception as exc:
+                logger.exception("Job %s (%s) failed", job_id, kind)
+                values = {"status": "failed", "error": f"{exc.__class__.__name__}: {exc}"}
+            finally:
+                self._running.pop(job_id, None)
+        await self._finish(job_id, values)
+
+    async def _finish(self, job_id: int, values: dict) -> None:
+        now = datetime.now()
+        async with SessionLocal() as session:
+            await session.execute(
+                update(Job).where(Job.id == job_id).values(**values, finished_at=now, updated_at=now)
+            )
+            await session.commit()
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await self._check_jobs()
+            except Exception:
+                logger.exception("Polling the jobs table failed")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _check_jobs(self) -> None:
+        now = datetime.now()
+        async with SessionLocal() as session:
+            if self._running:
+                # Heartbeat for the jobs running here
+                await session.execute(
+                    update(Job).where(Job.id.in_(list(self._running)), Job.status == "running").values(updated_at=now)
+                )
+            # Jobs whose process stopped heartbeating (crashed or killed) can't finish
+            await session.execute(
+                update(Job)
+                .where(Job.status == "running", Job.updated_at < now - timedelta(seconds=self.stale_after))
+                .values(status="failed", error="Worker stopped", finished_at=now, updated_at=now)
+            )
+            for kind, interval in self.schedules.items():
+                await self._queue_if_due(session, kind, interval, now)
+            await session.commit()
+            queued = await session.execute(select(Job.id).where(Job.status == "queued").order_by(Job.id))
+            for job_id in queued.scalars():
+                self.enqueue(job_id)
+
+    async def _queue_if_due(self, session, kind: str, interval: float, now: datetime) -> None:
+        # One INSERT ... SELECT, so with several processes polling only one
+        # of them queues it (SQLite serializes the writes)
+        params = self.handlers[kind][1]().model_dump(mode="json")
+        recent = select(Job.id).where(Job.kind == kind, Job.created_at > now - timedelta(seconds=interval))
+        await session.execute(insert(Job).from_select(
+            ["kind", "status", "params", "done", "cancel_requested", "created_at"],
+            select(
+                literal(kind), literal("queued"), literal(params, JSON), literal(0), literal(False), literal(now)
+            ).where(~recent.exists())
+        ))
+
+
+job_runner = JobRunner(settings.job_workers, settings.job_poll_interval, settings.job_stale_after)
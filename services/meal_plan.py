@@ -0,0 +1,64 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class UnknownRecipeError(ValueError):
+    def __init__(self, recipe_ids: List[int]):
+        super().__init__(f"Recipe not found: {', '.join(map(str, recipe_ids))}")
+        self.recipe_ids = recipe_ids
+
+
+# (recipe_id, ingredient_id, name, weight, current_cost) of a planned recipe's ingredient
+PlanIngredient = Tuple[int, int, Optional[str], Optional[float], Optional[float]]
+# (nutrient_id, amount) with the amount already scaled by the multipliers;
+# a nutrient can repeat, once per chunk of recipes
+PlanNutrient = Tuple[int, float]
+
+
+def evaluate_plan(
+    multipliers: Dict[int, float],
+    names: Dict[int, str],
+    ingredients: Sequence[PlanIngredient],
+    nutrients: Sequence[PlanNutrient],
+    nutrient_info: Dict[int, Tuple[str, str]]
+) -> dict:
+    """Shopping list, cost and nutrition of a meal plan.
+
+    multipliers maps recipe id to servings multiplier and names maps it to
+    the recipe name. Ingredients are merged by case-insensitive name with
+    their weights and costs scaled by their recipe's multiplier and summed.
+    nutrient_info maps nutrient id to its name and unit.
+    """
+    plan_ids = sorted(multipliers)
+    recipe_costs = dict.fromkeys(plan_ids, 0.0)
+    items: Dict[str, dict] = {}
+    total_weight = 0.0
+    # By ingredient id, so the first spelling seen wins deterministically
+    for recipe_id, ingredient_id, name, weight, cost in sorted(ingredients, key=lambda row: row[1]):
+        multiplier = multipliers[recipe_id]
+        weight = (weight or 0.0) * multiplier
+        cost = (cost or 0.0) * multiplier
+        recipe_costs[recipe_id] += cost
+        total_weight += weight
+        display = (name or "").strip()
+        item = items.setdefault(display.casefold(), {"name": display, "weight": 0.0, "cost": 0.0, "ingredient_ids": []})
+        item["weight"] += weight
+        item["cost"] += cost
+        item["ingredient_ids"].append(ingredient_id)
+
+    recipes = [
+        {"id": recipe_id, "name": names[recipe_id], "multiplier": multipliers[recipe_id], "cost": recipe_costs[recipe_id]}
+        for recipe_id in plan_ids
+    ]
+    totals: Dict[int, float] = {}
+    for nutrient_id, amount in nutrients:
+        totals[nutrient_id] = totals.get(nutrient_id, 0.0) + (amount or 0.0)
+    return {
+        "total_cost": sum(recipe_costs.values()),
+        "total_weight": total_weight,
+        "recipes": recipes,
+        "shopping_list": sorted(items.values(), key=lambda item: item["name"].casefold()),
+        "nutrients": [
+            {"nutrient_id": nutrient_id, "name": nutrient_info[nutrient_id][0], "unit": nutrient_info[nutrient_id][1], "amount": totals[nutrient_id]}
+            for nutrient_id in sorted(totals)
+        ]
+    }
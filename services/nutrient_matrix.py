@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import os
+import pickle
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import ReadSessionLocal
+from models.ingredient import Ingredient, Nutrient, ingredient_nutrients
+from settings import settings
+
+logger = logging.getLogger("nutricost.nutrient_matrix")
+
+
+class UnknownNutrientError(ValueError):
+    def __init__(self, nutrient_ids: Sequence[int]):
+        super().__init__(f"Nutrient not found: {', '.join(map(str, nutrient_ids))}")
+        self.nutrient_ids = list(nutrient_ids)
+
+
+_INGREDIENT_COLUMNS = (Ingredient.id, Ingredient.recipe_id, Ingredient.name)
+
+# Amounts are float32: half the memory of float64, and far more precision
+# than cosine similarity needs
+_DTYPE = np.float32
+
+# Everything _reset and _load_all set, plus the cached similarity norms
+_SNAPSHOT_FIELDS = (
+    "nutrient_ids", "nutrient_info", "_column_of", "values", "ingredient_ids", "recipe_ids",
+    "active", "names", "_row_of", "_free", "_norms", "_scale"
+)
+
+
+class NutrientMatrix:
+    """Ingredient x nutrient matrix of per-100g amounts held in memory.
+
+    Rows are ingredients, columns are nutrients ordered by id; each row also
+    carries the ingredient's name and recipe for similarity results. Costs
+    and totals are read from the database, which is always current.
+
+    Writes mark ingredient ids stale and the next read reloads just those
+    rows; anything that changes the columns (or the ttl running out, which
+    bounds how stale another worker's copy can get) triggers a full rebuild.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = asyncio.Lock()
+        self._loaded_at: Optional[float] = None
+        self._stale: set = set()
+        self._rebuild: Optional[asyncio.Task] = None
+        # Ids written while a background rebuild is reading the tables
+        self._stale_during_rebuild: Optional[set] = None
+        self._reset([])
+
+    def _reset(self, nutrients: List[Tuple[int, str, str]], capacity: int = 0) -> None:
+        self.nutrient_ids = np.array([n[0] for n in nutrients], dtype=np.int64)
+        self.nutrient_info = {n[0]: (n[1], n[2]) for n in nutrients}
+        self._column_of = {nutrient_id: index for index, (nutrient_id, _, _) in enumerate(nutrients)}
+        self.values = np.zeros((capacity, len(nutrients)), dtype=_DTYPE)
+        self.ingredient_ids = np.zeros(capacity, dtype=np.int64)
+        self.recipe_ids = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.names: List[Optional[str]] = [None] * capacity
+        self._row_of: Dict[int, int] = {}
+        self._free: List[int] = list(range(capacity - 1, -1, -1))
+        self._norms: Optional[np.ndarray] = None
+
+    def precompute(self) -> None:
+        # Builds what the first similarity query would otherwise build
+        self._profile_norms()
+
+    def save(self, path: str) -> None:
+        # Snapshot for other processes to start from instead of reading the
+        # tables; see load. Norms are computed first so they ship too.
+        self.precompute()
+        state = {name: getattr(self, name) for name in _SNAPSHOT_FIELDS}
+        # Wall clock: monotonic time isn't comparable across processes
+        state["built_at"] = time.time() - (time.monotonic() - self._loaded_at)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+    def load(self, path: str) -> bool:
+        # Adopts a snapshot written by save (by a trusted process only). It
+        # ages like a matrix built at that time, so it's refreshed on the
+        # same ttl, which already bounds staleness from other processes.
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            logger.warning("Could not read nutrient matrix snapshot %s", path)
+            return False
+        age = time.time() - state["built_at"]
+        if age > self.ttl:
+            return False
+        for name in _SNAPSHOT_FIELDS:
+            setattr(self, name, state[name])
+        self._stale.clear()
+        self._loaded_at = time.monotonic() - age
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        # Size of the arrays, which dominate; every process holds its own
+        return sum(getattr(self, name).nbytes for name in _SNAPSHOT_FIELDS if isinstance(getattr(self, name), np.ndarray))
+
+    def row(self, ingredient_id: int) -> Optional[int]:
+        return self._row_of.get(ingredient_id)
+
+    def mark_stale(self, ingredient_ids: Iterable[int]) -> None:
+        ingredient_ids = list(ingredient_ids)
+        self._stale.update(ingredient_ids)
+        if self._stale_during_rebuild is not None:
+            self._stale_during_rebuild.update(ingredient_ids)
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    async def ensure_current(self, session: AsyncSession) -> "NutrientMatrix":
+        async with self._lock:
+            if self._loaded_at is None:
+                await self._load_all(session)
+            elif self._stale:
+                await self._load_rows(session)
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at > self.ttl and self._rebuild is None:
+            # Expired: keep serving this copy while a fresh one is read
+            self._rebuild = asyncio.create_task(self._rebuild_in_background())
+        return self
+
+    async def _rebuild_in_background(self) -> None:
+        self._stale_during_rebuild = set()
+        try:
+            async with ReadSessionLocal() as session:
+                await self._load_all(session)
+        except Exception:
+            logger.exception("Rebuilding the nutrient matrix failed")
+            self._loaded_at = time.monotonic()
+        finally:
+            self._stale.update(self._stale_during_rebuild)
+            self._stale_during_rebuild = None
+            self._rebuild = None
+
+    async def _load_all(self, session: AsyncSession) -> None:
+        # Anything marked before this point is covered by the reads below
+        self._stale.clear()
+        nutrients = (await session.execute(select(Nutrient.id, Nutrient.name, Nutrient.unit).order_by(Nutrient.id))).all()
+        rows = (await session.execute(select(*_INGREDIENT_COLUMNS))).all()
+        links = (await session.execute(select(ingredient_nutrients.c.ingredient_id, ingredient_nutrients.c.nutrient_id, ingredient_nutrients.c.amount))).all()
+        # Swap in the new contents without awaiting so readers never see a half-built matrix
+        self._loaded_at = time.monotonic()
+        self._reset([tuple(n) for n in nutrients])
+        self._grow(len(rows))
+        self._store_rows(rows)
+        self._store_links(links)
+
+    async def _load_rows(self, session: AsyncSession) -> None:
+        stale = list(self._stale)
+        self._stale.clear()
+        rows = []
+        links = []
+        for start in range(0, len(stale), 500):
+            chunk = stale[start:start + 500]
+            rows.extend((await session.execute(
+                select(*_INGREDIENT_COLUMNS).where(Ingredient.id.in_(chunk))
+            )).all())
+            links.extend((await session.execute(
+                select(ingredient_nutrients.c.ingredient_id, ingredient_nutrients.c.nutrient_id, ingredient_nutrients.c.amount)
+                .where(ingredient_nutrients.c.ingredient_id.in_(chunk))
+            )).all())
+        if any(nutrient_id not in self._column_of for _, nutrient_id, _ in links):
+            # A nutrient created after the last build; rebuild with the new column
+            await self._load_all(session)
+            return
+
+        for ingredient_id in stale:
+            row = self._row_of.pop(ingredient_id, None)
+            if row is not None:
+                self.values[row] = 0.0
+                self.active[row] = False
+                self.names[row] = None
+                self._free.append(row)
+        self._grow(len(rows))
+        self._store_rows(rows)
+        self._store_links(links)
+
+    def _grow(self, needed: int) -> None:
+        if needed <= len(self._free):
+            return
+        capacity = len(self.active)
+        new_capacity = max(capacity * 2, capacity + needed - len(self._free), 64)
+        extra = new_capacity - capacity
+        self.values = np.vstack([self.values, np.zeros((extra, self.values.shape[1]), dtype=_DTYPE)])
+        self.ingredient_ids = np.concatenate([self.ingredient_ids, np.zeros(extra, dtype=np.int64)])
+        self.recipe_ids = np.concatenate([self.recipe_ids, np.zeros(extra, dtype=np.int64)])
+        self.active = np.concatenate([self.active, np.zeros(extra, dtype=bool)])
+        self.names.extend([None] * extra)
+        self._free.extend(range(new_capacity - 1, capacity - 1, -1))
+
+    def _store_rows(self, rows) -> None:
+        for ingredient_id, recipe_id, name in rows:
+            row = self._free.pop()
+            self._row_of[ingredient_id] = row
+            self.ingredient_ids[row] = ingredient_id
+            self.recipe_ids[row] = recipe_id if recipe_id is not None else -1
+            self.names[row] = name
+            self.active[row] = True
+        self._norms = None
+
+    def _store_links(self, links) -> None:
+        self._norms = None
+        if not links or not self.active.any():
+            return
+        ingredient_ids, nutrient_ids, amounts = (np.array(column) for column in zip(*links))
+        live = np.flatnonzero(self.active)
+        live = live[np.argsort(self.ingredient_ids[live])]
+        rows = np.searchsorted(self.ingredient_ids[live], ingredient_ids).clip(max=len(live) - 1)
+        columns = np.searchsorted(self.nutrient_ids, nutrient_ids).clip(max=max(len(self.nutrient_ids) - 1, 0))
+        # Links to deleted nutrients or ingredients are skipped
+        found = (self.ingredient_ids[live][rows] == ingredient_ids)
+        if len(self.nutrient_ids):
+            found &= self.nutrient_ids[columns] == nutrient_ids
+        else:
+            found[:] = False
+        self.values[live[rows[found]], columns[found]] = amounts[found].astype(_DTYPE)
+
+    def _profile_norms(self) -> np.ndarray:
+        # Columns are scaled by their RMS so that nutrients measured in mg
+        # don't drown out the ones in g. Rather than keeping a normalized copy
+        # of the matrix, scores divide by each row's norm of the scaled values.
+        # Free rows are all zeros, so sums over every row equal sums over the
+        # active ones.
+        if self._norms is None:
+            count = int(self.active.sum())
+            squares = np.einsum("ij,ij->j", self.values, self.values, dtype=np.float64)
+            scale = np.sqrt(squares / count) if count else np.ones(self.values.shape[1])
+            self._scale = np.where(scale > 0, scale, 1.0)
+            self._norms = np.sqrt(np.einsum("ij,ij,j->i", self.values, self.values, (1.0 / self._scale ** 2).astype(_DTYPE)))
+        return self._norms
+
+    def profile_vector(self, amounts: Dict[int, float]) -> np.ndarray:
+        unknown = sorted(set(amounts) - set(self._column_of))
+        if unknown:
+            raise UnknownNutrientError(unknown)
+        vector = np.zeros(len(self.nutrient_ids))
+        for nutrient_id, amount in amounts.items():
+            vector[self._column_of[nutrient_id]] = amount
+        return vector
+
+    def nearest(self, vector: np.ndarray, limit: int, exclude: Optional[int] = None) -> List[dict]:
+        norms = self._profile_norms()
+        query = vector / self._scale
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        # Cosine of the scaled rows: the scale folds into the query
+        scores = (self.values @ (query / norm / self._scale).astype(_DTYPE)) / np.where(norms > 0, norms, 1.0)
+        # Ingredients without any nutrient data have nothing to compare
+        candidates = self.active & (norms > 0)
+        if exclude is not None and exclude in self._row_of:
+            candidates[self._row_of[exclude]] = False
+        rows = np.flatnonzero(candidates)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(-scores[rows], limit - 1)[:limit]]
+        rows = rows[np.lexsort((self.ingredient_ids[rows], -scores[rows]))]
+        return [
+            {
+                "id": int(self.ingredient_ids[row]),
+                "name": self.names[row],
+                "recipe_id": int(self.recipe_ids[row]) if self.recipe_ids[row] >= 0 else None,
+                "similarity": float(scores[row])
+            }
+            for row in rows
+        ]
+
+    def similar_to(self, ingredient_id: int, limit: int) -> Optional[List[dict]]:
+        row = self._row_of.get(ingredient_id)
+        if row is None:
+            return None
+        return self.nearest(self.values[row], limit, exclude=ingredient_id)
+
+
+nutrient_matrix = NutrientMatrix(ttl=settings.nutrient_matrix_ttl)
@@ -0,0 +1,40 @@
+from typing import Dict, List, Optional, Tuple
+
+
+class UnknownIngredientError(ValueError):
+    def __init__(self, ingredient_ids: List[int]):
+        super().__init__(f"Ingredient not found: {', '.join(map(str, ingredient_ids))}")
+        self.ingredient_ids = ingredient_ids
+
+
+# A change is either an absolute cost or a percentage applied to the current cost
+PriceChange = Tuple[Optional[float], Optional[float]]
+
+
+def _apply(cost: float, change: PriceChange) -> float:
+    new_cost, percent = change
+    if new_cost is not None:
+        return new_cost
+    return cost * (1.0 + percent / 100.0)
+
+
+def reprice(
+    recipe_costs: Dict[int, float],
+    touched: Dict[int, Tuple[Optional[int], Optional[float]]],
+    changes: Dict[int, PriceChange]
+) -> List[dict]:
+    """Old and new cost of every recipe touched by the hypothetical changes.
+
+    recipe_costs maps each affected recipe to its current total, touched
+    maps each changed ingredient to its (recipe_id, current_cost), and
+    changes maps it to the change that applies, already resolved from
+    vendor-wide ones. Ingredients without a recipe change nothing.
+    """
+    new_costs = dict(recipe_costs)
+    for ingredient_id, (recipe_id, cost) in touched.items():
+        if recipe_id is not None:
+            new_costs[recipe_id] += _apply(cost or 0.0, changes[ingredient_id]) - (cost or 0.0)
+    return [
+        {"id": recipe_id, "old_cost": recipe_costs[recipe_id], "new_cost": new_costs[recipe_id], "delta": new_costs[recipe_id] - recipe_costs[recipe_id]}
+        for recipe_id in sorted(recipe_costs)
+    ]
@@ -0,0 +1,107 @@
+import os
+from dataclasses import dataclass, fields
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime configuration; every field can be overridden by the upper-cased
+    environment variable of the same name (or a .env file)."""
+
+    database_url: str = "sqlite+aiosqlite:///./recipes.db"
+    db_echo: bool = False
+
+    # Connection pool (QueuePool for both SQLite files and PostgreSQL)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+
+    # Read-only engine for GET requests, with its own pool. An empty URL
+    # means the same database: a mode=ro connection for a SQLite file, a
+    # read-only session for PostgreSQL. Point it at a replica to offload
+    # reads. A read pool size of 0 means one connection per CPU core, at least 4.
+    db_read_split: bool = True
+    read_database_url: str = ""
+    db_read_pool_size: int = 0
+    db_read_max_overflow: int = 10
+
+    # Startup: bootstrap_schema creates tables and derived data in lifespan
+    # (serve.py does it once before starting workers and turns it off for
+    # them); warm_start opens pool connections and builds the nutrient
+    # matrix before the first request. web_workers of 0 means one per core.
+    bootstrap_schema: bool = True
+    warm_start: bool = False
+    web_workers: int = 0
+
+    # SQLite pragmas applied to every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 268435456
+
+    # Request instrumentation (/metrics is always available). With a
+    # metrics_dir, shared by all workers (serve.py sets one), every worker
+    # writes its metrics there each flush interval and /metrics sums them.
+    metrics_server_timing: bool = False
+    query_count_warning_threshold: int = 50
+    metrics_dir: str = ""
+    metrics_flush_interval: float = 5.0
+
+    # Encode list and detail responses straight from projected rows with
+    # orjson instead of validating ORM objects through the schemas
+    fast_serialization: bool = False
+
+    # In-process response caches
+    recipe_cache_size: int = 1024
+    recipe_cache_ttl: float = 60.0
+    nutrient_cache_size: int = 256
+    nutrient_cache_ttl: float = 300.0
+    # Seconds before the in-memory ingredient x nutrient matrix is rebuilt;
+    # with warm_start, a snapshot file (written by serve.py) to start from
+    nutrient_matrix_ttl: float = 300.0
+    nutrient_matrix_snapshot: str = ""
+
+    # Group commit for POST /ingredients/{id}/cost: entries arriving while a
+    # batch is being written go into the next one, up to cost_batch_size.
+    # A delay (seconds) holds a batch open to collect more before writing.
+    cost_batch_size: int = 1000
+    cost_batch_max_delay: float = 0.0
+
+    # Background jobs: concurrent jobs per process, how often the jobs table
+    # is polled (for jobs queued by other processes) and how long a running
+    # job may go without a heartbeat before it is considered dead
+    job_workers: int = 2
+    job_poll_interval: float = 2.0
+    job_stale_after: float = 60.0
+
+    # Cost history compaction: entries older than the horizon are rolled up
+    # to one per ingredient, vendor and period (day, week or month). A
+    # positive interval (seconds) queues a compaction job that often.
+    cost_history_horizon_days: int = 365
+    cost_compaction_period: str = "month"
+    cost_compaction_interval: float = 0.0
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.database_url.startswith("sqlite")
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        values = {}
+        for field in fields(cls):
+            raw = os.getenv(field.name.upper())
+            if raw is None:
+                continue
+            if field.type is bool:
+                values[field.name] = raw.strip().lower() in ("1", "true", "yes", "on")
+            else:
+                values[field.name] = field.type(raw)
+        return cls(**values)
+
+
+settings = Settings.from_env()
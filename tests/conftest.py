@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+# Settings are read once at import, so the test database is chosen before
+# anything from the app is imported
+DATA_DIR = tempfile.mkdtemp(prefix="nutricost-tests-")
+DATABASE_PATH = os.path.join(DATA_DIR, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DATABASE_PATH}"
+os.environ["METRICS_DIR"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+
+from cache import nutrient_cache, recipe_cache
+from database import engine, read_engine
+from main import app, lifespan
+from services.nutrient_matrix import nutrient_matrix
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def reset_database() -> None:
+    # A new file per test; in-process caches would otherwise outlive it
+    await engine.dispose()
+    await read_engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DATABASE_PATH + suffix):
+            os.remove(DATABASE_PATH + suffix)
+    recipe_cache.clear()
+    nutrient_cache.clear()
+    nutrient_matrix.invalidate()
+
+
+@pytest.fixture
+async def empty_database():
+    # For tests that create the file themselves before the app starts
+    await reset_database()
+    yield DATABASE_PATH
+
+
+@pytest.fixture
+async def client(empty_database):
+    async with lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            yield http
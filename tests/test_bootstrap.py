@@ -0,0 +1,71 @@
+import sqlite3
+import subprocess
+import sys
+import os
+
+import httpx
+import pytest
+
+from main import app, lifespan
+
+pytestmark = pytest.mark.anyio
+
+# The schema as the first release created it, before current_cost and the
+# indexes added to existing tables since
+BASELINE_SCHEMA = """
+CREATE TABLE recipes (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR);
+CREATE TABLE nutrients (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR UNIQUE, unit VARCHAR);
+CREATE TABLE ingredients (
+    id INTEGER NOT NULL PRIMARY KEY, name VARCHAR, weight FLOAT,
+    recipe_id INTEGER REFERENCES recipes (id)
+);
+CREATE TABLE cost_entries (
+    id INTEGER NOT NULL PRIMARY KEY, cost FLOAT, date DATETIME, vendor VARCHAR, notes VARCHAR,
+    ingredient_id INTEGER REFERENCES ingredients (id)
+);
+CREATE TABLE ingredient_nutrients (
+    ingredient_id INTEGER NOT NULL REFERENCES ingredients (id),
+    nutrient_id INTEGER NOT NULL REFERENCES nutrients (id),
+    amount FLOAT NOT NULL,
+    PRIMARY KEY (ingredient_id, nutrient_id)
+);
+INSERT INTO recipes VALUES (1, 'Soup');
+INSERT INTO ingredients VALUES (1, 'Leek', 100, 1);
+INSERT INTO cost_entries VALUES (1, 2.0, '2024-01-01 00:00:00.000000', 'Acme', NULL, 1);
+INSERT INTO cost_entries VALUES (2, 3.5, '2024-02-01 00:00:00.000000', 'Acme', NULL, 1);
+"""
+
+
+async def test_upgrades_database_created_before_current_cost(empty_database):
+    with sqlite3.connect(empty_database) as connection:
+        connection.executescript(BASELINE_SCHEMA)
+
+    async with lifespan(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/ingredients/")
+            assert response.status_code == 200
+            assert response.json()[0]["cost"] == 3.5
+            assert (await client.get("/recipes/1/summary")).json()["total_cost"] == 3.5
+
+    with sqlite3.connect(empty_database) as connection:
+        indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"ix_cost_entries_ingredient_id_date", "ix_ingredients_recipe_id"} <= indexes
+
+
+def test_in_memory_database_url():
+    script = (
+        "import asyncio, httpx\n"
+        "from main import app, lifespan\n"
+        "async def main():\n"
+        "    async with lifespan(app):\n"
+        "        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test') as client:\n"
+        "            created = await client.post('/recipes/', json={'name': 'Soup', 'ingredients': []})\n"
+        "            assert created.status_code == 201, created.text\n"
+        "            assert (await client.get(f\"/recipes/{created.json()['id']}\")).status_code == 200\n"
+        "asyncio.run(main())\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for url in ("sqlite+aiosqlite:///:memory:", "sqlite+aiosqlite://"):
+        env = {**os.environ, "DATABASE_URL": url, "WARM_START": "true"}
+        result = subprocess.run([sys.executable, "-c", script], cwd=root, env=env, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+import routes.recipe
+from cache import TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+def test_set_skipped_after_invalidate():
+    cache = TTLCache(maxsize=4, ttl=60)
+    generation = cache.generation("a")
+    cache.invalidate("a")
+    assert cache.set("a", "stale", generation) == "stale"
+    assert cache.get("a") is None
+
+    generation = cache.generation("a")
+    cache.clear()
+    cache.set("a", "stale", generation)
+    assert cache.get("a") is None
+
+    cache.set("a", "fresh", cache.generation("a"))
+    assert cache.get("a") == "fresh"
+
+
+async def test_write_during_load_is_not_cached_stale(client, monkeypatch):
+    recipe = (await client.post("/recipes/", json={"name": "Old", "ingredients": []})).json()
+    load = routes.recipe.RecipeRepository.get_recipe
+    release = asyncio.Event()
+
+    async def slow_load(self, recipe_id):
+        found = await load(self, recipe_id)
+        await release.wait()
+        return found
+
+    monkeypatch.setattr(routes.recipe.RecipeRepository, "get_recipe", slow_load)
+    read = asyncio.create_task(client.get(f"/recipes/{recipe['id']}"))
+    await asyncio.sleep(0.05)
+    monkeypatch.setattr(routes.recipe.RecipeRepository, "get_recipe", load)
+
+    assert (await client.put(f"/recipes/{recipe['id']}", json={"name": "New", "ingredients": []})).status_code == 200
+    release.set()
+    assert (await read).json()["name"] == "Old"
+    assert (await client.get(f"/recipes/{recipe['id']}")).json()["name"] == "New"
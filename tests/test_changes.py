@@ -0,0 +1,24 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_reused_ingredient_id_is_not_reported_deleted(client):
+    recipe = (await client.post("/recipes/", json={"name": "Soup", "ingredients": [
+        {"name": "Leek", "weight": 100, "cost": 1.0},
+        {"name": "Kale", "weight": 50, "cost": 2.0},
+    ]})).json()
+    removed = recipe["ingredients"][-1]["id"]
+    since = (await client.get("/changes")).json()["version"]
+
+    # SQLite hands the removed (highest) id to the new row in the same transaction
+    patched = (await client.patch(f"/recipes/{recipe['id']}", json={
+        "ingredients": [{"name": "Salt", "weight": 5, "cost": 0.1}],
+        "remove_ingredient_ids": [removed],
+    })).json()
+    added = next(ingredient["id"] for ingredient in patched["ingredients"] if ingredient["name"] == "Salt")
+    assert added == removed
+
+    changes = (await client.get("/changes", params={"since": since, "type": "ingredient"})).json()["changes"]
+    assert [(change["id"], change["deleted"]) for change in changes] == [(added, False)]
+    assert (await client.get(f"/ingredients/{added}")).json()["name"] == "Salt"
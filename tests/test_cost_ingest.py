@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from repositories.ingredient_repository import IngredientRepository
+from schemas.ingredient import CostEntry
+from services.cost_ingest import CostBatcher
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_ingredient(client):
+    recipe = (await client.post("/recipes/", json={"name": "Soup", "ingredients": [
+        {"name": "Leek", "weight": 100, "cost": 1.0}
+    ]})).json()
+    return recipe["ingredients"][0]["id"]
+
+
+async def test_concurrent_entries_are_acknowledged_after_one_commit(client, monkeypatch):
+    ingredient_id = await create_ingredient(client)
+    batches = []
+    add_cost_entries = IngredientRepository.add_cost_entries
+
+    async def recording(self, entries):
+        batches.append(len(entries))
+        return await add_cost_entries(self, entries)
+
+    monkeypatch.setattr(IngredientRepository, "add_cost_entries", recording)
+    responses = await asyncio.gather(*(
+        client.post(f"/ingredients/{ingredient_id}/cost", json={"cost": cost, "date": f"2999-01-0{cost}T00:00:00"}, headers={"Prefer": "return=minimal"})
+        for cost in range(2, 7)
+    ))
+    # Only the newest entry of the batch ends up as the current price
+    assert [response.json()["current"] for response in responses] == [False] * 4 + [True]
+    assert batches == [5]
+    ingredient = (await client.get(f"/ingredients/{ingredient_id}")).json()
+    assert ingredient["cost"] == 6.0
+    assert len(ingredient["cost_entries"]) == 6
+
+
+async def test_failing_entry_only_fails_its_caller(client, monkeypatch):
+    ingredient_id = await create_ingredient(client)
+    add_cost_entries = IngredientRepository.add_cost_entries
+
+    async def rejecting(self, entries):
+        if any(entry.cost == 13 for _, entry in entries):
+            raise RuntimeError("rejected")
+        return await add_cost_entries(self, entries)
+
+    monkeypatch.setattr(IngredientRepository, "add_cost_entries", rejecting)
+    batcher = CostBatcher(max_batch=10, max_delay=0)
+    results = await asyncio.gather(*(batcher.add(ingredient_id, CostEntry(cost=cost)) for cost in (12, 13, 14)), return_exceptions=True)
+    assert results[0] is True
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] is True
+    ingredient = (await client.get(f"/ingredients/{ingredient_id}")).json()
+    assert sorted(entry["cost"] for entry in ingredient["cost_entries"]) == [1.0, 12.0, 14.0]
+
+
+async def test_cancelled_writer_fails_pending_callers(client):
+    ingredient_id = await create_ingredient(client)
+    batcher = CostBatcher(max_batch=10, max_delay=60)
+    pending = asyncio.create_task(batcher.add(ingredient_id, CostEntry(cost=2)))
+    # The writer is waiting for the batch to fill up
+    await asyncio.sleep(0.01)
+    batcher._writer.cancel()
+    with pytest.raises(RuntimeError):
+        await pending
@@ -0,0 +1,24 @@
+import sqlite3
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_plan_uses_prices_written_by_other_processes(client, empty_database):
+    nutrient = (await client.post("/nutrients/", json={"name": "Iron", "unit": "mg"})).json()
+    recipe = (await client.post("/recipes/", json={"name": "Soup", "ingredients": [
+        {"name": "Leek", "weight": 100, "cost": 1.0, "nutrients": [{"nutrient": nutrient, "amount": 2}]}
+    ]})).json()
+    plan = {"recipes": [{"recipe_id": recipe["id"], "multiplier": 2}]}
+    assert (await client.post("/meal-plans/evaluate", json=plan)).json()["total_cost"] == 2.0
+
+    # Another worker's writes, which this process's nutrient matrix doesn't see
+    with sqlite3.connect(empty_database) as connection:
+        connection.execute("UPDATE ingredients SET current_cost = 9, weight = 200")
+        connection.execute("UPDATE ingredient_nutrients SET amount = 3")
+
+    evaluation = (await client.post("/meal-plans/evaluate", json=plan)).json()
+    assert evaluation["total_cost"] == 18.0
+    assert evaluation["total_weight"] == 400.0
+    assert evaluation["nutrients"][0]["amount"] == 12.0
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import OperationalError
+
+from database import SessionLocal
+from metrics import Counter, Histogram, MetricsFiles, RequestStats, current_stats
+from models.ingredient import Ingredient
+
+
+def test_metrics_files_sum_workers(tmp_path, monkeypatch):
+    files = MetricsFiles(str(tmp_path), interval=5)
+    counter = Counter("requests_total", "Requests.", ("route",))
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), (0.1, 1))
+    monkeypatch.setattr("metrics.REGISTRY", [counter, histogram])
+
+    for pid, seconds in ((100, 0.05), (200, 0.5)):
+        counter.values.clear()
+        histogram.values.clear()
+        counter.inc(("/",))
+        histogram.observe(("/",), seconds)
+        monkeypatch.setattr("os.getpid", lambda: pid)
+        files.write()
+
+    total_counter, total_histogram = counter.empty(), histogram.empty()
+    for state in files.read_all():
+        total_counter.load(state[counter.name])
+        total_histogram.load(state[histogram.name])
+    assert total_counter.values == {("/",): 2.0}
+    assert total_histogram.values == {("/",): ([1, 1], 0.55, 2)}
+
+
+@pytest.mark.anyio
+async def test_request_stats_count_rows_and_failed_queries(client):
+    await client.post("/recipes/", json={"name": "Soup", "ingredients": [
+        {"name": "Leek", "weight": 100, "cost": 1.0}, {"name": "Salt", "weight": 5, "cost": 0.1}
+    ]})
+    stats = RequestStats()
+    token = current_stats.set(stats)
+    try:
+        async with SessionLocal() as session:
+            assert len((await session.execute(select(Ingredient.id))).all()) == 2
+            await session.execute(update(Ingredient).values(weight=1))
+            with pytest.raises(OperationalError):
+                await session.execute(text("SELECT * FROM missing"))
+            # The failed statement's start time didn't leak
+            connection = await session.connection()
+            assert connection.sync_connection.info["query_started_at"] == []
+    finally:
+        current_stats.reset(token)
+    assert (stats.queries, stats.rows) == (3, 4)
@@ -0,0 +1,61 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_recipe_with_nutrient(client, amount=2.0):
+    nutrient = (await client.post("/nutrients/", json={"name": "Iron", "unit": "mg"})).json()
+    response = await client.post("/recipes/", json={"name": "Soup", "ingredients": [
+        {"name": "Leek", "weight": 100, "cost": 1.0, "nutrients": [{"nutrient": nutrient, "amount": amount}]}
+    ]})
+    assert response.status_code == 201
+    return nutrient, response.json()
+
+
+async def test_delete_nutrient_in_use(client):
+    nutrient, recipe = await create_recipe_with_nutrient(client)
+    ingredient_id = recipe["ingredients"][0]["id"]
+
+    assert (await client.delete(f"/nutrients/{nutrient['id']}")).status_code == 204
+
+    for path in (f"/ingredients/{ingredient_id}", f"/recipes/{recipe['id']}", "/recipes/", "/ingredients/"):
+        response = await client.get(path)
+        assert response.status_code == 200, path
+    assert (await client.get(f"/ingredients/{ingredient_id}")).json()["nutrients"] == []
+
+
+async def test_catalog_load_rejects_zero_amount(client):
+    _, recipe = await create_recipe_with_nutrient(client)
+    ingredient_id = recipe["ingredients"][0]["id"]
+    lines = [
+        f'{{"name": "Zinc", "unit": "mg", "ingredient_id": {ingredient_id}, "amount": 0}}',
+        f'{{"name": "Iron", "ingredient_id": {ingredient_id}, "amount": 0.0}}',
+        f'{{"name": "Iron", "ingredient_id": {ingredient_id}, "amount": 5}}',
+    ]
+    result = (await client.post("/nutrients/bulk", content="\n".join(lines).encode())).json()
+    assert result["imported"] == 1
+    assert [error["line"] for error in result["errors"]] == [1, 2]
+
+    response = await client.get(f"/ingredients/{ingredient_id}")
+    assert response.status_code == 200
+    assert [item["amount"] for item in response.json()["nutrients"]] == [5.0]
+
+
+async def test_similar_ingredients_scale_nutrients_alike(client):
+    iron = (await client.post("/nutrients/", json={"name": "Iron", "unit": "mg"})).json()
+    protein = (await client.post("/nutrients/", json={"name": "Protein", "unit": "g"})).json()
+
+    def ingredient(name, iron_amount, protein_amount):
+        return {"name": name, "weight": 100, "cost": 1.0, "nutrients": [
+            {"nutrient": iron, "amount": iron_amount}, {"nutrient": protein, "amount": protein_amount}
+        ]}
+
+    recipe = (await client.post("/recipes/", json={"name": "Stew", "ingredients": [
+        ingredient("Beef", 2000, 20), ingredient("Lentils", 4000, 40), ingredient("Spinach", 3000, 2)
+    ]})).json()
+    beef, lentils, spinach = (i["id"] for i in recipe["ingredients"])
+    similar = (await client.get(f"/ingredients/{beef}/similar", params={"limit": 2})).json()
+    # Lentils have beef's profile at twice the amounts; milligrams of iron
+    # don't drown out grams of protein
+    assert [hit["id"] for hit in similar] == [lentils, spinach]
+    assert similar[0]["similarity"] == pytest.approx(1.0, abs=1e-6)
@@ -0,0 +1,53 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_soup(client):
+    return (await client.post("/recipes/", json={"name": "Soup", "ingredients": [
+        {"name": "Leek", "weight": 100, "cost": 1.0, "cost_entries": [{"cost": 1.5, "date": "2024-01-01T00:00:00", "vendor": "Acme"}]},
+        {"name": "Salt", "weight": 5, "cost": 0.1}
+    ]})).json()
+
+
+async def test_put_renames_and_keeps_ingredient_history(client):
+    recipe = await create_soup(client)
+    leek, salt = recipe["ingredients"]
+    response = await client.put(f"/recipes/{recipe['id']}", json={"name": "Leek soup", "ingredients": [
+        {"id": leek["id"], "name": "Sliced leek", "weight": 120, "cost": 1.0},
+        {"name": "Salt", "weight": 5, "cost": 0.1}
+    ]})
+    assert response.status_code == 200
+    updated = response.json()
+    assert updated["name"] == "Leek soup"
+    assert [(i["id"], i["name"], i["weight"]) for i in updated["ingredients"]] == [
+        (leek["id"], "Sliced leek", 120.0), (salt["id"], "Salt", 5.0)
+    ]
+    assert updated["ingredients"][0]["cost_entries"] == leek["cost_entries"]
+
+
+async def test_patch_removes_listed_ingredients_only(client):
+    recipe = await create_soup(client)
+    leek, salt = recipe["ingredients"]
+    response = await client.patch(f"/recipes/{recipe['id']}", json={
+        "ingredients": [{"id": leek["id"], "weight": 80}], "remove_ingredient_ids": [salt["id"]]
+    })
+    assert response.status_code == 200
+    assert [(i["id"], i["weight"]) for i in response.json()["ingredients"]] == [(leek["id"], 80.0)]
+    assert (await client.get(f"/ingredients/{salt['id']}")).status_code == 404
+
+
+@pytest.mark.parametrize("method, body", [
+    ("put", lambda leek, salt: {"name": "Soup", "ingredients": [{"id": 999, "name": "Leek", "weight": 1, "cost": 1}]}),
+    ("put", lambda leek, salt: {"name": "Soup", "ingredients": [
+        {"id": leek["id"], "name": "Leek", "weight": 1, "cost": 1}, {"id": leek["id"], "name": "Leek", "weight": 2, "cost": 1}
+    ]}),
+    ("patch", lambda leek, salt: {"remove_ingredient_ids": [999]}),
+    ("patch", lambda leek, salt: {"ingredients": [{"id": salt["id"], "weight": 9}], "remove_ingredient_ids": [salt["id"]]}),
+])
+async def test_unknown_or_conflicting_ingredient_ids_are_rejected(client, method, body):
+    recipe = await create_soup(client)
+    response = await getattr(client, method)(f"/recipes/{recipe['id']}", json=body(*recipe["ingredients"]))
+    assert response.status_code == 400
+    # Nothing was written
+    assert (await client.get(f"/recipes/{recipe['id']}")).json() == recipe
@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_soup(client):
+    # Vendor entries dated after the initial cost, so they are the current prices
+    return (await client.post("/recipes/", json={"name": "Soup", "ingredients": [
+        {"name": "Leek", "weight": 100, "cost": 1.0, "cost_entries": [{"cost": 1.0, "date": "2999-01-01T00:00:00", "vendor": "Acme"}]},
+        {"name": "Salt", "weight": 5, "cost": 2.0, "cost_entries": [{"cost": 2.0, "date": "2999-01-01T00:00:00", "vendor": "Other"}]}
+    ]})).json()
+
+
+async def test_reprice_uses_prices_written_by_other_processes(client, empty_database):
+    recipe = await create_soup(client)
+    leek = next(i for i in recipe["ingredients"] if i["name"] == "Leek")
+
+    # Another worker's write, which this process's nutrient matrix doesn't see
+    with sqlite3.connect(empty_database) as connection:
+        connection.execute("UPDATE ingredients SET current_cost = 4 WHERE id = ?", (leek["id"],))
+
+    response = await client.post("/recipes/reprice", json={"changes": [{"ingredient_id": leek["id"], "percent": 50}]})
+    assert response.status_code == 200
+    assert response.json()["recipes"] == [{"id": recipe["id"], "old_cost": 6.0, "new_cost": 8.0, "delta": 2.0}]
+
+
+async def test_vendor_change_applies_to_its_ingredients_only(client, empty_database):
+    recipe = await create_soup(client)
+    salt = next(i for i in recipe["ingredients"] if i["name"] == "Salt")
+
+    response = await client.post("/recipes/reprice", json={"changes": [{"vendor": "Acme", "percent": 100}]})
+    assert response.json()["total_delta"] == 1.0
+
+    # An ingredient change overrides the vendor-wide one
+    response = await client.post("/recipes/reprice", json={"changes": [
+        {"vendor": "Other", "percent": 100}, {"ingredient_id": salt["id"], "cost": 0}
+    ]})
+    assert response.json()["recipes"][0]["new_cost"] == 1.0
+
+
+async def test_reprice_unknown_ingredient(client, empty_database):
+    response = await client.post("/recipes/reprice", json={"changes": [{"ingredient_id": 999, "cost": 1}]})
+    assert response.status_code == 400
@@ -0,0 +1,17 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("query", ["QUIZ", "quiz", "Qu", "q"])
+async def test_prefix_matches_regardless_of_case_and_length(client, query):
+    await client.post("/recipes/", json={"name": "Quiz Pie", "ingredients": []})
+    response = await client.get("/search", params={"q": query, "type": "recipe"})
+    assert response.status_code == 200
+    assert [(hit["name"], hit["match"]) for hit in response.json()] == [("Quiz Pie", "prefix")]
+
+
+async def test_short_query_with_typo_matches_fuzzily(client):
+    await client.post("/recipes/", json={"name": "Stew", "ingredients": [{"name": "Carrot", "weight": 50, "cost": 0.2}]})
+    response = await client.get("/search", params={"q": "carot", "type": "ingredient"})
+    assert [(hit["name"], hit["match"]) for hit in response.json()] == [("Carrot", "fuzzy")]
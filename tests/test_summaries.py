@@ -0,0 +1,22 @@
+import sqlite3
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_summary_reflects_writes_from_other_processes(client, empty_database):
+    nutrient = (await client.post("/nutrients/", json={"name": "Protein", "unit": "g"})).json()
+    recipe = (await client.post("/recipes/", json={"name": "Soup", "ingredients": [
+        {"name": "Leek", "weight": 100, "cost": 1.0, "nutrients": [{"nutrient": nutrient, "amount": 5}]}
+    ]})).json()
+    summary = (await client.get(f"/recipes/{recipe['id']}/summary")).json()
+    assert (summary["total_cost"], summary["nutrients"][0]["amount"]) == (1.0, 5.0)
+
+    # Another worker's writes, which this process's nutrient matrix doesn't see
+    with sqlite3.connect(empty_database) as connection:
+        connection.execute("UPDATE ingredients SET current_cost = 9")
+        connection.execute("UPDATE ingredient_nutrients SET amount = 50")
+
+    summary = (await client.post("/recipes/summaries", json={"recipe_ids": [recipe["id"]]})).json()[0]
+    assert (summary["total_cost"], summary["nutrients"][0]["amount"]) == (9.0, 50.0)
@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from database import engine
+from repositories.vendor_repository import backfill_vendor_prices
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_leek(client):
+    recipe = (await client.post("/recipes/", json={"name": "Soup", "ingredients": [
+        {"name": "Leek", "weight": 100, "cost": 3.0, "cost_entries": [
+            {"cost": 2.5, "date": "2024-01-01T00:00:00", "vendor": "Acme"},
+            {"cost": 2.0, "date": "2024-02-01T00:00:00", "vendor": "Acme"},
+            {"cost": 1.0, "date": "2024-01-15T00:00:00", "vendor": "FreshCo"}
+        ]},
+        {"name": "Salt", "weight": 5, "cost": 0.1}
+    ]})).json()
+    return recipe, recipe["ingredients"][0]["id"]
+
+
+async def vendor_prices(client, ingredient_id):
+    response = await client.get(f"/ingredients/{ingredient_id}/vendors")
+    return [(price["vendor"], price["cost"]) for price in response.json()]
+
+
+async def test_index_keeps_latest_price_per_vendor(client):
+    _, leek = await create_leek(client)
+    assert await vendor_prices(client, leek) == [("FreshCo", 1.0), ("Acme", 2.0)]
+
+    # A backdated entry is recorded in the history but doesn't replace the price
+    await client.post(f"/ingredients/{leek}/cost", json={"cost": 0.5, "date": "2023-01-01T00:00:00", "vendor": "Acme"})
+    assert await vendor_prices(client, leek) == [("FreshCo", 1.0), ("Acme", 2.0)]
+    await client.post(f"/ingredients/{leek}/cost", json={"cost": 0.5, "date": "2024-03-01T00:00:00", "vendor": "Acme"})
+    assert await vendor_prices(client, leek) == [("Acme", 0.5), ("FreshCo", 1.0)]
+
+
+async def test_cheapest_vendor_per_ingredient_and_recipe(client):
+    recipe, leek = await create_leek(client)
+    salt = recipe["ingredients"][1]["id"]
+    cheapest = (await client.get("/vendors/cheapest", params={"ingredient_ids": f"{leek},{salt}"})).json()
+    assert [(price["ingredient_id"], price["vendor"], price["cost"]) for price in cheapest] == [(leek, "FreshCo", 1.0)]
+
+    [costs] = (await client.get("/vendors/cheapest/recipes", params={"recipe_ids": str(recipe["id"])})).json()
+    assert (costs["current_cost"], costs["lowest_cost"], costs["savings"]) == pytest.approx((3.1, 1.1, 2.0))
+    assert [(choice["ingredient_id"], choice["vendor"]) for choice in costs["ingredients"]] == [(leek, "FreshCo"), (salt, None)]
+
+
+async def test_backfill_rebuilds_index_from_history(client, empty_database):
+    _, leek = await create_leek(client)
+    with sqlite3.connect(empty_database) as connection:
+        connection.execute("DELETE FROM vendor_prices")
+    assert await vendor_prices(client, leek) == []
+
+    async with engine.begin() as connection:
+        await connection.run_sync(backfill_vendor_prices)
+    assert await vendor_prices(client, leek) == [("FreshCo", 1.0), ("Acme", 2.0)]